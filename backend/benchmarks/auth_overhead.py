@@ -0,0 +1,97 @@
+"""
+Đo chi phí xác thực trên mỗi request được bảo vệ (/api/users/me).
+
+So sánh ba chế độ của get_current_user:
+
+- database: không cache, truy vấn bảng user ở mỗi request (hành vi cũ)
+- cache: cache người dùng theo subject của token
+- claims: token nhúng thông tin người dùng (AUTH_EMBED_USER_CLAIMS)
+
+Với mỗi chế độ, in ra độ trễ p50/p95 của request và số câu SQL trung bình mỗi request.
+
+Cách chạy (từ thư mục backend):
+
+    python benchmarks/auth_overhead.py --requests 500
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run_mode(main, http, mode: str, requests: int):
+    import cache
+
+    main.AUTH_EMBED_USER_CLAIMS = mode == "claims"
+    main.user_cache = cache.LRUCache(0 if mode == "database" else main.AUTH_USER_CACHE_SIZE, main.AUTH_USER_CACHE_TTL)
+
+    token = http.post("/api/token", data={"username": "bench", "password": "bench-password"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    queries = {"count": 0}
+
+    def count_query(*args, **kwargs):
+        queries["count"] += 1
+
+    from sqlalchemy import event
+    from models import async_engine
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_query)
+
+    # Warm-up
+    http.get("/api/users/me", headers=headers).raise_for_status()
+    queries["count"] = 0
+
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        http.get("/api/users/me", headers=headers).raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count_query)
+
+    return {
+        "mode": mode,
+        "requests": requests,
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "db_queries_per_request": round(queries["count"] / requests, 2),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="freelancer-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    os.chdir(workdir)
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    import logging
+    import db
+    import main
+    from fastapi.testclient import TestClient
+    logging.getLogger().setLevel(logging.WARNING)
+    # Client không chạy lifespan nên khởi tạo database trực tiếp
+    db.init_db()
+
+    http = TestClient(main.app)
+    http.post("/api/register", json={"email": "bench@example.com", "username": "bench", "password": "bench-password"})
+
+    results = [run_mode(main, http, mode, args.requests) for mode in ["database", "cache", "claims"]]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
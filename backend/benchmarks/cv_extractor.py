@@ -0,0 +1,124 @@
+"""
+Đo bộ trích xuất CV tại local (cv_extractor): từ điển kỹ năng (Aho-Corasick) và chia mục theo tiêu đề.
+
+Tạo `--cvs` CV tổng hợp (các mục kỹ năng, kinh nghiệm, dự án, học vấn với nội dung ngẫu nhiên như seed.py)
+và đo:
+
+- build: thời gian dựng automaton từ từ điển (một lần khi dùng lần đầu)
+- regex: cách trích xuất cũ khi không gọi được LLM (3 lần re.findall "Skills:/Experience:/Education:")
+- analyze: chia mục + tìm kỹ năng + đánh dấu các dòng kỹ năng đã nhận diện
+- tokens: số token nội dung CV gửi tới LLM khi không và khi có điền sẵn kỹ năng (các dòng liệt kê kỹ năng
+  đã nhận diện và mục không dùng tới bị bỏ), và ước lượng số token đầu ra LLM không phải sinh lại
+
+Cách chạy (từ thư mục backend):
+
+    python benchmarks/cv_extractor.py --cvs 200
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(mode: str, samples):
+    return {
+        "mode": mode,
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+    }
+
+
+def synthetic_cv(rng: random.Random, pool, skills, soft_skills) -> str:
+    import seed
+
+    def pick(names, count):
+        return ", ".join(rng.sample(names, min(count, len(names))))
+
+    lines = ["Nguyễn Văn A", "Email: a@example.com", "", "KỸ NĂNG"]
+    for label in ("Ngôn ngữ", "Frameworks", "Công cụ", "Cơ sở dữ liệu"):
+        lines.append(f"- {label}: {pick(skills, rng.randint(3, 6))}")
+    lines += [f"Kỹ năng mềm: {pick(soft_skills, 3)}", "", "KINH NGHIỆM LÀM VIỆC"]
+    for year in range(rng.randint(2, 4)):
+        lines.append(f"Công ty {year + 1} ({2015 + year * 2} - {2017 + year * 2}) - Developer")
+        lines.append(seed._paragraphs(rng, pool, rng.randint(300, 900)))
+        lines.append(f"Công nghệ: {pick(skills, 4)}")
+    lines += ["", "DỰ ÁN"]
+    for _ in range(rng.randint(2, 5)):
+        lines.append(f"- {seed._paragraphs(rng, pool, rng.randint(100, 300))} ({pick(skills, 3)})")
+    lines += ["", "HỌC VẤN", "Đại học Bách khoa - Kỹ sư CNTT", "", "SỞ THÍCH", "Đọc sách, du lịch"]
+    return "\n".join(lines)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=200, help="Số CV tổng hợp")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    import seed
+    import prompts
+    import cv_extractor
+
+    started = time.perf_counter()
+    automaton = cv_extractor.get_automaton()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    patterns: dict = {}
+    cv_extractor.parse_dictionary(cv_extractor.TECH_SKILLS, "tech", patterns)
+    cv_extractor.parse_dictionary(cv_extractor.SOFT_SKILLS, "soft", patterns)
+    skills = sorted({name for name, kind in patterns.values() if kind == "tech"})
+    soft_skills = sorted({name for name, kind in patterns.values() if kind == "soft"})
+
+    rng = random.Random(args.seed)
+    pool = seed._sentence_pool(rng)
+    cvs = [synthetic_cv(rng, pool, skills, soft_skills) for _ in range(args.cvs)]
+
+    regex_samples, analyze_samples = [], []
+    plain_tokens, prefilled_tokens, output_tokens, found = [], [], [], []
+    for text in cvs:
+        started = time.perf_counter()
+        re.findall(r'Skills:(.+?)(?:\n\n|\Z)', text, re.DOTALL)
+        re.findall(r'Experience:(.+?)(?:\n\n|\Z)', text, re.DOTALL)
+        re.findall(r'Education:(.+?)(?:\n\n|\Z)', text, re.DOTALL)
+        regex_samples.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        analysis = cv_extractor.analyze(text)
+        analyze_samples.append((time.perf_counter() - started) * 1000)
+
+        found.append(len(analysis["tech_skills"]) + len(analysis["soft_skills"]))
+        plain_tokens.append(prompts.prepare_cv_text(text)["tokens"])
+        prefilled_tokens.append(prompts.prepare_cv_text(cv_extractor.llm_text(text, analysis))["tokens"])
+        output_tokens.append(prompts.count_tokens(json.dumps(analysis["prefilled"], ensure_ascii=False)))
+
+    print(json.dumps([
+        {"mode": "build", "patterns": len(automaton), "ms": round(build_ms, 2)},
+        summarize("regex", regex_samples),
+        summarize("analyze", analyze_samples),
+        {
+            "mode": "tokens",
+            "cv_chars_p50": int(statistics.median(len(text) for text in cvs)),
+            "skills_found_p50": statistics.median(found),
+            "prompt_tokens_p50": statistics.median(plain_tokens),
+            "prompt_tokens_prefilled_p50": statistics.median(prefilled_tokens),
+            "saved_pct": round(100 * (1 - sum(prefilled_tokens) / sum(plain_tokens)), 1),
+            "output_tokens_saved_p50": statistics.median(output_tokens),
+        },
+    ], indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main_cli()
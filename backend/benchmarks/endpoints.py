@@ -0,0 +1,344 @@
+"""
+Benchmark các endpoint chính của API.
+
+Chạy `main.app` trong cùng process (httpx.ASGITransport) với database tạm được nạp dữ liệu
+tổng hợp (`seed.seed_synthetic`) và một OpenAI client giả lập có độ trễ và tốc độ sinh token
+cấu hình được. Với mỗi endpoint, gửi `--requests` request qua `--concurrency` client đồng thời
+và đo thông lượng, độ trễ p50/p95/p99 và bộ nhớ (RSS, và cấp phát Python nếu bật `--trace-memory`).
+`upload-cv` gửi mỗi request một file CV khác nhau (không trúng cache), `upload-cv-cached` gửi lại
+cùng một file để đo đường trúng cache.
+
+Kết quả in ra dạng JSON (kèm commit hiện tại); dùng `--output` để lưu và `--baseline` để so sánh
+với kết quả của một commit khác.
+
+Cách chạy (từ thư mục backend):
+
+    python benchmarks/endpoints.py --rows 10000 --requests 200 --concurrency 16
+    python benchmarks/endpoints.py --endpoints skills experience --output after.json --baseline before.json
+"""
+import os
+import sys
+import json
+import time
+import types
+import random
+import asyncio
+import argparse
+import resource
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+
+STUB_CV_RESULT = {
+    "tech_skills": ["Python", "FastAPI", "PostgreSQL", "Docker"],
+    "soft_skills": ["Giao tiếp", "Làm việc nhóm"],
+    "work_experience": "5 năm phát triển backend với Python",
+    "projects": ["Hệ thống thanh toán", "Nền tảng tuyển dụng"],
+    "education": "Đại học Bách Khoa",
+}
+
+
+class StubOpenAI:
+    """
+    OpenAI client giả lập: mỗi lời gọi chờ `latency` giây cộng thời gian sinh
+    `completion_tokens` token với tốc độ `tokens_per_second`
+    """
+
+    def __init__(self, latency: float, tokens_per_second: float, completion_tokens: int):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.calls = 0
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def _content(self, kwargs) -> str:
+        if kwargs.get("response_format", {}).get("type") == "json_object":
+            return json.dumps(STUB_CV_RESULT, ensure_ascii=False)
+        return " ".join(["word"] * self.completion_tokens)
+
+    def _usage(self, kwargs):
+        prompt_tokens = sum(len(message["content"]) for message in kwargs.get("messages", [])) // 4
+        return types.SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            total_tokens=prompt_tokens + self.completion_tokens
+        )
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        content = self._content(kwargs)
+        if kwargs.get("stream"):
+            return self._stream(content)
+        if self.tokens_per_second > 0:
+            await asyncio.sleep(self.completion_tokens / self.tokens_per_second)
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=self._usage(kwargs))
+
+    def _stream(self, content: str):
+        return StubStream(content, self.tokens_per_second)
+
+    async def close(self):
+        pass
+
+
+class StubStream:
+    """Giống AsyncStream của OpenAI: duyệt bằng async for và có close()"""
+
+    def __init__(self, content: str, tokens_per_second: float):
+        self._chunks = self._generate(content, tokens_per_second)
+
+    async def _generate(self, content: str, tokens_per_second: float):
+        for token in content.split(" "):
+            if tokens_per_second > 0:
+                await asyncio.sleep(1 / tokens_per_second)
+            delta = types.SimpleNamespace(content=token + " ")
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)], usage=None)
+
+    def __aiter__(self):
+        return self._chunks
+
+    async def close(self):
+        await self._chunks.aclose()
+
+
+def make_pdf(lines, pages: int = 1) -> bytes:
+    """Tạo một file PDF tối giản chứa các dòng văn bản cho trước"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + i * 2} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>")
+    font_id = 3 + pages * 2
+    content = "BT /F1 11 Tf 50 750 Td 14 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+    for i in range(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + i * 2} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output, offsets = "%PDF-1.4\n", []
+    for i, obj in enumerate(objects):
+        offsets.append(len(output))
+        output += f"{i + 1} 0 obj\n{obj}\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return output.encode()
+
+
+def make_cv_pdf(pages: int, nonce: str = "") -> bytes:
+    """Tạo file CV; `nonce` khác nhau cho ra nội dung (và hash file, hash văn bản) khác nhau"""
+    lines = ["Nguyen Van A - Backend Developer", "Skills: Python, FastAPI, PostgreSQL, Docker"]
+    lines += [f"Experience: project {i} built REST APIs and data pipelines for clients" for i in range(40)]
+    lines += ["Education: Bachelor of Computer Science"]
+    if nonce:
+        lines.append(f"Ref: {nonce}")
+    return make_pdf(lines, pages)
+
+
+def build_requests(cv_pages: int, seed: int):
+    """Hàm tạo request cho từng endpoint; nhận httpx client và số thứ tự request"""
+    rng = random.Random(seed)
+    cached_cv_pdf = make_cv_pdf(cv_pages)
+    search_terms = ["python", "docker", "thanh toán", "api", "kubernetes", "react"]
+
+    async def generate_cover_letter(http, i):
+        # Mỗi request một mô tả khác nhau để không trúng cache
+        return await http.post("/api/generate-cover-letter", json={
+            "job_description": f"Tuyển Python developer #{i} {rng.random()} cho dự án thanh toán",
+            "freelancer_skills": "Python, FastAPI",
+        })
+
+    async def upload_cv(http, i):
+        # Mỗi request một file CV khác nhau để không trúng cache CVFile/CVExtraction
+        cv_pdf = make_cv_pdf(cv_pages, f"{i}-{rng.random()}")
+        return await http.post("/api/upload-cv", files={"cv_file": ("cv.pdf", cv_pdf, "application/pdf")})
+
+    async def upload_cv_cached(http, i):
+        # Cùng một file CV: sau lần khởi động đầu tiên mọi request đều trúng cache
+        return await http.post("/api/upload-cv", files={"cv_file": ("cv.pdf", cached_cv_pdf, "application/pdf")})
+
+    async def skills(http, i):
+        return await http.get("/api/skills", params={"limit": 20, "offset": rng.randint(0, 100) * 20})
+
+    async def experience(http, i):
+        if i % 2:
+            return await http.get("/api/experience", params={"limit": 20, "search": rng.choice(search_terms)})
+        return await http.get("/api/experience", params={"limit": 20, "offset": rng.randint(0, 100) * 20})
+
+    async def cover_letters(http, i):
+        return await http.get("/api/cover-letters", params={"limit": 20, "offset": rng.randint(0, 100) * 20})
+
+    async def token(http, i):
+        return await http.post("/api/token", data={"username": USERNAME, "password": PASSWORD})
+
+    return {
+        "generate-cover-letter": generate_cover_letter,
+        "upload-cv": upload_cv,
+        "upload-cv-cached": upload_cv_cached,
+        "skills": skills,
+        "experience": experience,
+        "cover-letters": cover_letters,
+        "token": token,
+    }
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def rss_mb() -> float:
+    """RSS hiện tại của process (MB)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_endpoint(http, name: str, send, requests: int, concurrency: int, trace_memory: bool):
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await send(http, i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    if trace_memory:
+        tracemalloc.start()
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "endpoint": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+    }
+    if trace_memory:
+        result["python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+        tracemalloc.stop()
+    return result
+
+
+async def run(main, args):
+    import httpx
+
+    stub = StubOpenAI(args.llm_latency, args.tokens_per_second, args.completion_tokens)
+    main.client = stub
+    senders = build_requests(args.cv_pages, args.seed)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        await http.post("/api/register", json={"email": "bench@example.com", "username": USERNAME, "password": PASSWORD})
+        results = []
+        for name in args.endpoints:
+            # Warm-up
+            for i in range(min(args.warmup, args.requests)):
+                await senders[name](http, -1 - i)
+            result = await run_endpoint(http, name, senders[name], args.requests, args.concurrency, args.trace_memory)
+            results.append(result)
+            print(f"{name}: {result['throughput_rps']} req/s, p95 {result['p95_ms']} ms", file=sys.stderr)
+    return results, stub.calls
+
+
+def compare(results, baseline_path: str):
+    """Thêm phần trăm thay đổi so với kết quả baseline (cùng endpoint)"""
+    with open(baseline_path) as f:
+        baseline = {item["endpoint"]: item for item in json.load(f)["results"]}
+    for result in results:
+        previous = baseline.get(result["endpoint"])
+        if not previous:
+            continue
+        result["vs_baseline"] = {
+            key: round((result[key] - previous[key]) / previous[key] * 100, 1) if previous[key] else None
+            for key in ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+        }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def main_cli():
+    endpoint_names = ["generate-cover-letter", "upload-cv", "upload-cv-cached", "skills", "experience", "cover-letters", "token"]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=endpoint_names, default=endpoint_names)
+    parser.add_argument("--requests", type=int, default=200, help="Số request cho mỗi endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Số client gửi request đồng thời")
+    parser.add_argument("--warmup", type=int, default=5, help="Số request khởi động (không tính)")
+    parser.add_argument("--rows", type=int, default=10000, help="Số bản ghi skills/experience/cover letter được nạp sẵn")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Độ trễ trước token đầu tiên của LLM giả lập (giây)")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="Tốc độ sinh token của LLM giả lập (0 = tức thì)")
+    parser.add_argument("--completion-tokens", type=int, default=300, help="Số token mỗi phản hồi của LLM giả lập")
+    parser.add_argument("--cv-pages", type=int, default=2, help="Số trang của file CV dùng cho /api/upload-cv")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--trace-memory", action="store_true", help="Đo cấp phát bộ nhớ Python bằng tracemalloc (chậm hơn)")
+    parser.add_argument("--output", help="Ghi kết quả JSON ra file")
+    parser.add_argument("--baseline", help="File kết quả JSON của lần chạy trước để so sánh")
+    args = parser.parse_args()
+    output_path = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    # Dùng database tạm để không ảnh hưởng tới data/freelancer.db
+    workdir = tempfile.mkdtemp(prefix="freelancer-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    os.chdir(workdir)
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    # Mọi request đến từ cùng một client, tắt giới hạn tần suất để đo throughput
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    import logging
+    import seed
+    seed.seed_synthetic(skills=args.rows, experiences=args.rows, cover_letters=args.rows, seed=args.seed)
+
+    import main
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results, llm_calls = asyncio.run(run(main, args))
+    if baseline_path:
+        compare(results, baseline_path)
+
+    report = {
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "llm_calls": llm_calls,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if output_path:
+        with open(output_path, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main_cli()
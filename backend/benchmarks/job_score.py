@@ -0,0 +1,105 @@
+"""
+Đo thông lượng của endpoint chấm điểm tin tuyển dụng `/api/jobs/score`.
+
+Tạo database tạm với một hồ sơ (kỹ năng + `--experiences` bản ghi kinh nghiệm tổng hợp như seed.py),
+sau đó chấm điểm các batch gồm `--postings` mô tả công việc tổng hợp:
+
+- direct: gọi matching.score_jobs trực tiếp (chỉ phần tính toán NumPy)
+- app: gọi endpoint qua ASGITransport (gồm parse JSON, đọc hồ sơ, serialize kết quả)
+
+In ra p50/p95 (ms) cho mỗi batch và số tin tuyển dụng chấm được mỗi giây.
+
+Cách chạy (từ thư mục backend):
+
+    python benchmarks/job_score.py --postings 1000 --repeat 20
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(mode: str, postings: int, samples):
+    p50 = statistics.median(samples)
+    return {
+        "mode": mode,
+        "postings": postings,
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(percentile(samples, 0.95), 2),
+        "postings_per_s": round(postings / (p50 / 1000)),
+    }
+
+
+async def run(args, postings):
+    import httpx
+    import main
+    import matching
+    import profiles
+
+    results = []
+    snapshot = await profiles.get_snapshot()
+    index = await profiles.get_index()
+
+    samples = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        matching.score_jobs(postings, snapshot["skill_terms"], snapshot["freelancer_skills"], index.centroid())
+        samples.append((time.perf_counter() - started) * 1000)
+    results.append(summarize("direct", len(postings), samples))
+
+    samples = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as http:
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            response = await http.post("/api/jobs/score", json={"job_descriptions": postings})
+            response.raise_for_status()
+            samples.append((time.perf_counter() - started) * 1000)
+    results.append(summarize("app", len(postings), samples))
+    results.append({"top": response.json()["data"][:3]})
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--postings", type=int, default=1000, help="Số mô tả công việc trong mỗi batch")
+    parser.add_argument("--experiences", type=int, default=20, help="Số bản ghi kinh nghiệm của hồ sơ")
+    parser.add_argument("--repeat", type=int, default=20, help="Số lần chấm điểm mỗi chế độ")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="freelancer-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    os.chdir(workdir)
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    import logging
+    import db
+    import seed
+    import main  # noqa: F401 (cấu hình logging của app trước khi giảm mức log)
+
+    db.init_db()
+    seed.seed_synthetic(skills=1, experiences=args.experiences, cover_letters=0, seed=args.seed)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rng = random.Random(args.seed + 1)
+    pool = seed._sentence_pool(rng)
+    postings = [seed._paragraphs(rng, pool, rng.randint(600, 3000)) for _ in range(args.postings)]
+
+    print(json.dumps(asyncio.run(run(args, postings)), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,203 @@
+"""
+Load test cho các endpoint gọi LLM.
+
+Chạy app trong cùng process với một OpenAI client giả lập (độ trễ cấu hình được),
+bắn đồng thời nhiều request tạo cover letter cùng với các request đọc /api/skills
+và so sánh thông lượng giữa:
+
+- blocking: giả lập client đồng bộ cũ (time.sleep chặn event loop)
+- async: AsyncOpenAI client hiện tại (asyncio.sleep, nhường event loop)
+
+Mỗi request có job_description riêng và cache/bảng cover letter được xoá trước mỗi kịch bản,
+để mọi request đều gọi LLM (không trúng cache, không dùng chung lời gọi đang chạy).
+
+Số lời gọi LLM đồng thời (`--max-concurrency`), hàng đợi (`--queue-size`, `--queue-timeout`) và tỉ lệ
+lời gọi bị OpenAI trả về 429 (`--upstream-429`, thử lại theo header retry-after-ms) cấu hình được.
+Mỗi kịch bản in thêm số request phải xếp hàng, độ dài hàng đợi lớn nhất, số request bị từ chối
+theo `scope` (`queue`, `upstream`) và số lần OpenAI giả lập trả về 429.
+
+Cách chạy (từ thư mục backend):
+
+    python benchmarks/llm_concurrency.py --requests 20 --latency 0.5
+    python benchmarks/llm_concurrency.py --requests 60 --max-concurrency 5 --queue-size 20 --upstream-429 0.2
+"""
+import os
+import sys
+import time
+import json
+import types
+import random
+import asyncio
+import argparse
+import tempfile
+from collections import Counter
+from contextlib import asynccontextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def make_stub_client(latency: float, blocking: bool, upstream_429: float = 0.0, stats: Counter = None):
+    """
+    Tạo client giả lập trả về một cover letter cố định sau `latency` giây;
+    với xác suất `upstream_429` trả về lỗi 429 như OpenAI
+    """
+    import httpx
+    from openai import RateLimitError
+
+    async def create(**kwargs):
+        if blocking:
+            time.sleep(latency)
+        else:
+            await asyncio.sleep(latency)
+        if random.random() < upstream_429:
+            if stats is not None:
+                stats["upstream_429"] += 1
+            response = httpx.Response(
+                429, headers={"retry-after-ms": "100"}, request=httpx.Request("POST", "http://stub/chat/completions")
+            )
+            raise RateLimitError("Rate limit reached", response=response, body=None)
+        message = types.SimpleNamespace(content="Stub cover letter")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    async def close():
+        pass
+
+    completions = types.SimpleNamespace(create=create)
+    return types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions), close=close)
+
+
+def reset_state() -> None:
+    """Xoá cover letter đã cache (bộ nhớ và database) để kịch bản sau không dùng lại kết quả của kịch bản trước"""
+    import cache
+    from sqlmodel import Session, delete
+    from models import CoverLetter, engine
+
+    cache.cover_letter_cache.clear()
+    with Session(engine) as session:
+        session.exec(delete(CoverLetter))
+        session.commit()
+
+
+def track_queue(stats: Counter):
+    """Bọc llm.concurrency_slot để đếm số lời gọi phải xếp hàng và độ dài hàng đợi lớn nhất"""
+    import llm
+
+    original = llm.concurrency_slot
+
+    @asynccontextmanager
+    async def concurrency_slot():
+        # Bị từ chối ngay khi hàng đợi đầy thì không tính là đã xếp hàng
+        if llm._semaphore is not None and llm._semaphore.locked() and llm._waiting < llm.OPENAI_QUEUE_SIZE:
+            stats["queued"] += 1
+            stats["max_queue_depth"] = max(stats["max_queue_depth"], llm._waiting + 1)
+        async with original():
+            yield
+
+    llm.concurrency_slot = concurrency_slot
+    return original
+
+
+async def run_scenario(main, args, blocking: bool):
+    import httpx
+    import llm
+    from models import async_engine
+
+    mode = "blocking" if blocking else "async"
+    requests, latency = args.requests, args.latency
+    reset_state()
+    # Semaphore gắn với event loop; mỗi kịch bản chạy trong một event loop mới
+    llm._semaphore, llm._waiting = None, 0
+    stats: Counter = Counter()
+    original_slot = track_queue(stats)
+    main.client = make_stub_client(latency, blocking, args.upstream_429, stats)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        read_latencies = []
+
+        async def generate(number: int):
+            payload = {"job_description": f"Python developer ({mode} #{number})"}
+            response = await http.post("/api/generate-cover-letter", json=payload)
+            if response.status_code == 429:
+                stats[f"rejected_{response.json().get('scope', 'unknown')}"] += 1
+                return
+            response.raise_for_status()
+            stats["succeeded"] += 1
+
+        async def read_skills():
+            started = time.perf_counter()
+            response = await http.get("/api/skills", params={"limit": 10})
+            response.raise_for_status()
+            read_latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(generate(number) for number in range(requests)),
+                *(read_skills() for _ in range(requests))
+            )
+        finally:
+            llm.concurrency_slot = original_slot
+            # Pool kết nối async gắn với event loop của kịch bản này
+            await async_engine.dispose()
+        elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "requests": requests,
+        "llm_latency_s": latency,
+        "elapsed_s": round(elapsed, 3),
+        "generate_throughput_rps": round(stats["succeeded"] / elapsed, 2),
+        "max_skills_read_latency_s": round(max(read_latencies), 3),
+        "succeeded": stats["succeeded"],
+        "queued": stats["queued"],
+        "max_queue_depth": stats["max_queue_depth"],
+        "rejected_queue": stats["rejected_queue"],
+        "rejected_upstream": stats["rejected_upstream"],
+        "upstream_429": stats["upstream_429"],
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Số request tạo cover letter đồng thời")
+    parser.add_argument("--latency", type=float, default=0.5, help="Độ trễ giả lập của mỗi lời gọi LLM (giây)")
+    parser.add_argument("--max-concurrency", type=int, help="OPENAI_MAX_CONCURRENCY (mặc định theo cấu hình)")
+    parser.add_argument("--queue-size", type=int, help="OPENAI_QUEUE_SIZE (mặc định theo cấu hình)")
+    parser.add_argument("--queue-timeout", type=float, help="OPENAI_QUEUE_TIMEOUT (giây, mặc định theo cấu hình)")
+    parser.add_argument("--upstream-429", type=float, default=0.0, help="Tỉ lệ lời gọi LLM bị trả về 429 (0-1)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    # Dùng database tạm để không ảnh hưởng tới data/freelancer.db
+    workdir = tempfile.mkdtemp(prefix="freelancer-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    os.chdir(workdir)
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    # Mọi request đến từ cùng một client, tắt giới hạn tần suất để đo throughput
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    import logging
+    import db
+    import llm
+    import main
+    logging.getLogger().setLevel(logging.ERROR)
+    if args.max_concurrency is not None:
+        llm.OPENAI_MAX_CONCURRENCY = args.max_concurrency
+    if args.queue_size is not None:
+        llm.OPENAI_QUEUE_SIZE = args.queue_size
+    if args.queue_timeout is not None:
+        llm.OPENAI_QUEUE_TIMEOUT = args.queue_timeout
+    # ASGITransport không chạy lifespan nên khởi tạo database trực tiếp
+    db.init_db()
+
+    results = [
+        asyncio.run(run_scenario(main, args, blocking=True)),
+        asyncio.run(run_scenario(main, args, blocking=False)),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
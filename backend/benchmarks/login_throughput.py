@@ -0,0 +1,97 @@
+"""
+Benchmark thông lượng đăng nhập (/api/token) khi nhiều request đến cùng lúc.
+
+So sánh hai chế độ:
+
+- inline: verify bcrypt ngay trên event loop (PASSWORD_HASH_WORKERS=0, hành vi cũ)
+- pool: verify trong pool thread riêng của passwords.py
+
+Trong lúc đăng nhập, một loạt request /api đọc nhẹ được gửi song song để đo mức độ
+event loop bị chặn. Request bị từ chối do hàng đợi đầy (503) được đếm riêng.
+
+Cách chạy (từ thư mục backend):
+
+    python benchmarks/login_throughput.py --logins 32 --workers 4
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+async def run_mode(main, mode: str, logins: int, workers: int):
+    import httpx
+    import passwords
+
+    passwords.PASSWORD_HASH_WORKERS = 0 if mode == "inline" else workers
+    passwords._executor = None
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        statuses = []
+        ping_latencies = []
+
+        async def login():
+            response = await http.post("/api/token", data={"username": "bench", "password": "bench-password"})
+            statuses.append(response.status_code)
+
+        async def ping(delay: float):
+            # Gửi rải rác trong lúc các request đăng nhập đang được xử lý
+            # Độ trễ tính từ thời điểm dự kiến gửi: gồm cả thời gian event loop bị chặn
+            await asyncio.sleep(delay)
+            await http.get("/api")
+            ping_latencies.append(time.perf_counter() - (started + delay))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)), *(ping(i * 0.05) for i in range(logins)))
+        elapsed = time.perf_counter() - started
+
+    succeeded = statuses.count(200)
+    return {
+        "mode": mode,
+        "logins": logins,
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(succeeded / elapsed, 2),
+        "rejected_503": statuses.count(503),
+        "max_ping_latency_ms": round(max(ping_latencies) * 1000, 1),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32, help="Số request đăng nhập đồng thời")
+    parser.add_argument("--workers", type=int, default=4, help="Số thread của pool hash mật khẩu")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="freelancer-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    os.chdir(workdir)
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    import logging
+    import db
+    import main
+    from fastapi.testclient import TestClient
+    logging.getLogger().setLevel(logging.WARNING)
+    # Client không chạy lifespan nên khởi tạo database trực tiếp
+    db.init_db()
+
+    TestClient(main.app).post("/api/register", json={
+        "email": "bench@example.com", "username": "bench", "password": "bench-password"
+    })
+
+    results = [
+        asyncio.run(run_mode(main, "inline", args.logins, args.workers)),
+        asyncio.run(run_mode(main, "pool", args.logins, args.workers)),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,127 @@
+"""
+So sánh tìm kiếm full-text (FTS5) với tìm kiếm `ilike('%term%')` trên bảng Experience.
+
+Tạo một database tạm với N bản ghi Experience, sau đó đo thời gian truy vấn
+một trang kết quả (kèm đếm tổng số) cho từng cách tìm kiếm.
+
+Cách chạy (từ thư mục backend):
+
+    python benchmarks/search_fts.py --rows 100000
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORDS = (
+    "python javascript typescript react vue angular fastapi django flask node express docker kubernetes "
+    "aws gcp azure postgres mysql sqlite redis kafka spark airflow pandas numpy pytorch tensorflow "
+    "api microservices frontend backend fullstack devops testing ci cd graphql rest websocket mobile "
+    "flutter swift kotlin java spring golang rust elasticsearch terraform ansible linux nginx"
+).split()
+FILLER = "built maintained designed delivered improved migrated scaled led integrated automated for clients with team".split()
+
+
+def random_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS if rng.random() < 0.3 else FILLER) for _ in range(words))
+
+
+def populate(engine, rows: int, seed: int):
+    from sqlalchemy import text
+    from datetime import datetime
+
+    rng = random.Random(seed)
+    now = datetime.now()
+    batch = []
+    with engine.begin() as connection:
+        for _ in range(rows):
+            batch.append({
+                "work_experience": random_text(rng, 60),
+                "projects": random_text(rng, 40),
+                "created_at": now,
+                "updated_at": now,
+            })
+            if len(batch) == 5000:
+                connection.execute(text(
+                    "INSERT INTO experience (work_experience, projects, created_at, updated_at) "
+                    "VALUES (:work_experience, :projects, :created_at, :updated_at)"
+                ), batch)
+                batch = []
+        if batch:
+            connection.execute(text(
+                "INSERT INTO experience (work_experience, projects, created_at, updated_at) "
+                "VALUES (:work_experience, :projects, :created_at, :updated_at)"
+            ), batch)
+
+
+async def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 2), "max_ms": round(max(samples), 2)}
+
+
+async def run_queries(results, repeat: int):
+    from sqlmodel import select, func
+    from models import Experience, async_session
+    import fulltext
+
+    async with async_session() as session:
+        for term in ["python", "kubernetes terraform", "graphql"]:
+            async def ilike_search():
+                pattern = f"%{term}%"
+                condition = Experience.work_experience.ilike(pattern) | Experience.projects.ilike(pattern)
+                (await session.exec(select(Experience).where(condition).order_by(Experience.id.desc()).limit(20))).all()
+                (await session.exec(select(func.count()).select_from(Experience).where(condition))).one()
+
+            match_query = fulltext.build_match_query(term)
+
+            async def fts_search():
+                await fulltext.search(session, "experience", match_query, 0, 20)
+                await fulltext.count(session, "experience", match_query)
+
+            results["queries"].append({
+                "term": term,
+                "ilike": await timed(ilike_search, repeat),
+                "fts5": await timed(fts_search, repeat),
+            })
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Số bản ghi Experience")
+    parser.add_argument("--repeat", type=int, default=5, help="Số lần lặp mỗi truy vấn")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="freelancer-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    os.chdir(workdir)
+
+    from models import engine, create_db_and_tables
+    import fulltext
+
+    create_db_and_tables()
+    fulltext.init_search_index()
+
+    started = time.perf_counter()
+    populate(engine, args.rows, args.seed)
+    populate_s = time.perf_counter() - started
+
+    results = {"rows": args.rows, "populate_s": round(populate_s, 2), "queries": []}
+    asyncio.run(run_queries(results, args.repeat))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
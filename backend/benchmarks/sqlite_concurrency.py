@@ -0,0 +1,101 @@
+"""
+Benchmark đọc/ghi đồng thời trên SQLite.
+
+So sánh engine mặc định trước đây (`create_engine(url, check_same_thread=False)`, journal DELETE)
+với engine từ `models.create_db_engine` (WAL, synchronous=NORMAL, busy timeout, QueuePool).
+Mỗi kịch bản chạy nhiều thread ghi (insert Skills, commit từng bản ghi) và nhiều thread đọc
+(COUNT + trang mới nhất) trong một khoảng thời gian cố định.
+
+Cách chạy (từ thư mục backend):
+
+    python benchmarks/sqlite_concurrency.py --writers 8 --readers 16 --duration 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def run_scenario(name: str, engine, writers: int, readers: int, duration: float):
+    from sqlmodel import SQLModel, Session, select, func
+    from models import Skills
+
+    SQLModel.metadata.create_all(engine)
+    counters = {"writes": 0, "reads": 0, "errors": 0, "locked_errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def record(key: str, error: Exception = None):
+        with lock:
+            counters[key] += 1
+            if error is not None and "locked" in str(error):
+                counters["locked_errors"] += 1
+
+    def writer():
+        while time.perf_counter() < deadline:
+            try:
+                with Session(engine) as session:
+                    session.add(Skills(tech_skills="Python, FastAPI " * 20, soft_skills="Communication " * 10))
+                    session.commit()
+                record("writes")
+            except Exception as e:
+                record("errors", e)
+
+    def reader():
+        while time.perf_counter() < deadline:
+            try:
+                with Session(engine) as session:
+                    session.exec(select(func.count()).select_from(Skills)).one()
+                    session.exec(select(Skills).order_by(Skills.id.desc()).limit(20)).all()
+                record("reads")
+            except Exception as e:
+                record("errors", e)
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    return {
+        "engine": name,
+        "writes_per_s": round(counters["writes"] / elapsed, 1),
+        "reads_per_s": round(counters["reads"] / elapsed, 1),
+        "errors": counters["errors"],
+        "locked_errors": counters["locked_errors"],
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="Thời gian chạy mỗi kịch bản (giây)")
+    args = parser.parse_args()
+
+    from sqlmodel import create_engine
+    from models import create_db_engine
+
+    workdir = tempfile.mkdtemp(prefix="freelancer-bench-")
+    legacy = create_engine(f"sqlite:///{workdir}/legacy.db", connect_args={"check_same_thread": False})
+    tuned = create_db_engine(f"sqlite:///{workdir}/tuned.db")
+
+    results = [
+        run_scenario("legacy", legacy, args.writers, args.readers, args.duration),
+        run_scenario("tuned", tuned, args.writers, args.readers, args.duration),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,101 @@
+"""
+Báo cáo thời gian khởi động (cold start) của backend.
+
+Chạy `import main` trong một process Python mới với `-X importtime`, sau đó chạy lifespan
+của app (khởi tạo database, worker CV) trên một database tạm. In ra:
+
+- import_ms: thời gian import main
+- startup_ms: thời gian chạy phần khởi động của lifespan
+- top_imports: các module được main import trực tiếp, sắp xếp theo thời gian import (cộng dồn)
+
+Thoát với mã 1 nếu tổng thời gian vượt quá `--budget-ms`, dùng được trong CI.
+
+Cách chạy (từ thư mục backend):
+
+    python benchmarks/startup.py --budget-ms 1500 --top 15
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mã chạy trong process con: đo import main và lifespan
+CHILD_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+ready = time.perf_counter()
+with TestClient(main.app):
+    started_up = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "startup_ms": (started_up - ready) * 1000}))
+"""
+
+
+def parse_importtime(output: str, parent: str = "main"):
+    """
+    Đọc output của `-X importtime` và trả về các module được `parent` import trực tiếp
+    kèm thời gian import (ms)
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        columns = line[len("import time:"):].split("|")
+        if not columns[0].strip().isdigit():
+            continue
+        raw_name = columns[2]
+        depth = (len(raw_name) - len(raw_name.lstrip(" ")) - 1) // 2
+        entries.append((depth, raw_name.strip(), int(columns[0]), int(columns[1])))
+
+    # Các dòng con được in trước dòng cha; module cha nằm ở độ sâu 0
+    children, pending = [], []
+    for depth, name, self_us, cumulative_us in entries:
+        if depth == 0:
+            if name == parent:
+                children = [item for item in pending if item[0] == 1]
+            pending = []
+        else:
+            pending.append((depth, name, self_us, cumulative_us))
+    return [{"module": name, "cumulative_ms": round(cumulative_us / 1000, 1), "self_ms": round(self_us / 1000, 1)}
+            for _, name, self_us, cumulative_us in sorted(children, key=lambda item: -item[3])]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500, help="Ngân sách tổng thời gian khởi động (ms)")
+    parser.add_argument("--top", type=int, default=15, help="Số module import chậm nhất được liệt kê")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="freelancer-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench")}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr)
+        sys.exit(completed.returncode)
+
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    total_ms = timings["import_ms"] + timings["startup_ms"]
+    report = {
+        "import_ms": round(timings["import_ms"], 1),
+        "startup_ms": round(timings["startup_ms"], 1),
+        "total_ms": round(total_ms, 1),
+        "budget_ms": args.budget_ms,
+        "within_budget": total_ms <= args.budget_ms,
+        "top_imports": parse_importtime(completed.stderr)[:args.top],
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main_cli()
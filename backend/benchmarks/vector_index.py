@@ -0,0 +1,104 @@
+"""
+Đo chỉ mục vector kinh nghiệm/dự án dùng để chọn nội dung liên quan cho prompt cover letter.
+
+Tạo database tạm với N bản ghi Experience tổng hợp (như seed.py), sau đó in ra:
+
+- build_s / load_ms / file_mb: thời gian dựng chỉ mục từ database, thời gian đọc lại từ file và kích thước file
+- upsert_ms: thời gian cập nhật chỉ mục khi một Experience được thêm/sửa
+- query p50/p95: thời gian tìm top-k đoạn liên quan cho một mô tả công việc
+- full_tokens / selected_tokens: số token kinh nghiệm + dự án của một hồ sơ so với top-k đoạn được chọn
+
+Cách chạy (từ thư mục backend):
+
+    python benchmarks/vector_index.py --rows 2000 --queries 200 --k 5
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="Số bản ghi Experience")
+    parser.add_argument("--queries", type=int, default=200, help="Số mô tả công việc dùng để truy vấn")
+    parser.add_argument("--k", type=int, default=5, help="Số đoạn được chọn cho mỗi truy vấn")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="freelancer-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    os.chdir(workdir)
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    from datetime import datetime
+    import db
+    import seed
+    import prompts
+    import profiles
+    import vectors
+
+    db.init_db()
+    seed.seed_synthetic(skills=0, experiences=args.rows, cover_letters=0, seed=args.seed)
+
+    started = time.perf_counter()
+    index = profiles.load_index()
+    build_s = time.perf_counter() - started
+
+    path = profiles.index_path()
+    started = time.perf_counter()
+    vectors.VectorIndex.load(path)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(args.seed)
+    pool = seed._sentence_pool(rng)
+    experiences = list(seed.synthetic_experience(rng, pool, 50, datetime.now()))
+
+    upserts = []
+    for i, experience in enumerate(experiences):
+        snippets = profiles.experience_snippets(experience["work_experience"], experience["projects"])
+        started = time.perf_counter()
+        index.upsert(args.rows + i + 1, snippets)
+        upserts.append((time.perf_counter() - started) * 1000)
+
+    samples, full_tokens, selected_tokens = [], [], []
+    for i in range(args.queries):
+        job_description = seed._paragraphs(rng, pool, rng.randint(600, 3000))
+        started = time.perf_counter()
+        matches = index.search(job_description, args.k)
+        samples.append((time.perf_counter() - started) * 1000)
+        experience = experiences[i % len(experiences)]
+        full_tokens.append(prompts.count_tokens(
+            experience["work_experience"] + "\n" + profiles.format_projects(experience["projects"])
+        ))
+        selected_tokens.append(prompts.count_tokens("\n".join(match["text"] for match in matches)))
+
+    print(json.dumps({
+        "rows": args.rows,
+        "snippets": len(index),
+        "dimensions": index.dimensions,
+        "build_s": round(build_s, 2),
+        "load_ms": round(load_ms, 1),
+        "file_mb": round(os.path.getsize(path) / 1024 / 1024, 2),
+        "upsert_ms": round(statistics.median(upserts), 3),
+        "query_p50_ms": round(statistics.median(samples), 2),
+        "query_p95_ms": round(percentile(samples, 0.95), 2),
+        "full_tokens": round(statistics.mean(full_tokens)),
+        "selected_tokens": round(statistics.mean(selected_tokens)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,162 @@
+import os
+import re
+import time
+import asyncio
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Optional, Tuple
+
+# Model và phiên bản prompt là một phần của khoá cache:
+# tăng COVER_LETTER_PROMPT_VERSION mỗi khi thay đổi prompt để bỏ qua kết quả cũ
+COVER_LETTER_MODEL = "gpt-4o"
+COVER_LETTER_PROMPT_VERSION = "2"
+CV_EXTRACTION_MODEL = "gpt-4o"
+CV_EXTRACTION_PROMPT_VERSION = "3"
+
+# Cấu hình cache cover letter
+COVER_LETTER_CACHE_SIZE = int(os.getenv("COVER_LETTER_CACHE_SIZE", "256"))
+COVER_LETTER_CACHE_TTL = int(os.getenv("COVER_LETTER_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Cấu hình cache kết quả trích xuất CV (lưu trong database)
+CV_CACHE_MAX_ENTRIES = int(os.getenv("CV_CACHE_MAX_ENTRIES", "1000"))
+CV_CACHE_MAX_BYTES = int(os.getenv("CV_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+CV_CACHE_TTL = int(os.getenv("CV_CACHE_TTL", str(30 * 24 * 3600)))
+
+
+class LRUCache:
+    """Cache LRU trong bộ nhớ với thời gian sống (TTL) cho từng phần tử"""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Gộp các lời gọi đồng thời có cùng khoá thành một lần thực thi: lời gọi đầu tiên chạy,
+    các lời gọi sau chờ và nhận cùng kết quả (hoặc cùng lỗi)
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Trả về (kết quả, True nếu dùng chung kết quả của một lời gọi đang chạy)"""
+        task = self._tasks.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # shield: một client ngắt kết nối không huỷ công việc đang được các client khác chờ
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Tránh cảnh báo "exception was never retrieved" khi mọi lời gọi đã bị huỷ
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+class CacheStats:
+    """Bộ đếm hit/miss của một cache"""
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.database_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "database_hits": self.database_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Chuẩn hoá khoảng trắng để các request chỉ khác nhau về định dạng có cùng khoá"""
+    if not value:
+        return ""
+    return re.sub(r"\s+", " ", value).strip()
+
+
+def cover_letter_cache_key(request) -> str:
+    """Tính khoá cache (sha256) từ các trường của CoverLetterRequest, model và phiên bản prompt"""
+    payload = {
+        "job_description": normalize_text(request.job_description),
+        "freelancer_skills": normalize_text(request.freelancer_skills),
+        "experience_level": normalize_text(request.experience_level),
+        "tone": normalize_text(request.tone).lower(),
+        "additional_info": normalize_text(request.additional_info),
+        "model": COVER_LETTER_MODEL,
+        "prompt_version": COVER_LETTER_PROMPT_VERSION,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def cv_text_key(text_content: str) -> str:
+    """Khoá (sha256) của nội dung CV đã chuẩn hoá, kèm model và phiên bản prompt trích xuất"""
+    payload = f"{CV_EXTRACTION_MODEL}:{CV_EXTRACTION_PROMPT_VERSION}:{normalize_text(text_content)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_sha256(stream: BinaryIO, chunk_size: int = 1024 * 1024) -> str:
+    """Hash sha256 nội dung file, đọc theo từng phần rồi đưa con trỏ về đầu file"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+cover_letter_cache = LRUCache(COVER_LETTER_CACHE_SIZE, COVER_LETTER_CACHE_TTL)
+cover_letter_cache_stats = CacheStats()
+# Các lời gọi LLM đang chạy, theo khoá cover letter và theo nội dung CV
+cover_letter_flight = SingleFlight()
+cv_extraction_flight = SingleFlight()
@@ -0,0 +1,572 @@
+import os
+import re
+import unicodedata
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Điền sẵn các kỹ năng nhận diện tại local vào kết quả và bỏ các dòng liệt kê kỹ năng khỏi nội dung gửi tới LLM
+CV_LOCAL_PREFILL = os.getenv("CV_LOCAL_PREFILL", "true").lower() in ("1", "true", "yes")
+# File bổ sung từ điển kỹ năng (tuỳ chọn), mỗi dòng: "Tên chuẩn | cách viết khác | ..."; dòng "[soft]" chuyển sang kỹ năng mềm
+SKILL_DICTIONARY_PATH = os.getenv("SKILL_DICTIONARY_PATH", "")
+
+# Từ điển kỹ năng: tên đầu tiên của mỗi dòng là tên chuẩn, các tên sau là cách viết khác.
+# Bỏ qua các tên trùng với từ thông dụng ("Go", "R", "Express", "Less") để tránh nhận nhầm
+TECH_SKILLS = """
+Python
+JavaScript | JS | ECMAScript | ES6
+TypeScript
+Java
+C++ | cpp
+C# | csharp | c sharp
+Golang | go lang
+Rust
+Ruby
+PHP
+Kotlin
+Swift
+Objective-C | objective c | objc
+Scala
+Dart
+Elixir
+Erlang
+Haskell
+Clojure
+Perl
+Lua
+MATLAB
+Groovy
+F#
+Visual Basic | VB.NET | VBA
+Solidity
+Bash | shell script | shell scripting
+PowerShell
+SQL
+PL/SQL
+T-SQL
+NoSQL
+HTML | HTML5
+CSS | CSS3
+Sass | SCSS
+React | ReactJS | React.js
+React Native
+Next.js | NextJS | next js
+Vue.js | Vue | VueJS | Vue 3
+Nuxt.js | Nuxt | NuxtJS
+Angular | AngularJS
+Svelte | SvelteKit
+jQuery
+Redux
+MobX
+Tailwind CSS | Tailwind | TailwindCSS
+Bootstrap
+Material UI | MUI
+Ant Design
+Webpack
+Vite
+Babel
+Three.js
+D3.js
+Gatsby
+Storybook
+Node.js | NodeJS | Node
+Express.js | ExpressJS
+NestJS | Nest.js
+Django | Django REST Framework | DRF
+Flask
+FastAPI
+Spring | Spring Boot | Spring Framework | Spring MVC | Spring Cloud
+Hibernate
+Laravel
+Symfony
+CodeIgniter
+Ruby on Rails | Rails
+ASP.NET | ASP.NET Core | ASP.NET MVC
+.NET | .NET Core | dotnet
+Entity Framework
+GraphQL
+REST API | RESTful | RESTful API | REST
+gRPC
+WebSocket | WebSockets
+Socket.IO
+Microservices | microservice | kiến trúc microservice
+Serverless
+Android
+iOS
+Flutter
+Xamarin
+Ionic
+SwiftUI
+Jetpack Compose
+PostgreSQL | Postgres
+MySQL
+MariaDB
+SQLite
+SQL Server | Microsoft SQL Server | MSSQL
+Oracle Database | Oracle DB | Oracle
+MongoDB | Mongo
+Redis
+Cassandra
+DynamoDB
+Elasticsearch | Elastic Search
+Firebase
+Firestore
+Supabase
+Neo4j
+InfluxDB
+ClickHouse
+Snowflake
+BigQuery
+Redshift
+Kafka | Apache Kafka
+RabbitMQ
+Apache Spark | Spark | PySpark
+Hadoop
+Airflow | Apache Airflow
+dbt
+Apache Flink | Flink
+Pandas
+NumPy
+SciPy
+scikit-learn | sklearn | scikit learn
+TensorFlow
+PyTorch
+Keras
+Hugging Face | HuggingFace
+OpenCV
+LangChain
+LlamaIndex
+XGBoost
+LightGBM
+Machine Learning | học máy
+Deep Learning | học sâu
+NLP | Natural Language Processing | xử lý ngôn ngữ tự nhiên
+Computer Vision | thị giác máy tính
+LLM | Large Language Models | Large Language Model
+Prompt Engineering
+Data Analysis | phân tích dữ liệu
+Data Engineering
+ETL
+Power BI | PowerBI
+Tableau
+Excel | Microsoft Excel
+Jupyter | Jupyter Notebook
+MLOps
+AWS | Amazon Web Services
+AWS Lambda
+Amazon EC2 | EC2
+Amazon S3 | S3
+CloudFormation
+Azure | Microsoft Azure
+GCP | Google Cloud | Google Cloud Platform
+DigitalOcean
+Heroku
+Vercel
+Netlify
+Docker | Docker Compose
+Kubernetes | K8s
+Helm
+Terraform
+Ansible
+Jenkins
+GitLab CI | GitLab CI/CD
+GitHub Actions
+CircleCI
+Travis CI
+CI/CD | CICD | Continuous Integration
+DevOps
+Git
+GitHub
+GitLab
+Bitbucket
+Linux | Ubuntu | CentOS | Debian
+Nginx
+Prometheus
+Grafana
+Datadog
+Sentry
+ELK Stack | ELK
+Istio
+OpenShift
+Jest
+Mocha
+Cypress
+Selenium
+Playwright
+Pytest
+JUnit
+Unit Testing | unit test | kiểm thử đơn vị
+TDD | Test-Driven Development
+Postman
+Agile
+Scrum
+Kanban
+Jira
+Confluence
+Figma
+Adobe XD
+Photoshop | Adobe Photoshop
+Illustrator | Adobe Illustrator
+UI/UX | UX/UI | UI Design | UX Design
+OOP | Object-Oriented Programming | lập trình hướng đối tượng
+Design Patterns
+System Design
+Data Structures and Algorithms | DSA | Data Structures | Algorithms | cấu trúc dữ liệu và giải thuật
+Blockchain
+Web3
+Ethereum
+Smart Contracts | smart contract
+Unity
+Unreal Engine
+WordPress
+Shopify
+Magento
+SEO
+OAuth | OAuth2
+JWT
+Stripe
+OpenAI API | OpenAI
+"""
+
+SOFT_SKILLS = """
+Giao tiếp | Communication | communication skills | kỹ năng giao tiếp
+Làm việc nhóm | Teamwork | team work | Collaboration
+Giải quyết vấn đề | Problem solving | problem-solving
+Quản lý thời gian | Time management
+Tư duy phản biện | Critical thinking
+Lãnh đạo | Leadership
+Thích ứng nhanh | Adaptability | thích nghi nhanh
+Đàm phán | Negotiation
+Tự học | Self-learning | self learning
+Chú ý chi tiết | Attention to detail | detail-oriented
+Thuyết trình | Presentation skills | public speaking
+Quản lý dự án | Project management
+Sáng tạo | Creativity
+Làm việc độc lập | Work independently | independent work
+Chịu được áp lực | Work under pressure
+Tư duy logic | Logical thinking
+Quản lý đội nhóm | Team management | team leadership
+Cố vấn | Mentoring | Coaching
+Chăm sóc khách hàng | Customer service
+"""
+
+# Tiêu đề mục (đã chuẩn hoá) -> tên mục
+SECTION_HEADINGS = {
+    "summary": "summary, profile, professional summary, about me, about, objective, career objective, "
+               "giới thiệu, giới thiệu bản thân, tóm tắt, mục tiêu, mục tiêu nghề nghiệp, thông tin cá nhân",
+    "skills": "skills, technical skills, tech skills, hard skills, core skills, key skills, skills and tools, "
+              "technologies, tech stack, tools, competencies, core competencies, expertise, "
+              "kỹ năng, kĩ năng, kỹ năng chuyên môn, kỹ năng kỹ thuật, công nghệ, công cụ, chuyên môn",
+    "soft_skills": "soft skills, interpersonal skills, kỹ năng mềm, kĩ năng mềm",
+    "experience": "experience, work experience, professional experience, employment, employment history, "
+                  "work history, career history, experiences, kinh nghiệm, kinh nghiệm làm việc, "
+                  "quá trình làm việc, quá trình công tác, kinh nghiệm chuyên môn",
+    "projects": "projects, personal projects, key projects, selected projects, project experience, "
+                "dự án, các dự án, dự án tiêu biểu, dự án cá nhân, dự án đã tham gia",
+    "education": "education, academic background, qualifications, học vấn, trình độ học vấn, "
+                 "quá trình học tập, bằng cấp, đào tạo",
+    "certifications": "certifications, certificates, licenses, chứng chỉ, giấy chứng nhận",
+    "languages": "languages, ngoại ngữ, ngôn ngữ",
+    "awards": "awards, achievements, honors, giải thưởng, thành tích",
+    # Không dùng để trích xuất; không gửi tới LLM
+    "ignored": "references, interests, hobbies, người tham chiếu, sở thích",
+}
+
+MAX_HEADING_CHARS = 40
+HEADING_STRIP_RE = re.compile(r"^[\s#*•\-–—=_|>\d.)(]+|[\s:：#*=_|\-–—]+$")
+SPACES_RE = re.compile(r"\s+")
+# Tách các kỹ năng trong một dòng liệt kê
+ITEM_SEPARATOR_RE = re.compile(r"\s*(?:[,;|•·]|\s/\s|\s-\s|\band\b|\bvà\b)\s*")
+BULLET_RE = re.compile(r"^[\s*•\-–—·+>]+")
+LIST_ITEM_RE = re.compile(r"^[*•\-–—·+>]\s")
+
+
+def normalize(text: str) -> str:
+    """Dạng chuẩn để so khớp: Unicode NFC (PDF hay trả về chữ tiếng Việt dạng tổ hợp), chữ thường"""
+    return unicodedata.normalize("NFC", text).lower()
+
+
+def _heading_key(line: str) -> str:
+    return SPACES_RE.sub(" ", HEADING_STRIP_RE.sub("", normalize(line))).replace("&", "and")
+
+
+class SkillAutomaton:
+    """
+    Automaton Aho-Corasick trên các mẫu (đã chuẩn hoá): tìm mọi mẫu trong một lần duyệt văn bản,
+    chỉ nhận các kết quả nằm trọn trong ranh giới từ và giữ kết quả dài nhất khi chồng lên nhau
+    """
+
+    def __init__(self, patterns: Dict[str, Tuple[str, str]]):
+        # patterns: mẫu -> (tên chuẩn, loại)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]
+        self._values = patterns
+        for pattern in patterns:
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append((len(pattern), pattern))
+
+        # Liên kết fail theo BFS; output của một trạng thái gồm cả output của trạng thái fail
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                if state:
+                    self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, text: str) -> Optional[Tuple[str, str]]:
+        """(tên chuẩn, loại) nếu cả chuỗi là một mẫu trong từ điển"""
+        return self._values.get(normalize(text).strip())
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, pattern in output[state]:
+                start, end = position - length + 1, position + 1
+                # Mẫu bắt đầu/kết thúc bằng chữ hoặc số phải đứng tách khỏi chữ/số xung quanh ("go" trong "google")
+                if pattern[0].isalnum() and start > 0 and text[start - 1].isalnum():
+                    continue
+                if pattern[-1].isalnum() and end < len(text) and text[end].isalnum():
+                    continue
+                yield start, end, pattern
+
+    def find(self, text: str) -> List[Tuple[int, int, str, str]]:
+        """Các kết quả (vị trí bắt đầu, kết thúc, tên chuẩn, loại) trong văn bản đã chuẩn hoá, theo thứ tự xuất hiện"""
+        matches = sorted(self._scan(text), key=lambda match: (match[0], match[0] - match[1]))
+        result: List[Tuple[int, int, str, str]] = []
+        covered = 0
+        for start, end, pattern in matches:
+            if start < covered:
+                continue
+            canonical, kind = self._values[pattern]
+            result.append((start, end, canonical, kind))
+            covered = end
+        return result
+
+
+def parse_dictionary(text: str, kind: str, patterns: Dict[str, Tuple[str, str]]) -> None:
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.lower() in ("[tech]", "[soft]"):
+            kind = line.lower()[1:-1]
+            continue
+        names = [name.strip() for name in line.split("|") if name.strip()]
+        for name in names:
+            patterns.setdefault(normalize(name), (names[0], kind))
+
+
+_automaton: Optional[SkillAutomaton] = None
+_headings: Optional[Dict[str, str]] = None
+
+
+def get_automaton() -> SkillAutomaton:
+    """Automaton của từ điển kỹ năng, dựng khi dùng lần đầu"""
+    global _automaton
+    if _automaton is None:
+        patterns: Dict[str, Tuple[str, str]] = {}
+        parse_dictionary(TECH_SKILLS, "tech", patterns)
+        parse_dictionary(SOFT_SKILLS, "soft", patterns)
+        if SKILL_DICTIONARY_PATH:
+            with open(SKILL_DICTIONARY_PATH, encoding="utf-8") as file:
+                parse_dictionary(file.read(), "tech", patterns)
+        _automaton = SkillAutomaton(patterns)
+    return _automaton
+
+
+def _get_headings() -> Dict[str, str]:
+    global _headings
+    if _headings is None:
+        _headings = {
+            _heading_key(heading): section
+            for section, headings in SECTION_HEADINGS.items()
+            for heading in headings.split(",")
+        }
+    return _headings
+
+
+def _match_heading(line: str) -> Optional[Tuple[str, str]]:
+    """(tên mục, phần nội dung còn lại trên cùng dòng) nếu dòng là tiêu đề mục, ví dụ "KỸ NĂNG" hoặc "Skills: Python, SQL" """
+    headings = _get_headings()
+    stripped = line.strip()
+    if len(stripped) <= MAX_HEADING_CHARS:
+        section = headings.get(_heading_key(stripped))
+        if section:
+            return section, ""
+    head, separator, rest = stripped.partition(":")
+    # Gạch đầu dòng có nhãn là nội dung trong một mục ("- Ngôn ngữ: Python, Java"), không phải tiêu đề
+    if separator and len(head) <= MAX_HEADING_CHARS and not LIST_ITEM_RE.match(stripped):
+        section = headings.get(_heading_key(head))
+        if section:
+            return section, rest.strip()
+    return None
+
+
+def segment(text: str) -> List[Dict[str, Any]]:
+    """
+    Chia CV thành các mục theo tiêu đề trong một lần duyệt các dòng.
+    Mỗi mục: {"section", "heading": số dòng tiêu đề, "lines": [(số dòng, nội dung)]};
+    phần trước tiêu đề đầu tiên thuộc mục "header"
+    """
+    automaton = get_automaton()
+    sections = [{"section": "header", "heading": None, "lines": []}]
+    for number, line in enumerate(text.splitlines()):
+        heading = _match_heading(line) if line.strip() else None
+        # "Công nghệ: React, Node.js" ngay dưới một dự án/công việc là nhãn của mục đó, chỉ là tiêu đề khi đứng sau dòng trống
+        if heading is not None and heading[1] and sections[-1]["section"] in ("experience", "projects") \
+                and sections[-1]["lines"] and sections[-1]["lines"][-1][1].strip():
+            heading = None
+        if heading is not None:
+            section, rest = heading
+            # "Ngôn ngữ: Python, Java" là danh sách kỹ năng, "Ngôn ngữ: Tiếng Anh" là mục ngoại ngữ
+            if rest and section not in ("skills", "soft_skills") and _is_skill_list(rest, automaton):
+                section = "skills"
+            sections.append({"section": section, "heading": number, "lines": []})
+            if rest:
+                sections[-1]["lines"].append((number, rest))
+            continue
+        sections[-1]["lines"].append((number, line))
+    return [section for section in sections if section["lines"] or section["section"] != "header"]
+
+
+def _is_skill_list(line: str, automaton: SkillAutomaton) -> bool:
+    """Dòng chỉ gồm các kỹ năng có trong từ điển (bỏ qua nhãn ngắn như "Frameworks:")"""
+    content = BULLET_RE.sub("", line)
+    label, separator, rest = content.partition(":")
+    if separator and len(label.split()) <= 3:
+        content = rest
+    items = [item for item in ITEM_SEPARATOR_RE.split(content.strip()) if item]
+    return bool(items) and all(automaton.get(item) is not None for item in items)
+
+
+def _section_text(lines: List[Tuple[int, str]]) -> str:
+    return "\n".join(line.strip() for _, line in lines).strip()
+
+
+def _project_items(lines: List[Tuple[int, str]]) -> List[str]:
+    """Các dự án: mỗi đoạn (cách nhau bởi dòng trống) là một dự án; nếu không có dòng trống thì mỗi gạch đầu dòng là một dự án"""
+    items: List[List[str]] = []
+    content = [line for _, line in lines]
+    while content and not content[-1].strip():
+        content.pop()
+    paragraphs = any(not line.strip() for line in content)
+    starts_new = True
+    for line in content:
+        stripped = line.strip()
+        if not stripped:
+            starts_new = True
+            continue
+        if starts_new or (not paragraphs and LIST_ITEM_RE.match(stripped)):
+            items.append([])
+        items[-1].append(BULLET_RE.sub("", stripped))
+        starts_new = False
+    return [" ".join(item) for item in items]
+
+
+def analyze(text: str) -> Dict[str, Any]:
+    """
+    Phân tích CV tại local: chia mục, tìm kỹ năng theo từ điển và đánh dấu các dòng trong mục kỹ năng
+    chỉ gồm kỹ năng đã nhận diện (không cần gửi lại tới LLM)
+    """
+    automaton = get_automaton()
+    sections = segment(text)
+
+    tech: Dict[str, int] = {}
+    soft: Dict[str, int] = {}
+    # Kỹ năng của các dòng không gửi tới LLM (các kỹ năng khác LLM vẫn đọc được trong nội dung CV)
+    prefilled: Dict[str, List[str]] = {"tech_skills": [], "soft_skills": []}
+    known_lines: List[int] = []
+    ignored_lines: List[int] = []
+    for section in sections:
+        if section["section"] == "ignored":
+            ignored_lines.append(section["heading"])
+        in_skills = section["section"] in ("skills", "soft_skills")
+        for number, line in section["lines"]:
+            if section["section"] == "ignored":
+                ignored_lines.append(number)
+                continue
+            if not line.strip():
+                continue
+            matches = automaton.find(normalize(line))
+            for _, _, canonical, kind in matches:
+                # Kỹ năng trong mục kỹ năng được xếp trước kỹ năng chỉ được nhắc tới ở mục khác
+                rank = number if in_skills else len(text) + number
+                found = tech if kind == "tech" else soft
+                found[canonical] = min(found.get(canonical, rank), rank)
+            if in_skills and _is_skill_list(line, automaton):
+                known_lines.append(number)
+                for _, _, canonical, kind in matches:
+                    field = "tech_skills" if kind == "tech" else "soft_skills"
+                    if canonical not in prefilled[field]:
+                        prefilled[field].append(canonical)
+
+    return {
+        "sections": sections,
+        "tech_skills": sorted(tech, key=tech.get),
+        "soft_skills": sorted(soft, key=soft.get),
+        "prefilled": prefilled,
+        "known_lines": known_lines,
+        "ignored_lines": ignored_lines,
+    }
+
+
+def to_extraction(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Kết quả trích xuất cùng định dạng với kết quả của LLM, dùng khi không gọi được LLM"""
+    by_section: Dict[str, List[Tuple[int, str]]] = {}
+    for section in analysis["sections"]:
+        by_section.setdefault(section["section"], []).extend(section["lines"])
+    return {
+        "tech_skills": analysis["tech_skills"],
+        "soft_skills": analysis["soft_skills"],
+        "work_experience": _section_text(by_section.get("experience", [])),
+        "projects": _project_items(by_section.get("projects", [])),
+        "education": _section_text(by_section.get("education", [])),
+    }
+
+
+def extract(text: str) -> Dict[str, Any]:
+    return to_extraction(analyze(text))
+
+
+def llm_text(text: str, analysis: Dict[str, Any]) -> str:
+    """Nội dung CV gửi tới LLM: bỏ các dòng kỹ năng đã nhận diện (điền sẵn vào kết quả) và các mục không dùng tới"""
+    skipped = set(analysis["known_lines"]) | set(analysis["ignored_lines"])
+    if not skipped:
+        return text
+    return "\n".join(line for number, line in enumerate(text.splitlines()) if number not in skipped)
+
+
+def merge_skills(result: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Thêm vào kết quả của LLM các kỹ năng của những dòng đã bỏ khỏi nội dung gửi đi (bỏ trùng, không phân biệt
+    hoa thường). Kỹ năng chỉ được nhắc tới trong nội dung khác do LLM quyết định
+    """
+    merged = dict(result)
+    for field in ("tech_skills", "soft_skills"):
+        values = result.get(field) or []
+        if isinstance(values, str):
+            values = [value.strip() for value in values.split(",") if value.strip()]
+        seen = {normalize(str(value)) for value in values}
+        merged[field] = list(values) + [skill for skill in analysis["prefilled"][field] if normalize(skill) not in seen]
+    return merged
@@ -1,32 +1,38 @@
-from typing import Dict, Any, List, Optional
-from sqlmodel import Session, select
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta
+import json
+from sqlmodel import select, delete
 from models import (
     Skills, SkillsCreate, 
     Experience, ExperienceCreate,
     CoverLetter, CoverLetterCreate,
-    User,
-    engine
+    User, CVJob, CVExtraction, CVFile,
+    async_session
 )
+import fulltext
+import migrations
 
 def init_db():
-    """Khởi tạo database và các bảng cần thiết"""
-    from models import create_db_and_tables
-    create_db_and_tables()
+    """Khởi tạo database: chạy các migration còn thiếu và kiểm tra index"""
+    migrations.upgrade()
+    migrations.check_indexes()
+    # Tạo chỉ mục full-text search (FTS5) cho Experience và CoverLetter
+    fulltext.init_search_index()
 
-def save_skills(tech_skills: str, soft_skills: str) -> int:
+async def save_skills(tech_skills: str, soft_skills: str) -> int:
     """Lưu thông tin kỹ năng vào database"""
-    with Session(engine) as session:
+    async with async_session() as session:
         skills = Skills(tech_skills=tech_skills, soft_skills=soft_skills)
         session.add(skills)
-        session.commit()
-        session.refresh(skills)
+        await session.commit()
+        await session.refresh(skills)
         return skills.id
 
-def get_skills() -> Optional[Dict[str, Any]]:
+async def get_skills() -> Optional[Dict[str, Any]]:
     """Lấy thông tin kỹ năng mới nhất từ database"""
-    with Session(engine) as session:
+    async with async_session() as session:
         statement = select(Skills).order_by(Skills.id.desc()).limit(1)
-        result = session.exec(statement).first()
+        result = (await session.exec(statement)).first()
         
         if result:
             return {
@@ -38,20 +44,20 @@ def get_skills() -> Optional[Dict[str, Any]]:
             }
         return None
 
-def save_experience(work_experience: str, projects: str) -> int:
+async def save_experience(work_experience: str, projects: str) -> int:
     """Lưu thông tin kinh nghiệm vào database"""
-    with Session(engine) as session:
+    async with async_session() as session:
         experience = Experience(work_experience=work_experience, projects=projects)
         session.add(experience)
-        session.commit()
-        session.refresh(experience)
+        await session.commit()
+        await session.refresh(experience)
         return experience.id
 
-def get_experience() -> Optional[Dict[str, Any]]:
+async def get_experience() -> Optional[Dict[str, Any]]:
     """Lấy thông tin kinh nghiệm mới nhất từ database"""
-    with Session(engine) as session:
+    async with async_session() as session:
         statement = select(Experience).order_by(Experience.id.desc()).limit(1)
-        result = session.exec(statement).first()
+        result = (await session.exec(statement)).first()
         
         if result:
             return {
@@ -63,20 +69,31 @@ def get_experience() -> Optional[Dict[str, Any]]:
             }
         return None
 
-def save_cover_letter(job_description: str, cover_letter: str) -> int:
+async def save_cover_letter(job_description: str, cover_letter: str, request_hash: Optional[str] = None) -> int:
     """Lưu cover letter vào database"""
-    with Session(engine) as session:
-        letter = CoverLetter(job_description=job_description, cover_letter=cover_letter)
+    async with async_session() as session:
+        letter = CoverLetter(job_description=job_description, cover_letter=cover_letter, request_hash=request_hash)
         session.add(letter)
-        session.commit()
-        session.refresh(letter)
+        await session.commit()
+        await session.refresh(letter)
         return letter.id
 
-def get_cover_letters() -> List[Dict[str, Any]]:
+async def save_cover_letters(letters: List[Tuple[str, str, Optional[str]]]) -> List[int]:
+    """Lưu nhiều cover letter trong một transaction, mỗi phần tử là (job_description, cover_letter, request_hash)"""
+    async with async_session() as session:
+        rows = [
+            CoverLetter(job_description=job_description, cover_letter=cover_letter, request_hash=request_hash)
+            for job_description, cover_letter, request_hash in letters
+        ]
+        session.add_all(rows)
+        await session.commit()
+        return [row.id for row in rows]
+
+async def get_cover_letters() -> List[Dict[str, Any]]:
     """Lấy danh sách cover letter từ database"""
-    with Session(engine) as session:
+    async with async_session() as session:
         statement = select(CoverLetter).order_by(CoverLetter.id.desc())
-        results = session.exec(statement).all()
+        results = (await session.exec(statement)).all()
         
         return [
             {
@@ -86,4 +103,173 @@ def get_cover_letters() -> List[Dict[str, Any]]:
                 "created_at": letter.created_at
             }
             for letter in results
-        ] 
\ No newline at end of file
+        ]
+
+async def get_cover_letter_by_hash(request_hash: str, max_age_seconds: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Lấy cover letter mới nhất đã tạo cho cùng một request (theo hash)"""
+    async with async_session() as session:
+        statement = select(CoverLetter).where(CoverLetter.request_hash == request_hash)
+        if max_age_seconds is not None:
+            statement = statement.where(CoverLetter.created_at >= datetime.now() - timedelta(seconds=max_age_seconds))
+        result = (await session.exec(statement.order_by(CoverLetter.id.desc()).limit(1))).first()
+        
+        if result:
+            return {
+                "id": result.id,
+                "cover_letter": result.cover_letter
+            }
+        return None
+
+async def create_cv_job(filename: str, file_data: bytes) -> str:
+    """Tạo job xử lý CV mới ở trạng thái chờ"""
+    async with async_session() as session:
+        job = CVJob(filename=filename, file_data=file_data)
+        session.add(job)
+        await session.commit()
+        return job.id
+
+async def get_cv_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Lấy trạng thái của job xử lý CV"""
+    async with async_session() as session:
+        job = await session.get(CVJob, job_id)
+        
+        if job:
+            return {
+                "id": job.id,
+                "status": job.status,
+                "progress": job.progress,
+                "stage": job.stage,
+                "filename": job.filename,
+                "result": json.loads(job.result) if job.result else None,
+                "error": job.error,
+                "created_at": job.created_at,
+                "updated_at": job.updated_at
+            }
+        return None
+
+async def get_cv_job_file(job_id: str) -> Optional[bytes]:
+    """Lấy nội dung file PDF của job"""
+    async with async_session() as session:
+        job = await session.get(CVJob, job_id)
+        return job.file_data if job else None
+
+async def update_cv_job(job_id: str, **fields) -> None:
+    """Cập nhật trạng thái, tiến độ hoặc kết quả của job"""
+    async with async_session() as session:
+        job = await session.get(CVJob, job_id)
+        if not job:
+            return
+        for key, value in fields.items():
+            setattr(job, key, value)
+        job.updated_at = datetime.now()
+        session.add(job)
+        await session.commit()
+
+async def reset_unfinished_cv_jobs() -> List[str]:
+    """Đưa các job đang dở (do server khởi động lại) về trạng thái chờ, trả về danh sách id"""
+    async with async_session() as session:
+        statement = select(CVJob).where(CVJob.status.in_(["pending", "processing"])).order_by(CVJob.created_at)
+        jobs = (await session.exec(statement)).all()
+        for job in jobs:
+            job.status = "pending"
+            job.progress = 0
+            job.stage = "queued"
+            session.add(job)
+        await session.commit()
+        return [job.id for job in jobs]
+
+async def get_cv_extraction(
+    text_hash: Optional[str] = None,
+    file_hash: Optional[str] = None,
+    max_age_seconds: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Tìm kết quả trích xuất CV đã lưu theo hash văn bản, hoặc theo hash file nếu không có hash văn bản.
+    Khi tìm theo văn bản kèm file_hash, ghi lại ánh xạ file -> văn bản cho lần upload sau.
+    """
+    async with async_session() as session:
+        if text_hash is None:
+            mapping = await session.get(CVFile, file_hash)
+            if mapping is None:
+                return None
+            text_hash = mapping.text_hash
+
+        entry = await session.get(CVExtraction, text_hash)
+        if entry is None:
+            return None
+        if max_age_seconds and entry.created_at < datetime.now() - timedelta(seconds=max_age_seconds):
+            return None
+
+        # Bản ghi Skills/Experience có thể đã bị xoá sau khi được tạo từ kết quả này
+        rows_exist = (
+            entry.skills_id is not None and await session.get(Skills, entry.skills_id) is not None
+            and entry.experience_id is not None and await session.get(Experience, entry.experience_id) is not None
+        )
+        cached = {
+            "text_hash": entry.text_hash,
+            "result": json.loads(entry.result),
+            "skills_id": entry.skills_id,
+            "experience_id": entry.experience_id,
+            "rows_exist": rows_exist
+        }
+
+        entry.hits += 1
+        entry.last_used_at = datetime.now()
+        session.add(entry)
+        if file_hash:
+            await session.merge(CVFile(file_hash=file_hash, text_hash=text_hash))
+        await session.commit()
+        return cached
+
+async def save_cv_extraction(
+    text_hash: str,
+    file_hash: Optional[str],
+    text_content: str,
+    result: Dict[str, Any],
+    skills_id: Optional[int],
+    experience_id: Optional[int],
+    max_entries: int,
+    max_bytes: int,
+    max_age_seconds: Optional[int] = None
+) -> None:
+    """Lưu (hoặc cập nhật) kết quả trích xuất CV, sau đó dọn cache theo giới hạn"""
+    result_json = json.dumps(result, ensure_ascii=False)
+    async with async_session() as session:
+        await session.merge(CVExtraction(
+            text_hash=text_hash,
+            text_content=text_content,
+            result=result_json,
+            skills_id=skills_id,
+            experience_id=experience_id,
+            size_bytes=len(text_content.encode("utf-8")) + len(result_json.encode("utf-8"))
+        ))
+        if file_hash:
+            await session.merge(CVFile(file_hash=file_hash, text_hash=text_hash))
+        await session.commit()
+    await prune_cv_extractions(max_entries, max_bytes, max_age_seconds)
+
+async def prune_cv_extractions(max_entries: int, max_bytes: int, max_age_seconds: Optional[int] = None) -> int:
+    """
+    Xoá các kết quả trích xuất CV đã hết hạn, sau đó xoá các kết quả ít được dùng gần đây nhất
+    cho tới khi số lượng và tổng dung lượng nằm trong giới hạn. Trả về số bản ghi đã xoá.
+    """
+    async with async_session() as session:
+        entries = (await session.exec(
+            select(CVExtraction.text_hash, CVExtraction.size_bytes, CVExtraction.created_at)
+            .order_by(CVExtraction.last_used_at.desc())
+        )).all()
+
+        cutoff = datetime.now() - timedelta(seconds=max_age_seconds) if max_age_seconds else None
+        evicted, kept, total_bytes = [], 0, 0
+        for text_hash, size_bytes, created_at in entries:
+            if (cutoff is not None and created_at < cutoff) or kept >= max_entries or total_bytes + size_bytes > max_bytes:
+                evicted.append(text_hash)
+            else:
+                kept += 1
+                total_bytes += size_bytes
+
+        if evicted:
+            await session.exec(delete(CVFile).where(CVFile.text_hash.in_(evicted)))
+            await session.exec(delete(CVExtraction).where(CVExtraction.text_hash.in_(evicted)))
+            await session.commit()
+        return len(evicted)
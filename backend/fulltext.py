@@ -0,0 +1,192 @@
+import re
+import sys
+import argparse
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models import Experience, CoverLetter, engine
+
+# Các bảng được đánh chỉ mục full-text (SQLite FTS5, external content):
+# tên chỉ mục -> (bảng gốc, các cột văn bản)
+SEARCH_INDEXES = {
+    "experience": (Experience.__tablename__, ["work_experience", "projects"]),
+    "coverletter": (CoverLetter.__tablename__, ["job_description", "cover_letter"]),
+}
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+SNIPPET_TOKENS = 16
+
+_available: Optional[bool] = None
+
+
+def fts_table(index: str) -> str:
+    return f"{SEARCH_INDEXES[index][0]}_fts"
+
+
+def _create_statements(index: str) -> List[str]:
+    """Câu lệnh tạo bảng FTS5 và các trigger đồng bộ với bảng gốc"""
+    source, columns = SEARCH_INDEXES[index]
+    fts = fts_table(index)
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{source}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {source} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});
+        END""",
+    ]
+
+
+def init_search_index() -> bool:
+    """
+    Tạo các bảng FTS5 và trigger nếu chưa có. Chỉ mục mới tạo sẽ được xây dựng lại
+    từ dữ liệu hiện có. Trả về False nếu database không hỗ trợ FTS5.
+    """
+    global _available
+    if engine.dialect.name != "sqlite":
+        _available = False
+        return False
+
+    try:
+        with engine.begin() as connection:
+            for index in SEARCH_INDEXES:
+                fts = fts_table(index)
+                exists = connection.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": fts}
+                ).first()
+                for statement in _create_statements(index):
+                    connection.execute(text(statement))
+                if not exists:
+                    connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+    except Exception:
+        # SQLite được build không có FTS5
+        _available = False
+        return False
+
+    _available = True
+    return True
+
+
+def is_available() -> bool:
+    return bool(_available)
+
+
+def rebuild_search_index() -> None:
+    """Xây dựng lại toàn bộ chỉ mục full-text từ các bảng gốc"""
+    with engine.begin() as connection:
+        for index in SEARCH_INDEXES:
+            fts = fts_table(index)
+            connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+@contextmanager
+def deferred_indexing():
+    """
+    Tạm bỏ trigger INSERT của các chỉ mục khi nạp dữ liệu số lượng lớn,
+    sau đó tạo lại trigger và xây dựng lại chỉ mục một lần
+    """
+    if not is_available():
+        yield
+        return
+    with engine.begin() as connection:
+        for index in SEARCH_INDEXES:
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {fts_table(index)}_ai"))
+    try:
+        yield
+    finally:
+        init_search_index()
+        rebuild_search_index()
+
+
+def build_match_query(search: str) -> str:
+    """
+    Chuyển chuỗi tìm kiếm của người dùng thành biểu thức MATCH an toàn:
+    mỗi từ được đặt trong dấu ngoặc kép và tìm theo tiền tố
+    """
+    terms = re.findall(r"\w+", search)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def match_ids(index: str, match_query: str):
+    """Subquery trả về id các bản ghi khớp, dùng với Model.id.in_(...)"""
+    fts = fts_table(index)
+    return text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :match_query").bindparams(match_query=match_query)
+
+
+async def search(
+    session: AsyncSession,
+    index: str,
+    match_query: str,
+    offset: int = 0,
+    limit: int = 100
+) -> List[Dict[str, Any]]:
+    """Tìm kiếm và xếp hạng theo BM25, kèm đoạn trích có đánh dấu từ khoá"""
+    fts = fts_table(index)
+    statement = text(f"""
+        SELECT rowid AS id,
+               bm25({fts}) AS rank,
+               snippet({fts}, -1, :start, :end, '…', :tokens) AS snippet
+        FROM {fts}
+        WHERE {fts} MATCH :match_query
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    """)
+    rows = (await session.execute(statement, {
+        "match_query": match_query,
+        "start": SNIPPET_START,
+        "end": SNIPPET_END,
+        "tokens": SNIPPET_TOKENS,
+        "limit": limit,
+        "offset": offset,
+    })).all()
+    return [{"id": row.id, "rank": row.rank, "snippet": row.snippet} for row in rows]
+
+
+async def snippets(session: AsyncSession, index: str, match_query: str, ids: List[int]) -> Dict[int, str]:
+    """Lấy đoạn trích cho một danh sách id đã biết"""
+    if not ids:
+        return {}
+    fts = fts_table(index)
+    placeholders = ", ".join(f":id{i}" for i in range(len(ids)))
+    statement = text(f"""
+        SELECT rowid AS id, snippet({fts}, -1, :start, :end, '…', :tokens) AS snippet
+        FROM {fts}
+        WHERE {fts} MATCH :match_query AND rowid IN ({placeholders})
+    """)
+    params = {"match_query": match_query, "start": SNIPPET_START, "end": SNIPPET_END, "tokens": SNIPPET_TOKENS}
+    params.update({f"id{i}": value for i, value in enumerate(ids)})
+    return {row.id: row.snippet for row in (await session.execute(statement, params)).all()}
+
+
+async def count(session: AsyncSession, index: str, match_query: str) -> int:
+    fts = fts_table(index)
+    statement = text(f"SELECT COUNT(*) FROM {fts} WHERE {fts} MATCH :match_query")
+    return (await session.execute(statement, {"match_query": match_query})).scalar_one()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quản lý chỉ mục full-text search")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild: xây dựng lại chỉ mục từ dữ liệu hiện có")
+    args = parser.parse_args()
+
+    import migrations
+    migrations.upgrade()
+    if not init_search_index():
+        print("Database không hỗ trợ FTS5")
+        sys.exit(1)
+    rebuild_search_index()
+    print("Đã xây dựng lại chỉ mục full-text search")
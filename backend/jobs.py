@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import db
+import pdf_parser
+import metrics
+import cache
+import ratelimit
+
+logger = logging.getLogger(__name__)
+
+# Số job CV xử lý đồng thời (phần gọi LLM chạy bất đồng bộ)
+CV_JOB_WORKERS = int(os.getenv("CV_JOB_WORKERS", "2"))
+# Số process dùng để đọc PDF (tác vụ nặng CPU)
+CV_PARSE_PROCESSES = int(os.getenv("CV_PARSE_PROCESSES", "2"))
+
+_handler: Optional[Callable[[str, Optional[str]], Awaitable[Dict[str, Any]]]] = None
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def configure(handler: Callable[[str, Optional[str]], Awaitable[Dict[str, Any]]]) -> None:
+    """Đăng ký hàm trích xuất thông tin từ nội dung CV và hash file (gọi LLM và lưu database)"""
+    global _handler
+    _handler = handler
+
+
+async def start() -> None:
+    """Khởi động worker pool và đưa lại các job chưa hoàn thành vào hàng đợi"""
+    global _queue, _workers, _process_pool
+    if _queue is not None:
+        return
+    _queue = asyncio.Queue()
+    _process_pool = ProcessPoolExecutor(max_workers=CV_PARSE_PROCESSES)
+    for job_id in await db.reset_unfinished_cv_jobs():
+        _queue.put_nowait(job_id)
+    _workers = [asyncio.create_task(_worker()) for _ in range(CV_JOB_WORKERS)]
+    logger.info(f"Started {CV_JOB_WORKERS} CV job workers, {_queue.qsize()} job(s) resumed")
+
+
+async def stop() -> None:
+    """Dừng worker pool; các job đang dở sẽ được xử lý lại ở lần khởi động sau"""
+    global _queue, _workers, _process_pool
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+    _queue, _workers, _process_pool = None, [], None
+
+
+async def submit(filename: str, file_data: bytes) -> str:
+    """Lưu job vào database và đưa vào hàng đợi, trả về id của job"""
+    await start()
+    job_id = await db.create_cv_job(filename, file_data)
+    _queue.put_nowait(job_id)
+    return job_id
+
+
+async def _worker() -> None:
+    while True:
+        job_id = await _queue.get()
+        try:
+            await _process(job_id)
+        except Exception as e:
+            logger.error(f"Error processing CV job {job_id}: {str(e)}", exc_info=True)
+        finally:
+            _queue.task_done()
+
+
+async def _process(job_id: str) -> None:
+    try:
+        file_data = await db.get_cv_job_file(job_id)
+        if file_data is None:
+            raise ValueError("Không tìm thấy nội dung file của job")
+
+        # File đã được xử lý trước đó: dùng lại kết quả đã lưu
+        file_hash = hashlib.sha256(file_data).hexdigest()
+        cached = await db.get_cv_extraction(None, file_hash, cache.CV_CACHE_TTL)
+        if cached is not None and cached["rows_exist"]:
+            await db.update_cv_job(
+                job_id,
+                status="completed", progress=100, stage="completed",
+                result=json.dumps(cached["result"], ensure_ascii=False), file_data=None
+            )
+            return
+
+        # Đọc PDF trong process pool để không chặn event loop
+        await db.update_cv_job(job_id, status="processing", progress=10, stage="parsing")
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        text_content = await loop.run_in_executor(
+            _process_pool, pdf_parser.extract_pdf_text, file_data, pdf_parser.MAX_CV_PAGES
+        )
+        metrics.observe_pdf_parse(time.perf_counter() - started)
+
+        # Trích xuất thông tin bằng LLM
+        await db.update_cv_job(job_id, progress=50, stage="extracting")
+        extracted_info = await _handler(text_content, file_hash)
+
+        await db.update_cv_job(
+            job_id,
+            status="completed", progress=100, stage="completed",
+            result=json.dumps(extracted_info, ensure_ascii=False), file_data=None
+        )
+    except asyncio.CancelledError:
+        raise
+    except ratelimit.RateLimitExceeded as e:
+        # OpenAI hoặc hàng đợi LLM đang quá tải: đưa job vào lại hàng đợi sau Retry-After
+        await db.update_cv_job(job_id, status="pending", progress=0, stage="rate_limited")
+        asyncio.get_running_loop().call_later(e.retry_after, _requeue, job_id)
+        logger.warning(f"CV job {job_id} rate limited, retrying in {e.retry_after}s")
+    except Exception as e:
+        await db.update_cv_job(job_id, status="failed", stage="failed", error=str(e))
+        raise
+
+
+def _requeue(job_id: str) -> None:
+    # Server đã dừng: job còn "pending" trong database sẽ được xử lý lại khi khởi động
+    if _queue is not None:
+        _queue.put_nowait(job_id)
@@ -0,0 +1,122 @@
+import os
+import random
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Optional
+from dotenv import load_dotenv
+
+import metrics
+import ratelimit
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# Tải biến môi trường từ file .env
+load_dotenv()
+
+# Cấu hình kết nối tới OpenAI
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+# Số lời gọi LLM được phép chạy đồng thời trong một process
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "10"))
+# Số lời gọi được xếp hàng chờ slot và thời gian chờ tối đa (giây); vượt quá sẽ trả về 429
+OPENAI_QUEUE_SIZE = int(os.getenv("OPENAI_QUEUE_SIZE", "100"))
+OPENAI_QUEUE_TIMEOUT = float(os.getenv("OPENAI_QUEUE_TIMEOUT", "30"))
+# Thử lại khi OpenAI trả về 429 (sau các lần thử lại của SDK), backoff luỹ thừa có jitter
+OPENAI_RATE_LIMIT_RETRIES = int(os.getenv("OPENAI_RATE_LIMIT_RETRIES", "2"))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "1"))
+OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "20"))
+
+logger = logging.getLogger(__name__)
+
+_semaphore: Optional[asyncio.Semaphore] = None
+_waiting = 0
+
+
+def create_async_client(api_key: Optional[str]) -> "AsyncOpenAI":
+    """Tạo AsyncOpenAI client dùng chung một connection pool"""
+    # Import khi cần để không làm chậm thời gian khởi động
+    import httpx
+    from openai import AsyncOpenAI
+
+    timeout = httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+    http_client = httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+        )
+    )
+    return AsyncOpenAI(
+        api_key=api_key,
+        timeout=timeout,
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=http_client
+    )
+
+
+@asynccontextmanager
+async def concurrency_slot():
+    """
+    Giới hạn số lời gọi LLM chạy đồng thời theo OPENAI_MAX_CONCURRENCY. Các lời gọi còn lại
+    chờ theo thứ tự; hàng đợi đầy hoặc chờ quá OPENAI_QUEUE_TIMEOUT sẽ raise RateLimitExceeded
+    """
+    global _semaphore, _waiting
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+    if _semaphore.locked():
+        if _waiting >= OPENAI_QUEUE_SIZE:
+            ratelimit.rejected("queue")
+            raise ratelimit.RateLimitExceeded(OPENAI_QUEUE_TIMEOUT / 2, "queue")
+        _waiting += 1
+        try:
+            await asyncio.wait_for(_semaphore.acquire(), OPENAI_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            ratelimit.rejected("queue")
+            raise ratelimit.RateLimitExceeded(OPENAI_QUEUE_TIMEOUT / 2, "queue")
+        finally:
+            _waiting -= 1
+    else:
+        await _semaphore.acquire()
+    try:
+        yield
+    finally:
+        _semaphore.release()
+
+
+def retry_delay(attempt: int, error: Exception) -> float:
+    """Thời gian chờ trước lần thử lại: theo header Retry-After của OpenAI nếu có, nếu không thì full jitter"""
+    response = getattr(error, "response", None)
+    headers = response.headers if response is not None else {}
+    try:
+        if headers.get("retry-after-ms"):
+            return min(float(headers["retry-after-ms"]) / 1000, OPENAI_RETRY_MAX_DELAY)
+        if headers.get("retry-after"):
+            return min(float(headers["retry-after"]), OPENAI_RETRY_MAX_DELAY)
+    except ValueError:
+        pass
+    return random.uniform(0, min(OPENAI_RETRY_MAX_DELAY, OPENAI_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def create_with_retry(create, **kwargs):
+    """
+    Gọi `create` (ví dụ client.chat.completions.create), thử lại khi OpenAI trả về 429.
+    Hết số lần thử sẽ raise RateLimitExceeded để API trả về 429 thay vì 500
+    """
+    from openai import RateLimitError
+
+    for attempt in range(OPENAI_RATE_LIMIT_RETRIES + 1):
+        try:
+            return await create(**kwargs)
+        except RateLimitError as e:
+            delay = retry_delay(attempt, e)
+            if attempt == OPENAI_RATE_LIMIT_RETRIES:
+                ratelimit.rejected("upstream")
+                raise ratelimit.RateLimitExceeded(delay, "upstream") from e
+            logger.warning(f"OpenAI rate limit reached, retrying in {delay:.2f}s (attempt {attempt + 1})")
+            metrics.llm_retries.inc(model=kwargs.get("model", ""))
+            await asyncio.sleep(delay)
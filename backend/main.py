@@ -1,27 +1,42 @@
 import os
-import tempfile
+import time
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, status
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from typing import Optional, List, Generic, TypeVar, Dict, Any
+from typing import Optional, List, Generic, TypeVar, Dict, Any, Tuple
 import db
-import PyPDF2
-import re
+import llm
+import cache
+import cv_extractor
+import fulltext
+import jobs
+import matching
+import pdf_parser
+import passwords
+import metrics
+import prompts
+import profiles
+import ratelimit
 import json
-from openai import OpenAI
-from sqlmodel import Session, select
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, inspect
 from models import (
     Skills, SkillsCreate, SkillsRead,
     Experience, ExperienceCreate, ExperienceRead,
     CoverLetter, CoverLetterCreate, CoverLetterRead,
     User, UserCreate, UserRead,
-    get_session
+    CVJobRead,
+    engine, async_engine, async_session, get_session
 )
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
 from jose import JWTError, jwt
 
 # Tải biến môi trường từ file .env
@@ -29,12 +44,15 @@ load_dotenv()
 
 # Lấy API key từ biến môi trường
 openai_api_key = os.getenv("OPENAI_API_KEY")
-print('openai_api_key', openai_api_key)# Đặt giá trị mặc định để phát triển
 
-client = OpenAI(api_key=openai_api_key)
+# AsyncOpenAI client dùng chung cho mọi request, không chặn event loop khi chờ LLM.
+# Được tạo khi gọi LLM lần đầu để import main nhanh hơn (xem get_llm_client)
+client = None
 
-# Khởi tạo database
-db.init_db()
+# Đo số lượng và thời gian câu SQL cho metrics
+if metrics.METRICS_ENABLED:
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(async_engine.sync_engine)
 
 # Cấu hình logging
 logging.basicConfig(
@@ -43,6 +61,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def get_llm_client():
+    """AsyncOpenAI client dùng chung, tạo khi dùng lần đầu"""
+    global client
+    if client is None:
+        client = llm.create_async_client(openai_api_key)
+    return client
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Khởi tạo database (migration, chỉ mục full-text) khi server khởi động thay vì lúc import
+    await run_in_threadpool(db.init_db)
+    # Khởi động worker xử lý CV chạy nền (tiếp tục các job còn dở)
+    await jobs.start()
+    yield
+    await jobs.stop()
+    await ratelimit.close_backend()
+    await profiles.flush_index()
+    await async_engine.dispose()
+    # Đóng connection pool tới OpenAI khi tắt server
+    if client is not None:
+        await client.close()
+
 # Cấu hình FastAPI với thông tin OpenAPI chi tiết
 app = FastAPI(
     title="Freelancer Profile API",
@@ -66,6 +106,7 @@ app = FastAPI(
         "name": "MIT License",
         "url": "https://opensource.org/licenses/MIT",
     },
+    lifespan=lifespan,
 )
 
 # Cấu hình CORS
@@ -77,6 +118,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def limit_cv_upload_size(request: Request, call_next):
+    """Từ chối file CV quá lớn dựa trên Content-Length, trước khi đọc body"""
+    if request.url.path == "/api/upload-cv":
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > pdf_parser.MAX_CV_FILE_SIZE:
+            return JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": f"File CV vượt quá giới hạn {pdf_parser.MAX_CV_FILE_SIZE} bytes"}
+            )
+    return await call_next(request)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Đo thời gian xử lý theo route, số câu SQL và thêm header Server-Timing"""
+    if not metrics.METRICS_ENABLED:
+        return await call_next(request)
+    timings = metrics.RequestTimings()
+    token = metrics.current_timings.set(timings)
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.current_timings.reset(token)
+    # Dùng path template của route để tránh nhãn có số lượng không giới hạn
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.http_request_duration.observe(
+        time.perf_counter() - timings.started,
+        method=request.method, route=path, status=str(response.status_code)
+    )
+    metrics.db_queries_per_request.observe(timings.db_queries, route=path)
+    if metrics.SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = timings.server_timing()
+    return response
+
+@app.exception_handler(passwords.PasswordWorkersBusy)
+async def password_workers_busy_handler(request: Request, exc: passwords.PasswordWorkersBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(ratelimit.RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: ratelimit.RateLimitExceeded):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": str(exc), "scope": exc.scope},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 # Generic type for API responses
 T = TypeVar('T')
 
@@ -99,17 +191,62 @@ class CoverLetterRequest(BaseModel):
     experience_level: Optional[str] = None
     tone: Optional[str] = "Professional"
     additional_info: Optional[str] = None
+    # Bỏ qua cache và luôn gọi OpenAI để tạo cover letter mới
+    force_refresh: Optional[bool] = False
+    # Lấy kỹ năng, kinh nghiệm và dự án từ hồ sơ đã lưu cho các trường để trống
+    use_profile: Optional[bool] = False
 
 class CoverLetterResponse(BaseModel):
     cover_letter: str
 
+class BatchCoverLetterRequest(BaseModel):
+    items: List[CoverLetterRequest]
+
+class BatchCoverLetterItem(BaseModel):
+    index: int
+    success: bool
+    id: Optional[int] = None
+    cover_letter: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+class JobScoreRequest(BaseModel):
+    job_descriptions: List[str]
+    # Chỉ trả về `limit` tin có điểm cao nhất
+    limit: Optional[int] = None
+
+class JobScoreItem(BaseModel):
+    index: int
+    score: float
+    skill_score: float
+    experience_score: float
+    matched_skills: List[str] = []
+
+# Giới hạn số cover letter trong một request batch và số lời gọi LLM song song của mỗi batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "5"))
+
 # Cấu hình JWT
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Nhúng thông tin người dùng vào token để get_current_user không cần truy vấn database
+AUTH_EMBED_USER_CLAIMS = os.getenv("AUTH_EMBED_USER_CLAIMS", "false").lower() == "true"
+
+# Cache người dùng đã xác thực theo subject của token (AUTH_USER_CACHE_SIZE=0 để tắt)
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+user_cache = cache.LRUCache(AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TTL)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target: User):
+    """Xoá user khỏi cache khi thông tin bị cập nhật (ví dụ bị vô hiệu hoá) hoặc bị xoá"""
+    user_cache.delete(target.username)
+    # Đổi username: cache lưu theo username cũ (subject của các token đã cấp), lấy từ lịch sử thay đổi của thuộc tính
+    for username in inspect(target).attrs.username.history.deleted:
+        user_cache.delete(username)
 
-# Cấu hình password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 class Token(BaseModel):
@@ -119,18 +256,19 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: Optional[str] = None
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-def authenticate_user(session: Session, username: str, password: str):
-    user = session.exec(select(User).where(User.username == username)).first()
+async def authenticate_user(session: AsyncSession, username: str, password: str):
+    user = (await session.exec(select(User).where(User.username == username))).first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await passwords.verify_and_update(password, user.hashed_password)
+    if not valid:
         return False
+    # Hash cũ (cost factor thấp hơn cấu hình hiện tại) được nâng cấp ngay khi đăng nhập
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -143,7 +281,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+def user_claims(user: User) -> Dict[str, Any]:
+    """Các claim cần thiết để dựng lại User từ token"""
+    return {
+        "uid": user.id,
+        "email": user.email,
+        "active": user.is_active,
+        "su": user.is_superuser,
+        "ca": user.created_at.isoformat(),
+        "ua": user.updated_at.isoformat(),
+    }
+
+def user_from_claims(payload: Dict[str, Any]) -> Optional[User]:
+    if "uid" not in payload:
+        return None
+    return User(
+        id=payload["uid"],
+        username=payload["sub"],
+        email=payload["email"],
+        hashed_password="",
+        is_active=payload["active"],
+        is_superuser=payload["su"],
+        created_at=datetime.fromisoformat(payload["ca"]),
+        updated_at=datetime.fromisoformat(payload["ua"]),
+    )
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Không thể xác thực thông tin đăng nhập",
@@ -157,11 +320,80 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: Session
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = session.exec(select(User).where(User.username == token_data.username)).first()
+    
+    # Chỉ tin thông tin nhúng trong token khi AUTH_EMBED_USER_CLAIMS bật; nếu không luôn lấy từ cache/database
+    user = user_from_claims(payload) if AUTH_EMBED_USER_CLAIMS else None
     if user is None:
-        raise credentials_exception
+        user = user_cache.get(token_data.username)
+    if user is None:
+        async with async_session() as session:
+            user = (await session.exec(select(User).where(User.username == token_data.username))).first()
+            if user is None:
+                raise credentials_exception
+            # Lưu bản sao tách khỏi session vào cache
+            user = User.model_validate(user)
+        user_cache.set(token_data.username, user)
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Tài khoản đã bị vô hiệu hoá"
+        )
     return user
 
+def rate_limit_key(request: Request) -> str:
+    """Khoá giới hạn tần suất: username trong access token nếu có, nếu không thì địa chỉ IP"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            username = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+            if username:
+                return f"user:{username}"
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+async def enforce_llm_rate_limit(request: Request):
+    """Dependency giới hạn tần suất cho các endpoint gọi LLM"""
+    await ratelimit.check(rate_limit_key(request))
+
+# Cache ngắn hạn cho tổng số bản ghi của các endpoint danh sách (tắt khi TTL = 0)
+LIST_COUNT_CACHE_TTL = float(os.getenv("LIST_COUNT_CACHE_TTL", "0"))
+list_count_cache = cache.LRUCache(maxsize=128, ttl=LIST_COUNT_CACHE_TTL)
+
+async def count_rows(session: AsyncSession, model, *conditions) -> int:
+    """Đếm số bản ghi bằng SELECT COUNT(*) thay vì tải toàn bộ bảng"""
+    cache_key = None
+    if LIST_COUNT_CACHE_TTL > 0:
+        cache_key = f"{model.__tablename__}:{[str(c.compile(compile_kwargs={'literal_binds': True})) for c in conditions]}"
+        cached = list_count_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    statement = select(func.count()).select_from(model)
+    for condition in conditions:
+        statement = statement.where(condition)
+    total = (await session.exec(statement)).one()
+
+    if cache_key is not None:
+        list_count_cache.set(cache_key, total)
+    return total
+
+def next_cursor(items: List[Any], limit: int) -> Optional[int]:
+    """ID dùng làm after_id cho trang tiếp theo, None nếu đã hết dữ liệu"""
+    if len(items) < limit or not items:
+        return None
+    return items[-1].id
+
+async def ranked_search(session: AsyncSession, index: str, model, match_query: str, offset: int, limit: int):
+    """Tìm kiếm full-text, trả về các bản ghi theo độ liên quan, tổng số kết quả và đoạn trích"""
+    hits = await fulltext.search(session, index, match_query, offset, limit)
+    ids = [hit["id"] for hit in hits]
+    rows = {row.id: row for row in (await session.exec(select(model).where(model.id.in_(ids)))).all()} if ids else {}
+    items = [rows[hit_id] for hit_id in ids if hit_id in rows]
+    total = await fulltext.count(session, index, match_query)
+    return items, total, {hit["id"]: hit["snippet"] for hit in hits}
+
 @app.get("/api", 
     summary="API Root Endpoint",
     description="Returns a welcome message to confirm the API is working",
@@ -174,13 +406,17 @@ def read_root():
         data=None
     )
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/init-sample-data", 
     status_code=status.HTTP_201_CREATED,
     summary="Initialize Sample Data",
     description="Creates initial sample data for the application including skills, experience, and a cover letter",
     tags=["Admin"]
 )
-async def init_sample_data(session: Session = Depends(get_session)):
+async def init_sample_data(session: AsyncSession = Depends(get_session)):
     """Tạo dữ liệu mẫu ban đầu cho ứng dụng"""
     try:
         # Tạo kỹ năng mẫu
@@ -204,7 +440,7 @@ async def init_sample_data(session: Session = Depends(get_session)):
         )
         session.add(sample_cover_letter)
         
-        session.commit()
+        await session.commit()
         
         return ResponseModel(
             success=True,
@@ -217,84 +453,457 @@ async def init_sample_data(session: Session = Depends(get_session)):
             detail=f"Lỗi khi tạo dữ liệu mẫu: {str(e)}"
         )
 
+def build_cover_letter_messages(request: CoverLetterRequest) -> List[Dict[str, str]]:
+    """Xây dựng danh sách message gửi tới OpenAI để tạo cover letter"""
+    # Chuẩn hoá và rút gọn các phần do người dùng nhập theo ngân sách token
+    job_description = prompts.compact_text(request.job_description, prompts.JOB_DESCRIPTION_TOKEN_BUDGET)["text"]
+    additional_info = prompts.compact_text(request.additional_info, prompts.ADDITIONAL_INFO_TOKEN_BUDGET)["text"]
+    prompt = f"""
+    Bạn là một chuyên gia viết cover letter giúp freelancer chinh phục khách hàng tiềm năng.
+
+    Nhiệm vụ: Viết một cover letter chuyên nghiệp (khoảng 250-350 từ) cho freelancer ứng tuyển vào dự án có mô tả sau:
+
+    ## MÔ TẢ CÔNG VIỆC:
+    {job_description}
+
+    ## KỸ NĂNG CỦA FREELANCER:
+    {request.freelancer_skills or 'Không có thông tin.'}
+
+    ## MỨC KINH NGHIỆM:
+    {request.experience_level or 'Không có thông tin.'}
+
+    ## THÔNG TIN BỔ SUNG:
+    {additional_info or 'Không có thông tin.'}
+
+    ## YÊU CẦU VỀ COVER LETTER:
+    - Giọng điệu: {request.tone}
+    - Mở đầu thu hút sự chú ý (hook) bằng cách đề cập trực tiếp đến vấn đề hoặc mục tiêu của dự án.
+    - Liên kết cụ thể kỹ năng và kinh nghiệm của freelancer với yêu cầu công việc (nêu ví dụ thực tế nếu có).
+    - Thể hiện sự hiểu biết về dự án, lĩnh vực hoặc khách hàng mục tiêu.
+    - Kết thúc bằng lời kêu gọi hành động (CTA) mạnh mẽ, thúc đẩy khách hàng liên hệ.
+
+    ## CODE SAMPLE (bắt buộc có):
+    - Viết thêm 1 đoạn mã (10-20 dòng) minh họa cách freelancer sẽ giải quyết một yêu cầu kỹ thuật quan trọng trong dự án.
+    - Đoạn mã nên rõ ràng, ngắn gọn, dễ hiểu và có chú thích giải thích ý tưởng chính.
+    - Ngôn ngữ lập trình phù hợp với yêu cầu dự án hoặc kỹ năng của freelancer.
+
+    ## LƯU Ý QUAN TRỌNG:
+    - Không dùng những câu từ sáo rỗng hoặc chung chung như "Tôi là người làm việc chăm chỉ", "Tôi đam mê công việc này".  
+    - Chỉ trình bày những nội dung cụ thể, có liên hệ rõ ràng đến dự án.
+    - Không cần chào hỏi hoặc ký tên cuối thư.
+
+    Bắt đầu viết ngay bây giờ.
+    """
+
+    return [
+        {"role": "system", "content": "Bạn là một trợ lý viết cover letter chuyên nghiệp, giúp freelancers tạo cover letter hấp dẫn."},
+        {"role": "user", "content": prompt}
+    ]
+
+async def resolve_profile(request: CoverLetterRequest) -> Tuple[CoverLetterRequest, Optional[Dict[str, Any]]]:
+    """
+    Với use_profile=true, điền các trường còn trống từ snapshot hồ sơ (kỹ năng, mức kinh nghiệm);
+    các đoạn kinh nghiệm/dự án liên quan nhất tới mô tả công việc (hoặc dự án mới nhất nếu không tìm được)
+    được thêm sau thông tin bổ sung của request
+    """
+    if not request.use_profile:
+        return request, None
+    snapshot = await profiles.get_snapshot()
+    selection = await profiles.select_experience(request.job_description)
+    experience = selection["text"] if selection else snapshot["projects"]
+    snapshot["relevant"] = selection["matches"] if selection else []
+    additional_info = "\n\n".join(part for part in (request.additional_info, experience) if part)
+    resolved = request.model_copy(update={
+        "freelancer_skills": request.freelancer_skills or snapshot["freelancer_skills"] or None,
+        "experience_level": request.experience_level or snapshot["experience_level"] or None,
+        "additional_info": additional_info or None
+    })
+    return resolved, snapshot
+
+def profile_metadata(snapshot: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"profile": profiles.metadata(snapshot)} if snapshot else {}
+
+def cover_letter_token_metadata(request: CoverLetterRequest) -> Dict[str, Any]:
+    """Số token (đếm tại local) của prompt cover letter sau khi rút gọn"""
+    job_description = prompts.compact_text(request.job_description, prompts.JOB_DESCRIPTION_TOKEN_BUDGET)
+    return {
+        "prompt_tokens": prompts.count_message_tokens(build_cover_letter_messages(request)),
+        "job_description_tokens": job_description["original_tokens"],
+        "job_description_compacted_tokens": job_description["tokens"],
+        "truncated": job_description["truncated"],
+        "budget": prompts.JOB_DESCRIPTION_TOKEN_BUDGET
+    }
+
 @app.post("/api/generate-cover-letter", 
     status_code=status.HTTP_201_CREATED,
     summary="Generate Cover Letter",
     description="""
     Generates a professional cover letter based on job description and freelancer information.
     The cover letter is created using OpenAI's API and adapted to the specified tone.
+    With `use_profile=true`, empty freelancer fields are filled server-side from the latest saved
+    skills and experience (cached until they change), so the client does not need to send them.
     """,
     response_model=ResponseModel[CoverLetterResponse],
+    dependencies=[Depends(enforce_llm_rate_limit)],
     tags=["Cover Letter"]
 )
 async def generate_cover_letter(request: CoverLetterRequest):
     try:
-        prompt = f"""
-        Bạn là một chuyên gia viết cover letter giúp freelancer chinh phục khách hàng tiềm năng.
+        request, profile = await resolve_profile(request)
+        cache_key = cache.cover_letter_cache_key(request)
+        cached = None if request.force_refresh else await get_cached_cover_letter(cache_key)
+        if cached is not None:
+            return ResponseModel(
+                success=True,
+                message="Tạo cover letter thành công",
+                data=CoverLetterResponse(cover_letter=cached["cover_letter"]),
+                metadata={**cover_letter_cache_metadata(cache_key, cached), **profile_metadata(profile)}
+            )
 
-        Nhiệm vụ: Viết một cover letter chuyên nghiệp (khoảng 250-350 từ) cho freelancer ứng tuyển vào dự án có mô tả sau:
+        # Gọi API OpenAI; các request giống hệt đang chạy đồng thời dùng chung một lời gọi
+        generated, coalesced = await cache.cover_letter_flight.do(
+            cache_key, lambda: generate_and_save_cover_letter(cache_key, request)
+        )
+        if coalesced:
+            cache.cover_letter_cache_stats.coalesced += 1
+        
+        return ResponseModel(
+            success=True,
+            message="Tạo cover letter thành công",
+            data=CoverLetterResponse(cover_letter=generated["cover_letter"]),
+            metadata={
+                **cover_letter_cache_metadata(cache_key, None, coalesced),
+                "tokens": cover_letter_token_metadata(request),
+                **profile_metadata(profile)
+            }
+        )
+    
+    except Exception as e:
+        if isinstance(e, ratelimit.RateLimitExceeded):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Lỗi khi tạo cover letter: {str(e)}"
+        )
 
-        ## MÔ TẢ CÔNG VIỆC:
-        {request.job_description}
+async def request_cover_letter(request: CoverLetterRequest) -> str:
+    """Gọi OpenAI để tạo nội dung cover letter"""
+    async with llm.concurrency_slot():
+        started = time.perf_counter()
+        response = await llm.create_with_retry(
+            get_llm_client().chat.completions.create,
+            model=cache.COVER_LETTER_MODEL,
+            messages=build_cover_letter_messages(request),
+            temperature=0.7,
+            max_tokens=1000
+        )
+        metrics.observe_llm(cache.COVER_LETTER_MODEL, "cover_letter", time.perf_counter() - started, getattr(response, "usage", None))
 
-        ## KỸ NĂNG CỦA FREELANCER:
-        {request.freelancer_skills or 'Không có thông tin.'}
+    # Trích xuất cover letter từ phản hồi
+    return response.choices[0].message.content.strip()
 
-        ## MỨC KINH NGHIỆM:
-        {request.experience_level or 'Không có thông tin.'}
+async def generate_and_save_cover_letter(cache_key: str, request: CoverLetterRequest) -> Dict[str, Any]:
+    """Tạo cover letter, lưu vào database và cache trong bộ nhớ"""
+    cover_letter = await request_cover_letter(request)
+    letter_id = await db.save_cover_letter(request.job_description, cover_letter, cache_key)
+    generated = {"id": letter_id, "cover_letter": cover_letter}
+    cache.cover_letter_cache.set(cache_key, generated)
+    return generated
 
-        ## THÔNG TIN BỔ SUNG:
-        {request.additional_info or 'Không có thông tin.'}
+async def get_cached_cover_letter(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Tìm cover letter đã tạo cho cùng request: cache trong bộ nhớ trước, sau đó tới database"""
+    cached = cache.cover_letter_cache.get(cache_key)
+    if cached is not None:
+        cache.cover_letter_cache_stats.memory_hits += 1
+        return {**cached, "source": "memory"}
 
-        ## YÊU CẦU VỀ COVER LETTER:
-        - Giọng điệu: {request.tone}
-        - Mở đầu thu hút sự chú ý (hook) bằng cách đề cập trực tiếp đến vấn đề hoặc mục tiêu của dự án.
-        - Liên kết cụ thể kỹ năng và kinh nghiệm của freelancer với yêu cầu công việc (nêu ví dụ thực tế nếu có).
-        - Thể hiện sự hiểu biết về dự án, lĩnh vực hoặc khách hàng mục tiêu.
-        - Kết thúc bằng lời kêu gọi hành động (CTA) mạnh mẽ, thúc đẩy khách hàng liên hệ.
+    cached = await db.get_cover_letter_by_hash(cache_key, cache.COVER_LETTER_CACHE_TTL)
+    if cached is not None:
+        cache.cover_letter_cache_stats.database_hits += 1
+        cache.cover_letter_cache.set(cache_key, cached)
+        return {**cached, "source": "database"}
 
-        ## CODE SAMPLE (bắt buộc có):
-        - Viết thêm 1 đoạn mã (10-20 dòng) minh họa cách freelancer sẽ giải quyết một yêu cầu kỹ thuật quan trọng trong dự án.
-        - Đoạn mã nên rõ ràng, ngắn gọn, dễ hiểu và có chú thích giải thích ý tưởng chính.
-        - Ngôn ngữ lập trình phù hợp với yêu cầu dự án hoặc kỹ năng của freelancer.
+    cache.cover_letter_cache_stats.misses += 1
+    return None
 
-        ## LƯU Ý QUAN TRỌNG:
-        - Không dùng những câu từ sáo rỗng hoặc chung chung như "Tôi là người làm việc chăm chỉ", "Tôi đam mê công việc này".  
-        - Chỉ trình bày những nội dung cụ thể, có liên hệ rõ ràng đến dự án.
-        - Không cần chào hỏi hoặc ký tên cuối thư.
+def cover_letter_cache_metadata(cache_key: str, cached: Optional[Dict[str, Any]], coalesced: bool = False) -> Dict[str, Any]:
+    """Thông tin cache trả về trong metadata của response"""
+    return {
+        "cache": {
+            "hit": cached is not None,
+            "source": cached["source"] if cached else None,
+            "key": cache_key,
+            # True khi dùng chung kết quả với một request giống hệt đang chạy
+            "shared": coalesced,
+            **cache.cover_letter_cache_stats.as_dict()
+        }
+    }
 
-        Bắt đầu viết ngay bây giờ.
-        """
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Định dạng một sự kiện Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-        # Gọi API OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "Bạn là một trợ lý viết cover letter chuyên nghiệp, giúp freelancers tạo cover letter hấp dẫn."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1000
+@app.post("/api/generate-cover-letter/stream", 
+    summary="Generate Cover Letter (Streaming)",
+    description="""
+    Streams a cover letter as Server-Sent Events while OpenAI is generating it.
+    Each `delta` event carries a chunk of text; a final `done` event carries the saved
+    cover letter ID and full content, or an `error` event is sent if generation fails.
+    If the client disconnects, the upstream OpenAI request is cancelled and nothing is saved.
+    """,
+    dependencies=[Depends(enforce_llm_rate_limit)],
+    tags=["Cover Letter"]
+)
+async def generate_cover_letter_stream(request: CoverLetterRequest):
+    async def event_stream():
+        stream = None
+        finished = False
+        parts: List[str] = []
+        try:
+            resolved, profile = await resolve_profile(request)
+            cache_key = cache.cover_letter_cache_key(resolved)
+            cached = None if resolved.force_refresh else await get_cached_cover_letter(cache_key)
+            if cached is not None:
+                finished = True
+                yield format_sse("delta", {"content": cached["cover_letter"]})
+                yield format_sse("done", {
+                    "id": cached["id"],
+                    "cover_letter": cached["cover_letter"],
+                    "metadata": {**cover_letter_cache_metadata(cache_key, cached), **profile_metadata(profile)}
+                })
+                return
+
+            # Giữ slot concurrency trong suốt thời gian stream
+            async with llm.concurrency_slot():
+                started = time.perf_counter()
+                usage = None
+                stream = await llm.create_with_retry(
+                    get_llm_client().chat.completions.create,
+                    model=cache.COVER_LETTER_MODEL,
+                    messages=build_cover_letter_messages(resolved),
+                    temperature=0.7,
+                    max_tokens=1000,
+                    stream=True,
+                    # Chunk cuối chứa số token đã dùng
+                    extra_body={"stream_options": {"include_usage": True}}
+                )
+                async for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield format_sse("delta", {"content": delta})
+                metrics.observe_llm(cache.COVER_LETTER_MODEL, "cover_letter_stream", time.perf_counter() - started, usage)
+
+            # Lưu cover letter hoàn chỉnh vào database khi stream kết thúc
+            cover_letter = "".join(parts).strip()
+            letter_id = await db.save_cover_letter(resolved.job_description, cover_letter, cache_key)
+            cache.cover_letter_cache.set(cache_key, {"id": letter_id, "cover_letter": cover_letter})
+            finished = True
+            yield format_sse("done", {
+                "id": letter_id,
+                "cover_letter": cover_letter,
+                "metadata": {
+                    **cover_letter_cache_metadata(cache_key, None),
+                    "tokens": cover_letter_token_metadata(resolved),
+                    **profile_metadata(profile)
+                }
+            })
+        except ratelimit.RateLimitExceeded as e:
+            # Response đã bắt đầu nên không thể trả về 429, gửi thời gian cần chờ trong sự kiện lỗi
+            yield format_sse("error", {"detail": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            logger.error(f"Error streaming cover letter: {str(e)}", exc_info=True)
+            yield format_sse("error", {"detail": f"Lỗi khi tạo cover letter: {str(e)}"})
+        finally:
+            # Client ngắt kết nối sẽ huỷ generator này, đóng kết nối tới OpenAI để dừng việc sinh token
+            if stream is not None:
+                if not finished:
+                    logger.info("Cover letter stream stopped before completion, closing upstream request")
+                await stream.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/generate-cover-letters/batch", 
+    status_code=status.HTTP_201_CREATED,
+    summary="Generate Cover Letters (Batch)",
+    description="""
+    Generates cover letters for several job postings in one request.
+    Items are generated concurrently (bounded by `BATCH_CONCURRENCY`), identical items share one
+    generation, and cached results are reused unless `force_refresh` is set.
+    Each item reports its own result, so some items may fail while others succeed.
+    New cover letters are saved in a single transaction.
+    Returns 201 when every item succeeds and 200 when some items failed. When every item fails,
+    returns 429 (with `Retry-After`) if all failures were rate limits, otherwise 502.
+    """,
+    response_model=ResponseModel[List[BatchCoverLetterItem]],
+    tags=["Cover Letter"]
+)
+async def generate_cover_letters_batch(batch: BatchCoverLetterRequest, http_request: Request, response: Response):
+    if not batch.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Danh sách cover letter không được để trống"
+        )
+    if len(batch.items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tối đa {MAX_BATCH_SIZE} cover letter cho mỗi batch"
         )
+    # Mỗi phần tử tính như một request
+    await ratelimit.check(rate_limit_key(http_request), cost=len(batch.items))
 
-        # Trích xuất cover letter từ phản hồi
-        cover_letter = response.choices[0].message.content.strip()
-        
-        # Lưu vào database
-        saved_letter = db.save_cover_letter(request.job_description, cover_letter)
-        
+    try:
+        # Các phần tử dùng use_profile đọc chung một snapshot hồ sơ
+        items = [resolved for resolved, _ in await asyncio.gather(*(resolve_profile(item) for item in batch.items))]
+
+        # Gom các request giống nhau để chỉ tạo một lần
+        groups: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            groups.setdefault(cache.cover_letter_cache_key(item), []).append(index)
+
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def generate(cache_key: str, request: CoverLetterRequest) -> Dict[str, Any]:
+            try:
+                cached = None if request.force_refresh else await get_cached_cover_letter(cache_key)
+                if cached is not None:
+                    return {"cover_letter": cached["cover_letter"], "id": cached["id"], "cached": True}
+                async with semaphore:
+                    return {"cover_letter": await request_cover_letter(request), "id": None, "cached": False}
+            except ratelimit.RateLimitExceeded as e:
+                return {"error": str(e), "rate_limited": e}
+            except Exception as e:
+                logger.error(f"Error generating cover letter in batch: {str(e)}", exc_info=True)
+                return {"error": f"Lỗi khi tạo cover letter: {str(e)}"}
+
+        keys = list(groups)
+        outcomes = dict(zip(keys, await asyncio.gather(
+            *(generate(key, items[groups[key][0]]) for key in keys)
+        )))
+
+        # Lưu tất cả cover letter mới trong một transaction
+        new_keys = [key for key in keys if "error" not in outcomes[key] and not outcomes[key]["cached"]]
+        if new_keys:
+            letter_ids = await db.save_cover_letters([
+                (items[groups[key][0]].job_description, outcomes[key]["cover_letter"], key)
+                for key in new_keys
+            ])
+            for key, letter_id in zip(new_keys, letter_ids):
+                outcomes[key]["id"] = letter_id
+                cache.cover_letter_cache.set(key, {"id": letter_id, "cover_letter": outcomes[key]["cover_letter"]})
+
+        results: List[Optional[BatchCoverLetterItem]] = [None] * len(items)
+        for key, indices in groups.items():
+            outcome = outcomes[key]
+            for index in indices:
+                if "error" in outcome:
+                    results[index] = BatchCoverLetterItem(index=index, success=False, error=outcome["error"])
+                else:
+                    results[index] = BatchCoverLetterItem(index=index, success=True, **outcome)
+
+        succeeded = sum(1 for result in results if result.success)
+        if not succeeded:
+            # Không tạo được cover letter nào: báo lỗi như endpoint tạo một cover letter
+            limited = [outcome["rate_limited"] for outcome in outcomes.values() if "rate_limited" in outcome]
+            if len(limited) == len(outcomes):
+                raise max(limited, key=lambda e: e.retry_after)
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=next(outcome["error"] for outcome in outcomes.values() if "rate_limited" not in outcome)
+            )
+        if succeeded < len(results):
+            response.status_code = status.HTTP_200_OK
         return ResponseModel(
-            success=True,
-            message="Tạo cover letter thành công",
-            data=CoverLetterResponse(cover_letter=cover_letter)
+            success=succeeded > 0,
+            message=f"Đã tạo {succeeded}/{len(results)} cover letter",
+            data=results,
+            metadata={
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "generated": len(new_keys),
+                "cache": cache.cover_letter_cache_stats.as_dict()
+            }
         )
-    
     except Exception as e:
+        if isinstance(e, (HTTPException, ratelimit.RateLimitExceeded)):
+            raise e
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Lỗi khi tạo cover letter: {str(e)}"
         )
 
+@app.post("/api/jobs/score", 
+    response_model=ResponseModel[List[JobScoreItem]],
+    summary="Score Job Postings",
+    description="""
+    Scores many job descriptions against the saved profile (latest skills and all experience) without calling
+    OpenAI, so postings can be triaged before generating cover letters. Each posting gets a TF-IDF cosine
+    similarity with the skills and with the experience content, computed locally in NumPy, plus the saved
+    skills it mentions. Results are ranked by `score`; `index` is the position in the request.
+    """,
+    tags=["Jobs"]
+)
+async def score_jobs(request: JobScoreRequest):
+    if not request.job_descriptions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Danh sách mô tả công việc không được để trống"
+        )
+    if len(request.job_descriptions) > matching.MAX_JOB_SCORE_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tối đa {matching.MAX_JOB_SCORE_BATCH} mô tả công việc cho mỗi request"
+        )
+
+    try:
+        started = time.perf_counter()
+        snapshot = await profiles.get_snapshot()
+        index = await profiles.get_index()
+        if not snapshot["freelancer_skills"] and not len(index):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Chưa có thông tin kỹ năng hoặc kinh nghiệm để chấm điểm"
+            )
+
+        # Tính toán bằng NumPy, chạy trong threadpool để không chặn event loop
+        experience_vector = await run_in_threadpool(index.centroid) if len(index) else None
+        results = await run_in_threadpool(
+            matching.score_jobs,
+            request.job_descriptions,
+            snapshot["skill_terms"],
+            snapshot["freelancer_skills"],
+            experience_vector
+        )
+        if request.limit is not None and request.limit > 0:
+            results = results[:request.limit]
+
+        return ResponseModel(
+            success=True,
+            message=f"Đã chấm điểm {len(request.job_descriptions)} mô tả công việc",
+            data=results,
+            metadata={
+                "count": len(request.job_descriptions),
+                "skills_id": snapshot["skills_id"],
+                "experience_snippets": len(index),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        logger.error(f"Error scoring jobs: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Lỗi khi chấm điểm mô tả công việc: {str(e)}"
+        )
+
 @app.post("/api/skills", 
     status_code=status.HTTP_201_CREATED, 
     response_model=ResponseModel[SkillsRead],
@@ -302,13 +911,13 @@ async def generate_cover_letter(request: CoverLetterRequest):
     description="Saves a freelancer's technical and soft skills to the database",
     tags=["Skills"]
 )
-async def save_skills(skills: SkillsCreate, session: Session = Depends(get_session)):
+async def save_skills(skills: SkillsCreate, session: AsyncSession = Depends(get_session)):
     try:
         logger.info(f"Saving skills: {skills}")
         db_skills = Skills.model_validate(skills)
         session.add(db_skills)
-        session.commit()
-        session.refresh(db_skills)
+        await session.commit()
+        await session.refresh(db_skills)
         logger.info(f"Successfully saved skills with ID: {db_skills.id}")
         return ResponseModel(
             success=True,
@@ -325,24 +934,30 @@ async def save_skills(skills: SkillsCreate, session: Session = Depends(get_sessi
 @app.get("/api/skills", 
     response_model=PaginatedResponseModel[List[SkillsRead]],
     summary="Get All Skills",
-    description="Retrieves all saved skills information with pagination",
+    description="""
+    Retrieves all saved skills information with pagination, ordered by ID ascending.
+    Pass `after_id` (the `next_after_id` from the previous page's metadata) for keyset pagination.
+    """,
     tags=["Skills"]
 )
 async def get_skills(
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     offset: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    after_id: Optional[int] = None
 ):
     try:
-        logger.info(f"Fetching skills with offset={offset} and limit={limit}")
+        logger.info(f"Fetching skills with offset={offset}, limit={limit} and after_id={after_id}")
         # Lấy tất cả kỹ năng với phân trang
-        query = select(Skills).offset(offset).limit(limit)
-        skills = session.exec(query).all()
+        query = select(Skills).order_by(Skills.id.asc())
+        if after_id is not None:
+            query = query.where(Skills.id > after_id)
+        query = query.offset(offset).limit(limit)
+        skills = (await session.exec(query)).all()
         logger.info(f"Found {len(skills)} skills")
         
         # Đếm tổng số bản ghi
-        count_query = select(Skills)
-        total = len(session.exec(count_query).all())
+        total = await count_rows(session, Skills)
         logger.info(f"Total skills count: {total}")
         
         return PaginatedResponseModel(
@@ -351,7 +966,8 @@ async def get_skills(
             data=skills,
             total=total,
             offset=offset,
-            limit=limit
+            limit=limit,
+            metadata={"next_after_id": next_cursor(skills, limit)}
         )
     except Exception as e:
         logger.error(f"Error fetching skills: {str(e)}", exc_info=True)
@@ -369,14 +985,14 @@ async def get_skills(
 )
 async def save_experience(
     experience: ExperienceCreate, 
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     try:
         db_experience = Experience.model_validate(experience)
         session.add(db_experience)
-        session.commit()
-        session.refresh(db_experience)
+        await session.commit()
+        await session.refresh(db_experience)
         return ResponseModel(
             success=True,
             message="Lưu kinh nghiệm thành công",
@@ -391,16 +1007,23 @@ async def save_experience(
 @app.get("/api/experience", 
     response_model=PaginatedResponseModel[List[ExperienceRead]],
     summary="Get All Experience",
-    description="Retrieves all saved experience information with pagination, search and sorting",
+    description="""
+    Retrieves all saved experience information with pagination, search and sorting.
+    `search` uses the full-text index: results are ranked by relevance (`sort_by=rank`, the default
+    when searching) and `metadata.snippets` holds highlighted excerpts keyed by experience ID.
+    When sorting by `id`, pass `after_id` (the `next_after_id` from the previous page's metadata)
+    for keyset pagination; `after_id` is ignored for other sort columns.
+    """,
     tags=["Experience"]
 )
 async def get_experience(
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     offset: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
-    sort_by: Optional[str] = "id",
-    sort_order: Optional[str] = "desc"
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = "desc",
+    after_id: Optional[int] = None
 ):
     try:
         # Kiểm tra và điều chỉnh tham số phân trang
@@ -411,20 +1034,54 @@ async def get_experience(
             
         # Xây dựng query cơ bản
         query = select(Experience)
+        conditions = []
+        snippets = None
         
-        # Thêm điều kiện tìm kiếm nếu có
-        if search:
+        # Thêm điều kiện tìm kiếm nếu có: dùng chỉ mục full-text, fallback sang ilike
+        match_query = fulltext.build_match_query(search) if search and fulltext.is_available() else ""
+        if match_query:
+            conditions.append(Experience.id.in_(fulltext.match_ids("experience", match_query)))
+        elif search:
             search = f"%{search}%"
-            query = query.where(
+            conditions.append(
                 (Experience.work_experience.ilike(search)) |
                 (Experience.projects.ilike(search))
             )
             
         # Thêm sắp xếp
-        if sort_by not in ["id", "work_experience", "projects"]:
-            sort_by = "id"
+        sort_columns = ["id", "created_at", "work_experience", "projects"] + (["rank"] if match_query else [])
+        if sort_by not in sort_columns:
+            sort_by = "rank" if match_query else "id"
         if sort_order not in ["asc", "desc"]:
             sort_order = "desc"
+        
+        if sort_by == "rank":
+            experiences, total, snippets = await ranked_search(session, "experience", Experience, match_query, offset, limit)
+            return PaginatedResponseModel(
+                success=True,
+                message="Lấy danh sách kinh nghiệm thành công" if experiences else "Không tìm thấy dữ liệu kinh nghiệm",
+                data=experiences,
+                total=total if experiences else 0,
+                offset=offset,
+                limit=limit,
+                metadata={
+                    "search": search,
+                    "sort_by": sort_by,
+                    "sort_order": sort_order,
+                    "snippets": snippets,
+                    "next_after_id": None
+                }
+            )
+        
+        for condition in conditions:
+            query = query.where(condition)
+        
+        # Keyset pagination chỉ áp dụng khi sắp xếp theo id
+        if after_id is not None and sort_by == "id":
+            if sort_order == "desc":
+                query = query.where(Experience.id < after_id)
+            else:
+                query = query.where(Experience.id > after_id)
             
         sort_column = getattr(Experience, sort_by)
         if sort_order == "desc":
@@ -436,7 +1093,7 @@ async def get_experience(
         query = query.offset(offset).limit(limit)
         
         # Thực thi query
-        experiences = session.exec(query).all()
+        experiences = (await session.exec(query)).all()
         
         if not experiences:
             return PaginatedResponseModel(
@@ -449,13 +1106,10 @@ async def get_experience(
             )
         
         # Đếm tổng số bản ghi
-        count_query = select(Experience)
-        if search:
-            count_query = count_query.where(
-                (Experience.work_experience.ilike(search)) |
-                (Experience.projects.ilike(search))
-            )
-        total = len(session.exec(count_query).all())
+        total = await count_rows(session, Experience, *conditions)
+        
+        if match_query:
+            snippets = await fulltext.snippets(session, "experience", match_query, [e.id for e in experiences])
         
         return PaginatedResponseModel(
             success=True,
@@ -467,11 +1121,13 @@ async def get_experience(
             metadata={
                 "search": search,
                 "sort_by": sort_by,
-                "sort_order": sort_order
+                "sort_order": sort_order,
+                "snippets": snippets,
+                "next_after_id": next_cursor(experiences, limit) if sort_by == "id" else None
             }
         )
     except Exception as e:
-        print('e', e)
+        logger.error(f"Error listing experience: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Lỗi khi lấy danh sách kinh nghiệm: {str(e)}"
@@ -483,10 +1139,10 @@ async def get_experience(
     description="Deletes a specific experience entry by ID",
     tags=["Experience"]
 )
-async def delete_experience(experience_id: int, session: Session = Depends(get_session)):
+async def delete_experience(experience_id: int, session: AsyncSession = Depends(get_session)):
     try:
         # Tìm experience theo ID
-        experience = session.get(Experience, experience_id)
+        experience = await session.get(Experience, experience_id)
         if not experience:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -494,8 +1150,8 @@ async def delete_experience(experience_id: int, session: Session = Depends(get_s
             )
         
         # Xóa experience
-        session.delete(experience)
-        session.commit()
+        await session.delete(experience)
+        await session.commit()
         
         return ResponseModel(
             success=True,
@@ -514,22 +1170,48 @@ async def delete_experience(experience_id: int, session: Session = Depends(get_s
     description="""
     Retrieves a paginated list of previously generated cover letters.
     Results are ordered by most recent first.
+    Pass `after_id` (the `next_after_id` from the previous page's metadata) for keyset pagination.
+    With `search`, results come from the full-text index ranked by relevance, and
+    `metadata.snippets` holds highlighted excerpts keyed by cover letter ID.
     """,
     tags=["Cover Letter"]
 )
 async def get_cover_letters(
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     offset: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    search: Optional[str] = None
 ):
     try:
+        # Tìm kiếm full-text, xếp hạng theo độ liên quan
+        match_query = fulltext.build_match_query(search) if search and fulltext.is_available() else ""
+        if match_query:
+            results, total, snippets = await ranked_search(session, "coverletter", CoverLetter, match_query, offset, limit)
+            return PaginatedResponseModel(
+                success=True,
+                message=f"Lấy danh sách cover letter thành công",
+                data=results,
+                total=total,
+                offset=offset,
+                limit=limit,
+                metadata={
+                    "page": offset // limit + 1,
+                    "search": search,
+                    "snippets": snippets,
+                    "next_after_id": None
+                }
+            )
+        
         # Lấy tổng số bản ghi
-        total_count = session.exec(select(CoverLetter)).all()
-        total = len(total_count)
+        total = await count_rows(session, CoverLetter)
         
         # Truy vấn với phân trang
-        statement = select(CoverLetter).order_by(CoverLetter.id.desc()).offset(offset).limit(limit)
-        results = session.exec(statement).all()
+        statement = select(CoverLetter).order_by(CoverLetter.id.desc())
+        if after_id is not None:
+            statement = statement.where(CoverLetter.id < after_id)
+        statement = statement.offset(offset).limit(limit)
+        results = (await session.exec(statement)).all()
         
         return PaginatedResponseModel(
             success=True,
@@ -538,7 +1220,10 @@ async def get_cover_letters(
             total=total,
             offset=offset,
             limit=limit,
-            metadata={"page": offset // limit + 1}
+            metadata={
+                "page": offset // limit + 1 if after_id is None else None,
+                "next_after_id": next_cursor(results, limit)
+            }
         )
     except Exception as e:
         raise HTTPException(
@@ -552,12 +1237,17 @@ async def get_cover_letters(
     description="""
     Uploads a PDF CV file and extracts information such as skills, experience, and education.
     The extracted information is saved to the database and returned in the response.
+    With `background=true`, the CV is queued for processing and the response (202) only contains
+    the job ID; poll `/api/jobs/{job_id}` for status, progress and the extracted information.
     """,
+    dependencies=[Depends(enforce_llm_rate_limit)],
     tags=["CV Processing"]
 )
 async def upload_cv(
+    response: Response,
     cv_file: Optional[UploadFile] = File(None, description="PDF file containing the freelancer's CV"),
-    session: Session = Depends(get_session)
+    background: bool = False,
+    session: AsyncSession = Depends(get_session)
 ):
     try:
         # Check if any file was provided
@@ -568,58 +1258,129 @@ async def upload_cv(
             )
             
         # Kiểm tra định dạng file
-        print('filename:', cv_file.filename)
         if not cv_file.filename.endswith('.pdf'):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Chỉ chấp nhận file PDF"
             )
         
-        # Lưu file tạm thời
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            temp_file.write(await cv_file.read())
-            temp_file_path = temp_file.name
+        # Kiểm tra kích thước file (upload không có Content-Length)
+        if cv_file.size is not None and cv_file.size > pdf_parser.MAX_CV_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File CV vượt quá giới hạn {pdf_parser.MAX_CV_FILE_SIZE} bytes"
+            )
+        
+        # Chế độ chạy nền: lưu job và trả về id ngay
+        if background:
+            job_id = await jobs.submit(cv_file.filename, await cv_file.read())
+            response.status_code = status.HTTP_202_ACCEPTED
+            return ResponseModel(
+                success=True,
+                message="Đã nhận CV, đang xử lý",
+                data={"job_id": job_id, "status": "pending"}
+            )
+        
+        # CV đã được upload trước đó (cùng nội dung file): trả về kết quả đã lưu, không đọc lại PDF
+        file_hash = await run_in_threadpool(cache.file_sha256, cv_file.file)
+        cached = await db.get_cv_extraction(None, file_hash, cache.CV_CACHE_TTL)
+        if cached is not None and cached["rows_exist"]:
+            return ResponseModel(
+                success=True,
+                message="Trích xuất thông tin từ CV thành công",
+                data=cached["result"],
+                metadata={"cache": {"hit": True, "level": "file"}}
+            )
         
-        # Đọc nội dung file PDF
+        # Đọc nội dung file PDF trực tiếp từ buffer của upload, trong threadpool để không chặn event loop
         try:
-            pdf_reader = PyPDF2.PdfReader(temp_file_path)
-            text_content = ""
-            for page in pdf_reader.pages:
-                text_content += page.extract_text()
+            started = time.perf_counter()
+            text_content = await run_in_threadpool(
+                pdf_parser.extract_pdf_text_from_stream, cv_file.file, pdf_parser.MAX_CV_PAGES
+            )
+            metrics.observe_pdf_parse(time.perf_counter() - started)
+        except pdf_parser.PDFLimitError as e:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=str(e)
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Lỗi khi đọc file PDF: {str(e)}"
             )
-        finally:
-            # Xóa file tạm
-            os.unlink(temp_file_path)
         
         # Trích xuất thông tin từ CV
-        extracted_info = extract_info_from_cv(text_content, session)
+        extracted_info, tokens = await extract_info_from_cv(text_content, session, file_hash)
         
         return ResponseModel(
             success=True,
             message="Trích xuất thông tin từ CV thành công",
-            data=extracted_info
+            data=extracted_info,
+            # Chỉ có khi đã gửi CV tới OpenAI (không có khi dùng kết quả đã cache hoặc trích xuất tại local)
+            metadata={"tokens": tokens} if tokens is not None else None
         )
     
     except Exception as e:
-        if isinstance(e, HTTPException):
+        if isinstance(e, (HTTPException, ratelimit.RateLimitExceeded)):
             raise e
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Lỗi khi xử lý CV: {str(e)}"
         )
 
-def extract_info_from_cv(text_content: str, session: Session):
+@app.get("/api/jobs/{job_id}", 
+    response_model=ResponseModel[CVJobRead],
+    summary="Get CV Job Status",
+    description="Returns the status, progress and (when completed) the extracted information of a background CV job",
+    tags=["CV Processing"]
+)
+async def get_cv_job(job_id: str):
+    job = await db.get_cv_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Không tìm thấy job với ID {job_id}"
+        )
+    return ResponseModel(
+        success=True,
+        message="Lấy trạng thái job thành công",
+        data=job
+    )
+
+async def process_cv_text(text_content: str, file_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Trích xuất thông tin từ nội dung CV cho job chạy nền"""
+    async with async_session() as session:
+        extracted_info, _ = await extract_info_from_cv(text_content, session, file_hash)
+        return extracted_info
+
+async def request_cv_extraction(text_content: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     """
-    Trích xuất thông tin từ nội dung CV
+    Trích xuất thông tin từ nội dung CV dưới dạng JSON. CV dài được chia thành nhiều đoạn,
+    mỗi đoạn gọi OpenAI một lần và kết quả được gộp lại tại local.
+    Các dòng liệt kê kỹ năng nhận diện được bằng từ điển không được gửi đi, kỹ năng được điền sẵn vào kết quả.
+    Trả về (kết quả, thông tin token của nội dung đã gửi)
     """
-    # Sử dụng OpenAI để phân tích CV
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
+    analysis = cv_extractor.analyze(text_content) if cv_extractor.CV_LOCAL_PREFILL else None
+    prompt_text = cv_extractor.llm_text(text_content, analysis) if analysis is not None else text_content
+    prepared = prompts.prepare_cv_text(prompt_text)
+    if prompt_text is not text_content:
+        prepared["original_tokens"] = prompts.count_tokens(text_content)
+    tokens = prompts.cv_token_report(prepared)
+    if len(prepared["chunks"]) == 1:
+        result = await request_cv_chunk_extraction(prepared["chunks"][0])
+    else:
+        results = await asyncio.gather(*(request_cv_chunk_extraction(chunk) for chunk in prepared["chunks"]))
+        result = prompts.merge_cv_extractions(list(results))
+    return (cv_extractor.merge_skills(result, analysis) if analysis is not None else result), tokens
+
+async def request_cv_chunk_extraction(text_content: str) -> Dict[str, Any]:
+    """Gọi OpenAI để trích xuất thông tin từ một đoạn nội dung CV"""
+    async with llm.concurrency_slot():
+        started = time.perf_counter()
+        response = await llm.create_with_retry(
+            get_llm_client().chat.completions.create,
+            model=cache.CV_EXTRACTION_MODEL,
             messages=[
                 {"role": "system", "content": "Bạn là một trợ lý phân tích CV chuyên nghiệp. Hãy trích xuất thông tin quan trọng từ CV."},
                 {"role": "user", "content": f"""
@@ -638,12 +1399,36 @@ def extract_info_from_cv(text_content: str, session: Session):
             max_tokens=1000,
             response_format={"type": "json_object"}
         )
-        
-        # Phân tích kết quả
-        result = response.choices[0].message.content.strip()
-        
-        # Parse JSON result
-        extracted_data = json.loads(result)
+        metrics.observe_llm(cache.CV_EXTRACTION_MODEL, "cv_extraction", time.perf_counter() - started, getattr(response, "usage", None))
+
+    # Phân tích kết quả
+    result = response.choices[0].message.content.strip()
+    return json.loads(result)
+
+async def extract_info_from_cv(
+    text_content: str, session: AsyncSession, file_hash: Optional[str] = None
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Trích xuất thông tin từ nội dung CV. Kết quả từ OpenAI được cache theo nội dung văn bản
+    (và hash file nếu có), upload lại cùng CV không gọi lại LLM và không tạo bản ghi trùng.
+    Trả về (kết quả, thông tin token); thông tin token là None khi không gọi OpenAI
+    """
+    text_hash = cache.cv_text_key(text_content)
+    cached = await db.get_cv_extraction(text_hash, file_hash, cache.CV_CACHE_TTL)
+    if cached is not None and cached["rows_exist"]:
+        return cached["result"], None
+
+    # Sử dụng OpenAI để phân tích CV
+    try:
+        tokens = None
+        if cached is not None:
+            # Bản ghi Skills/Experience cũ đã bị xoá: tạo lại từ kết quả đã cache, không gọi LLM
+            extracted_data = cached["result"]
+        else:
+            # Các CV có cùng nội dung đang được xử lý đồng thời dùng chung một lời gọi LLM
+            (extracted_data, tokens), _ = await cache.cv_extraction_flight.do(
+                text_hash, lambda: request_cv_extraction(text_content)
+            )
         
         # Convert any list data to JSON strings before saving to database
         projects_data = extracted_data.get("projects", "")
@@ -664,40 +1449,48 @@ def extract_info_from_cv(text_content: str, session: Session):
         )
         session.add(db_experience)
         
-        session.commit()
-        session.refresh(db_skills)
-        session.refresh(db_experience)
+        await session.commit()
+        await session.refresh(db_skills)
+        await session.refresh(db_experience)
         
-        return extracted_data
+        try:
+            await db.save_cv_extraction(
+                text_hash, file_hash, text_content, extracted_data,
+                db_skills.id, db_experience.id,
+                cache.CV_CACHE_MAX_ENTRIES, cache.CV_CACHE_MAX_BYTES, cache.CV_CACHE_TTL
+            )
+        except Exception as e:
+            logger.warning(f"Could not cache CV extraction: {str(e)}")
+        
+        return extracted_data, tokens
     
+    except ratelimit.RateLimitExceeded:
+        # Quá tải tạm thời: trả về 429 để client thử lại thay vì lưu kết quả trích xuất local kém chính xác hơn
+        raise
     except Exception as e:
-        # Nếu không thể sử dụng OpenAI, thử phương pháp regex đơn giản
-        skills = re.findall(r'Skills:(.+?)(?:\n\n|\Z)', text_content, re.DOTALL)
-        experience = re.findall(r'Experience:(.+?)(?:\n\n|\Z)', text_content, re.DOTALL)
-        education = re.findall(r'Education:(.+?)(?:\n\n|\Z)', text_content, re.DOTALL)
-        
-        tech_skills = ", ".join(skills).strip() if skills else ""
-        work_experience = ", ".join(experience).strip() if experience else ""
+        # Nếu không thể sử dụng OpenAI, trích xuất tại local bằng từ điển kỹ năng và tiêu đề các mục của CV
+        logger.warning(f"CV extraction with OpenAI failed, using local extractor: {str(e)}")
+        extracted_data = cv_extractor.extract(text_content)
         
         # Tạo và lưu Skills
-        db_skills = Skills(tech_skills=tech_skills, soft_skills="")
+        db_skills = Skills(
+            tech_skills=json.dumps(extracted_data["tech_skills"]),
+            soft_skills=json.dumps(extracted_data["soft_skills"])
+        )
         session.add(db_skills)
         
         # Tạo và lưu Experience
-        db_experience = Experience(work_experience=work_experience, projects="")
+        db_experience = Experience(
+            work_experience=extracted_data["work_experience"],
+            projects=json.dumps(extracted_data["projects"])
+        )
         session.add(db_experience)
         
-        session.commit()
+        await session.commit()
         
-        extracted_data = {
-            "tech_skills": tech_skills,
-            "soft_skills": "",
-            "work_experience": work_experience,
-            "projects": "",
-            "education": ", ".join(education).strip() if education else ""
-        }
-        
-        return extracted_data
+        return extracted_data, None
+
+jobs.configure(process_cv_text)
 
 @app.put("/api/experience/{experience_id}", 
     status_code=status.HTTP_200_OK,
@@ -709,11 +1502,11 @@ def extract_info_from_cv(text_content: str, session: Session):
 async def update_experience(
     experience_id: int,
     experience: ExperienceCreate,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     try:
         # Tìm experience theo ID
-        db_experience = session.get(Experience, experience_id)
+        db_experience = await session.get(Experience, experience_id)
         if not db_experience:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -726,8 +1519,8 @@ async def update_experience(
         db_experience.updated_at = datetime.now()
         
         session.add(db_experience)
-        session.commit()
-        session.refresh(db_experience)
+        await session.commit()
+        await session.refresh(db_experience)
         
         return ResponseModel(
             success=True,
@@ -741,10 +1534,10 @@ async def update_experience(
         )
 
 @app.post("/api/register", response_model=ResponseModel[UserRead])
-async def register(user: UserCreate, session: Session = Depends(get_session)):
+async def register(user: UserCreate, session: AsyncSession = Depends(get_session)):
     try:
         # Kiểm tra username đã tồn tại
-        db_user = session.exec(select(User).where(User.username == user.username)).first()
+        db_user = (await session.exec(select(User).where(User.username == user.username))).first()
         if db_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -752,7 +1545,7 @@ async def register(user: UserCreate, session: Session = Depends(get_session)):
             )
         
         # Kiểm tra email đã tồn tại
-        db_user = session.exec(select(User).where(User.email == user.email)).first()
+        db_user = (await session.exec(select(User).where(User.email == user.email))).first()
         if db_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -760,15 +1553,15 @@ async def register(user: UserCreate, session: Session = Depends(get_session)):
             )
         
         # Tạo user mới
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await passwords.hash_password(user.password)
         db_user = User(
             email=user.email,
             username=user.username,
             hashed_password=hashed_password
         )
         session.add(db_user)
-        session.commit()
-        session.refresh(db_user)
+        await session.commit()
+        await session.refresh(db_user)
         
         return ResponseModel(
             success=True,
@@ -776,6 +1569,8 @@ async def register(user: UserCreate, session: Session = Depends(get_session)):
             data=db_user
         )
     except Exception as e:
+        if isinstance(e, (HTTPException, passwords.PasswordWorkersBusy)):
+            raise e
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Lỗi khi đăng ký: {str(e)}"
@@ -784,9 +1579,9 @@ async def register(user: UserCreate, session: Session = Depends(get_session)):
 @app.post("/api/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    user = authenticate_user(session, form_data.username, form_data.password)
+    user = await authenticate_user(session, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -794,8 +1589,11 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    token_data = {"sub": user.username}
+    if AUTH_EMBED_USER_CLAIMS:
+        token_data.update(user_claims(user))
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=token_data, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
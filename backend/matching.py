@@ -0,0 +1,83 @@
+import os
+from typing import Any, Dict, List, Optional
+import vectors
+
+# Trọng số của điểm kỹ năng trong điểm tổng; phần còn lại là điểm kinh nghiệm
+JOB_SCORE_SKILL_WEIGHT = float(os.getenv("JOB_SCORE_SKILL_WEIGHT", "0.6"))
+# Số mô tả công việc tối đa trong một request chấm điểm
+MAX_JOB_SCORE_BATCH = int(os.getenv("MAX_JOB_SCORE_BATCH", "2000"))
+
+
+def skill_term_matrix(token_lists: List[List[str]], terms: List[str]):
+    """
+    Ma trận (số tin tuyển dụng x số kỹ năng): True khi tin tuyển dụng chứa mọi từ của kỹ năng.
+    Tính bằng một phép nhân ma trận giữa ma trận có/không của các từ trong tin và ma trận từ của kỹ năng.
+    """
+    import numpy as np
+
+    term_tokens = [set(vectors.tokenize(term)) for term in terms]
+    vocabulary: Dict[str, int] = {}
+    for tokens in term_tokens:
+        for token in tokens:
+            vocabulary.setdefault(token, len(vocabulary))
+    if not vocabulary:
+        return np.zeros((len(token_lists), len(terms)), dtype=bool)
+
+    present = np.zeros((len(token_lists), len(vocabulary)), dtype=np.float32)
+    for row, tokens in enumerate(token_lists):
+        columns = [vocabulary[token] for token in vocabulary.keys() & set(tokens)]
+        present[row, columns] = 1
+    required = np.zeros((len(terms), len(vocabulary)), dtype=np.float32)
+    for row, tokens in enumerate(term_tokens):
+        required[row, [vocabulary[token] for token in tokens]] = 1
+    sizes = required.sum(axis=1)
+    return (present @ required.T >= sizes) & (sizes > 0)
+
+
+def score_jobs(
+    job_descriptions: List[str],
+    terms: List[str],
+    skills_text: str,
+    experience_vector: Optional[Any] = None
+) -> List[Dict[str, Any]]:
+    """
+    Chấm điểm mức phù hợp của các tin tuyển dụng với hồ sơ: cosine TF-IDF (hashing) giữa mỗi tin với
+    kỹ năng và với nội dung kinh nghiệm (vector đại diện của chỉ mục), IDF tính trên chính tập tin tuyển dụng.
+    Trả về kết quả sắp xếp theo điểm giảm dần.
+    """
+    import numpy as np
+
+    token_lists = [vectors.tokenize(text) for text in job_descriptions]
+    jobs = vectors.vectorize_tokens(token_lists)
+    # Từ xuất hiện trong hầu hết các tin (mô tả chung chung) có trọng số thấp
+    df = (jobs != 0).sum(axis=0)
+    idf = (np.log((1 + len(jobs)) / (1 + df)) + 1).astype(np.float32)
+
+    profile = np.zeros((2, jobs.shape[1]), dtype=np.float32)
+    profile[0] = vectors.vectorize_many([skills_text])[0]
+    if experience_vector is not None:
+        profile[1] = experience_vector
+
+    def normalized(matrix):
+        weighted = matrix * idf
+        return weighted / np.maximum(np.linalg.norm(weighted, axis=1, keepdims=True), 1e-12)
+
+    # Dấu của hashing có thể cho cosine âm, coi như không liên quan
+    similarity = np.clip(normalized(jobs) @ normalized(profile).T, 0, 1)
+    # Hồ sơ chỉ có kỹ năng hoặc chỉ có kinh nghiệm: điểm tổng là điểm của phần đang có
+    skill_weight = JOB_SCORE_SKILL_WEIGHT if experience_vector is not None else 1.0
+    if not profile[0].any():
+        skill_weight = 0.0
+    scores = skill_weight * similarity[:, 0] + (1 - skill_weight) * similarity[:, 1]
+    matched = skill_term_matrix(token_lists, terms)
+
+    return [
+        {
+            "index": int(row),
+            "score": round(float(scores[row]), 4),
+            "skill_score": round(float(similarity[row, 0]), 4),
+            "experience_score": round(float(similarity[row, 1]), 4),
+            "matched_skills": [terms[column] for column in np.flatnonzero(matched[row])],
+        }
+        for row in np.argsort(-scores, kind="stable")
+    ]
@@ -0,0 +1,191 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Bật/tắt thu thập metrics và header Server-Timing
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Giá (USD cho 1000 token) theo model: (prompt, completion)
+LLM_PRICES_PER_1K: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+class Counter:
+    """Counter theo nhãn, định dạng Prometheus"""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Histogram theo nhãn với các bucket cố định, định dạng Prometheus"""
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = HTTP_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # nhãn -> (số lượng theo bucket, tổng, số lần)
+        self._values: Dict[Labels, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            if index < len(counts):
+                counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', str(bound)))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+http_request_duration = Histogram("http_request_duration_seconds", "Thời gian xử lý request theo route")
+db_query_duration = Histogram("db_query_duration_seconds", "Thời gian thực thi câu SQL", (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5))
+db_queries_per_request = Histogram("db_queries_per_request", "Số câu SQL trong mỗi request", (0, 1, 2, 3, 5, 10, 20, 50, 100))
+llm_request_duration = Histogram("llm_request_duration_seconds", "Thời gian gọi LLM", LLM_BUCKETS)
+llm_tokens = Counter("llm_tokens_total", "Số token LLM đã dùng")
+llm_cost = Counter("llm_cost_usd_total", "Chi phí LLM ước tính (USD)")
+pdf_parse_duration = Histogram("pdf_parse_duration_seconds", "Thời gian đọc nội dung file PDF", (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+rate_limited = Counter("rate_limited_total", "Số request bị từ chối do giới hạn tần suất")
+llm_retries = Counter("llm_retries_total", "Số lần gọi lại LLM sau khi OpenAI trả về 429")
+
+REGISTRY = [
+    http_request_duration, db_query_duration, db_queries_per_request, llm_request_duration,
+    llm_tokens, llm_cost, pdf_parse_duration, rate_limited, llm_retries
+]
+
+
+class RequestTimings:
+    """Thời gian của các thành phần trong một request, dùng cho header Server-Timing"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.durations: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+            if name == "db":
+                self.db_queries += 1
+
+    def server_timing(self) -> str:
+        parts = []
+        for name, seconds in self.durations.items():
+            description = f';desc="{self.db_queries} queries"' if name == "db" else ""
+            parts.append(f"{name};dur={seconds * 1000:.1f}{description}")
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# Timings của request hiện tại; được sao chép sang threadpool cùng context
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+def _record(name: str, seconds: float) -> None:
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+def observe_db_query(seconds: float) -> None:
+    db_query_duration.observe(seconds)
+    _record("db", seconds)
+
+
+def observe_llm(model: str, operation: str, seconds: float, usage=None) -> None:
+    """Ghi thời gian, số token và chi phí của một lời gọi LLM (usage lấy từ phản hồi OpenAI)"""
+    llm_request_duration.observe(seconds, model=model, operation=operation)
+    _record("llm", seconds)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    llm_tokens.inc(prompt_tokens, model=model, type="prompt")
+    llm_tokens.inc(completion_tokens, model=model, type="completion")
+    prompt_price, completion_price = LLM_PRICES_PER_1K.get(model, (0.0, 0.0))
+    llm_cost.inc((prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000, model=model)
+
+
+def observe_pdf_parse(seconds: float) -> None:
+    pdf_parse_duration.observe(seconds)
+    _record("pdf", seconds)
+
+
+def instrument_engine(engine) -> None:
+    """Đo số lượng và thời gian các câu SQL qua event của SQLAlchemy"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        observe_db_query(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        stack = context.connection.info.get("query_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+def render() -> str:
+    """Toàn bộ metrics ở định dạng text của Prometheus"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,143 @@
+import sys
+import logging
+import argparse
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import Connection, inspect, text
+from sqlmodel import SQLModel
+from models import CVExtraction, CVFile, engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+
+def _column_names(connection: Connection, table: str) -> List[str]:
+    return [column["name"] for column in inspect(connection).get_columns(table)]
+
+
+def _create_index(connection: Connection, name: str, table: str, column: str, unique: bool = False) -> None:
+    unique_sql = "UNIQUE " if unique else ""
+    connection.execute(text(f'CREATE {unique_sql}INDEX IF NOT EXISTS "{name}" ON "{table}" ("{column}")'))
+
+
+def _ensure_unique(connection: Connection, table: str, column: str) -> None:
+    """Báo lỗi rõ ràng nếu dữ liệu hiện có bị trùng, thay vì để CREATE UNIQUE INDEX thất bại"""
+    duplicates = connection.execute(text(
+        f'SELECT "{column}", COUNT(*) FROM "{table}" GROUP BY "{column}" HAVING COUNT(*) > 1'
+    )).all()
+    if duplicates:
+        values = ", ".join(str(row[0]) for row in duplicates)
+        raise RuntimeError(f"Không thể tạo unique index trên {table}.{column}, giá trị bị trùng: {values}")
+
+
+def migration_001_initial_schema(connection: Connection) -> None:
+    """Tạo các bảng chưa tồn tại"""
+    SQLModel.metadata.create_all(connection)
+
+
+def migration_002_cover_letter_request_hash(connection: Connection) -> None:
+    """Thêm cột request_hash (khoá cache) cho bảng coverletter"""
+    if "request_hash" not in _column_names(connection, "coverletter"):
+        connection.execute(text('ALTER TABLE "coverletter" ADD COLUMN "request_hash" VARCHAR'))
+    _create_index(connection, "ix_coverletter_request_hash", "coverletter", "request_hash")
+
+
+def migration_003_hot_column_indexes(connection: Connection) -> None:
+    """Unique index cho username/email và index created_at cho các bảng danh sách"""
+    for column in ["username", "email"]:
+        _ensure_unique(connection, "user", column)
+        _create_index(connection, f"ix_user_{column}", "user", column, unique=True)
+    for table in ["skills", "experience", "coverletter"]:
+        _create_index(connection, f"ix_{table}_created_at", table, "created_at")
+
+
+def migration_004_cv_extraction_cache(connection: Connection) -> None:
+    """Bảng cache kết quả trích xuất CV theo hash file và hash văn bản"""
+    SQLModel.metadata.create_all(connection, tables=[CVExtraction.__table__, CVFile.__table__])
+
+
+# Danh sách migration theo thứ tự; chỉ được thêm mới vào cuối, không sửa migration đã phát hành
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "initial schema", migration_001_initial_schema),
+    (2, "cover letter request hash", migration_002_cover_letter_request_hash),
+    (3, "indexes for hot query columns", migration_003_hot_column_indexes),
+    (4, "cv extraction cache", migration_004_cv_extraction_cache),
+]
+
+
+def _ensure_migrations_table(connection: Connection) -> None:
+    connection.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    """))
+
+
+def applied_versions() -> Dict[int, str]:
+    """Các migration đã chạy trên database hiện tại"""
+    with engine.begin() as connection:
+        _ensure_migrations_table(connection)
+        rows = connection.execute(text(f"SELECT version, applied_at FROM {MIGRATIONS_TABLE}")).all()
+        return {row[0]: str(row[1]) for row in rows}
+
+
+def upgrade() -> List[int]:
+    """Chạy các migration chưa được áp dụng, mỗi migration trong một transaction riêng"""
+    applied = applied_versions()
+    executed = []
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(
+                text(f"INSERT INTO {MIGRATIONS_TABLE} (version, description, applied_at) VALUES (:version, :description, :applied_at)"),
+                {"version": version, "description": description, "applied_at": datetime.now()}
+            )
+        logger.info(f"Applied migration {version:03d}: {description}")
+        executed.append(version)
+    return executed
+
+
+def missing_indexes() -> List[str]:
+    """So sánh index khai báo trong models với index thực tế trong database"""
+    inspector = inspect(engine)
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            missing.extend(index.name for index in table.indexes)
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index.name for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def check_indexes() -> List[str]:
+    """Ghi cảnh báo cho các index còn thiếu (chạy khi khởi động)"""
+    missing = missing_indexes()
+    if missing:
+        logger.warning(f"Missing database indexes: {', '.join(missing)}. Run `python migrations.py upgrade`.")
+    return missing
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Quản lý migration của database")
+    parser.add_argument("command", choices=["upgrade", "status", "check"], help="upgrade: chạy migration; status: liệt kê migration; check: kiểm tra index")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        executed = upgrade()
+        print(f"Đã chạy {len(executed)} migration" if executed else "Database đã ở phiên bản mới nhất")
+    elif args.command == "status":
+        applied = applied_versions()
+        for version, description, _ in MIGRATIONS:
+            state = f"applied {applied[version]}" if version in applied else "pending"
+            print(f"{version:03d} {description}: {state}")
+    else:
+        missing = check_indexes()
+        print("Thiếu index: " + ", ".join(missing) if missing else "Đầy đủ index")
+        sys.exit(1 if missing else 0)
@@ -1,6 +1,15 @@
-from typing import Optional, List, Union, Any
+from typing import Optional, List, Union, Any, Dict
 from datetime import datetime
+import os
+import uuid
+import asyncio
 from sqlmodel import Field, SQLModel, Relationship, create_engine, Session
+from sqlalchemy import Engine, event
+from sqlalchemy.util import await_only
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 import json
 from pydantic import EmailStr
 
@@ -12,7 +21,7 @@ class SkillsBase(SQLModel):
 
 class Skills(SkillsBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    created_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=datetime.now, index=True)
     updated_at: datetime = Field(default_factory=datetime.now)
 
 
@@ -43,7 +52,7 @@ class ExperienceRead(SQLModel):
 
 class Experience(ExperienceBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    created_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=datetime.now, index=True)
     updated_at: datetime = Field(default_factory=datetime.now)
 
 
@@ -58,7 +67,9 @@ class CoverLetterBase(SQLModel):
 
 class CoverLetter(CoverLetterBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    created_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=datetime.now, index=True)
+    # Hash của request đã chuẩn hoá, dùng làm khoá cache cho cover letter
+    request_hash: Optional[str] = Field(default=None, index=True)
 
 
 class CoverLetterCreate(CoverLetterBase):
@@ -71,8 +82,8 @@ class CoverLetterRead(CoverLetterBase):
 
 
 class UserBase(SQLModel):
-    email: EmailStr
-    username: str
+    email: EmailStr = Field(index=True, unique=True)
+    username: str = Field(index=True, unique=True)
     hashed_password: str
     is_active: bool = True
     is_superuser: bool = False
@@ -99,15 +110,266 @@ class UserRead(SQLModel):
     updated_at: datetime
 
 
-# Thiết lập kết nối database
-DATABASE_URL = "sqlite:///data/freelancer.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+class CVJob(SQLModel, table=True):
+    """Job xử lý CV chạy nền, lưu trong database để không mất khi khởi động lại"""
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex, primary_key=True)
+    status: str = Field(default="pending", index=True)  # pending | processing | completed | failed
+    progress: int = 0
+    stage: str = "queued"
+    filename: str = ""
+    # Nội dung file PDF, được xoá sau khi job hoàn thành
+    file_data: Optional[bytes] = None
+    # Kết quả trích xuất dạng JSON
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+
+class CVJobRead(SQLModel):
+    id: str
+    status: str
+    progress: int
+    stage: str
+    filename: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class CVExtraction(SQLModel, table=True):
+    """Cache kết quả trích xuất CV theo hash nội dung văn bản đã chuẩn hoá"""
+    text_hash: str = Field(primary_key=True)
+    text_content: str
+    # Kết quả trích xuất dạng JSON
+    result: str
+    # Bản ghi Skills/Experience đã tạo từ kết quả này, để upload lại không tạo bản ghi trùng
+    skills_id: Optional[int] = None
+    experience_id: Optional[int] = None
+    size_bytes: int = 0
+    hits: int = 0
+    created_at: datetime = Field(default_factory=datetime.now)
+    last_used_at: datetime = Field(default_factory=datetime.now, index=True)
+
+
+class CVFile(SQLModel, table=True):
+    """Ánh xạ hash nội dung file PDF sang hash văn bản đã trích xuất"""
+    file_hash: str = Field(primary_key=True)
+    text_hash: str = Field(index=True)
+    created_at: datetime = Field(default_factory=datetime.now)
+
+
+# Thiết lập kết nối database (cấu hình qua biến môi trường)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/freelancer.db")
+# Chuỗi kết nối bất đồng bộ cho các route; mặc định suy ra từ DATABASE_URL (xem async_database_url)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# PRAGMA áp dụng cho mỗi kết nối SQLite mới
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    # Thời gian (ms) chờ khi database đang bị khoá ghi thay vì báo lỗi "database is locked" ngay
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),
+    # Giá trị âm tính theo KiB (mặc định 64 MiB)
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+# Cho các session bất đồng bộ commit lần lượt với SQLite (xem SerializedWriteSession)
+SQLITE_SERIALIZE_WRITES = os.getenv("SQLITE_SERIALIZE_WRITES", "true").lower() in ("1", "true", "yes")
+
+
+def create_db_engine(
+    url: str = DATABASE_URL,
+    pragmas: Optional[Dict[str, Any]] = None,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW
+) -> Engine:
+    """
+    Tạo engine dùng chung cho ứng dụng. Với SQLite: bật WAL và các PRAGMA trong
+    SQLITE_PRAGMAS (có thể ghi đè qua `pragmas`) cho mỗi kết nối, dùng pool cho truy cập đa luồng.
+    """
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=True
+        )
+
+    settings = {**SQLITE_PRAGMAS, **(pragmas or {})}
+    database = make_url(url).database
+    if not database or database == ":memory:":
+        # Database trong bộ nhớ chỉ tồn tại trên một kết nối
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        directory = os.path.dirname(database)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        engine = create_engine(
+            url,
+            connect_args={
+                "check_same_thread": False,
+                "timeout": settings["busy_timeout"] / 1000
+            },
+            poolclass=QueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=DB_POOL_TIMEOUT
+        )
+
+    set_sqlite_pragmas(engine, settings)
+    return engine
+
+
+def set_sqlite_pragmas(engine: Engine, settings: Dict[str, Any]) -> None:
+    """Áp dụng các PRAGMA cho mỗi kết nối SQLite mới của engine"""
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in settings.items():
+            if value is not None:
+                cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+# Driver bất đồng bộ tương ứng với từng loại database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    """Đổi driver đồng bộ trong chuỗi kết nối sang driver bất đồng bộ (sqlite -> aiosqlite, postgresql -> asyncpg)"""
+    scheme, separator, rest = url.partition("://")
+    backend = scheme.split("+")[0]
+    if backend not in ASYNC_DRIVERS or scheme in ASYNC_DRIVERS.values():
+        return url
+    return f"{ASYNC_DRIVERS[backend]}{separator}{rest}"
+
+
+def create_async_db_engine(
+    url: Optional[str] = None,
+    pragmas: Optional[Dict[str, Any]] = None,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW
+) -> AsyncEngine:
+    """Tạo engine bất đồng bộ cho các route, cùng cấu hình pool và PRAGMA với engine đồng bộ"""
+    url = url or ASYNC_DATABASE_URL or async_database_url()
+    if not url.startswith("sqlite"):
+        return create_async_engine(
+            url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=True
+        )
+
+    settings = {**SQLITE_PRAGMAS, **(pragmas or {})}
+    database = make_url(url).database
+    if not database or database == ":memory:":
+        async_engine = create_async_engine(url, poolclass=StaticPool)
+    else:
+        directory = os.path.dirname(database)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        async_engine = create_async_engine(
+            url,
+            connect_args={"timeout": settings["busy_timeout"] / 1000},
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=DB_POOL_TIMEOUT
+        )
+    set_sqlite_pragmas(async_engine.sync_engine, settings)
+    return async_engine
+
+
+engine = create_db_engine()
+# Engine bất đồng bộ: các route dùng engine này để không chặn event loop khi chờ database.
+# Engine đồng bộ vẫn được dùng cho migration, seed và các công cụ dòng lệnh
+async_engine = create_async_db_engine()
 
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
 
-def get_session():
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+_write_lock: Optional[asyncio.Lock] = None
+_write_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def sqlite_write_lock() -> asyncio.Lock:
+    """Lock ghi dùng chung trong event loop hiện tại"""
+    global _write_lock, _write_lock_loop
+    loop = asyncio.get_running_loop()
+    if _write_lock is None or _write_lock_loop is not loop:
+        _write_lock, _write_lock_loop = asyncio.Lock(), loop
+    return _write_lock
+
+
+class SerializedWriteSyncSession(Session):
+    """Session đồng bộ bên trong SerializedWriteSession; các event giữ lock ghi được đăng ký trên class này"""
+
+
+def _hold_write_lock(session: Session) -> None:
+    """Chờ lock ghi trước lần ghi đầu tiên của transaction (chạy trong greenlet của AsyncSession nên chờ được lock asyncio)"""
+    if "write_lock" in session.info:
+        return
+    lock = sqlite_write_lock()
+    await_only(lock.acquire())
+    session.info["write_lock"] = lock
+
+
+@event.listens_for(SerializedWriteSyncSession, "before_flush")
+def hold_write_lock_on_flush(session, flush_context, instances):
+    # Gồm cả autoflush trước một truy vấn, không chỉ flush lúc commit
+    _hold_write_lock(session)
+
+
+@event.listens_for(SerializedWriteSyncSession, "do_orm_execute")
+def hold_write_lock_on_dml(orm_execute_state):
+    # insert()/update()/delete() chạy trực tiếp qua session.exec, không qua flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _hold_write_lock(orm_execute_state.session)
+
+
+@event.listens_for(SerializedWriteSyncSession, "after_transaction_end")
+def release_write_lock(session, transaction):
+    # Chỉ transaction gốc (commit, rollback hoặc đóng session) mới nhả khoá ghi của SQLite
+    if transaction.parent is None and "write_lock" in session.info:
+        session.info.pop("write_lock").release()
+
+
+class SerializedWriteSession(AsyncSession):
+    """
+    SQLite chỉ cho một transaction ghi tại một thời điểm. Transaction đang giữ khoá phải chờ event loop
+    để chạy tiếp, nên khi tải cao các transaction khác dễ hết busy_timeout ("database is locked").
+    Session này giữ một lock asyncio từ lần ghi đầu tiên (flush hoặc DML) tới khi transaction kết thúc,
+    để các transaction ghi chờ lần lượt trên event loop thay vì chờ khoá trong SQLite.
+    """
+
+    sync_session_class = SerializedWriteSyncSession
+
+
+def async_session() -> AsyncSession:
+    """Session bất đồng bộ; đối tượng không bị expire sau commit để tránh truy vấn ngầm khi đọc thuộc tính"""
+    session_class = (
+        SerializedWriteSession
+        if SQLITE_SERIALIZE_WRITES and async_engine.dialect.name == "sqlite"
+        else AsyncSession
+    )
+    return session_class(async_engine, expire_on_commit=False)
+
+
+async def get_session():
+    async with async_session() as session:
+        yield session
@@ -0,0 +1,64 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+# Cost factor của bcrypt; các hash cũ có cost thấp hơn sẽ được hash lại khi đăng nhập
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Số thread dành riêng cho hash/verify mật khẩu (0 để chạy trực tiếp trên event loop)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Số yêu cầu được phép xếp hàng chờ khi tất cả worker đang bận
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+# Giá trị Retry-After (giây) trả về khi hàng đợi đầy
+PASSWORD_RETRY_AFTER = int(os.getenv("PASSWORD_RETRY_AFTER", "1"))
+
+_pwd_context = None
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0
+
+
+class PasswordWorkersBusy(Exception):
+    """Hàng đợi hash mật khẩu đã đầy"""
+
+    def __init__(self, retry_after: int = PASSWORD_RETRY_AFTER):
+        super().__init__("Hệ thống đang bận xử lý đăng nhập, vui lòng thử lại sau")
+        self.retry_after = retry_after
+
+
+def get_pwd_context():
+    """CryptContext dùng chung, tạo khi dùng lần đầu (passlib và bcrypt được import muộn)"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__rounds=BCRYPT_ROUNDS,
+            bcrypt__min_rounds=BCRYPT_ROUNDS
+        )
+    return _pwd_context
+
+
+async def _run(fn, *args):
+    """Chạy hàm nặng CPU trong pool riêng, từ chối khi vượt quá số worker + hàng đợi"""
+    global _executor, _pending
+    if PASSWORD_HASH_WORKERS <= 0:
+        return fn(*args)
+    if _pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE:
+        raise PasswordWorkersBusy()
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password")
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run(get_pwd_context().hash, password)
+
+
+async def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Kiểm tra mật khẩu; trả về thêm hash mới nếu hash hiện tại cần được nâng cấp"""
+    return await _run(get_pwd_context().verify_and_update, password, hashed_password)
@@ -0,0 +1,37 @@
+import io
+import os
+from typing import BinaryIO, Iterator, Optional
+
+# Giới hạn kích thước (byte) và số trang của file CV
+MAX_CV_FILE_SIZE = int(os.getenv("MAX_CV_FILE_SIZE", str(10 * 1024 * 1024)))
+MAX_CV_PAGES = int(os.getenv("MAX_CV_PAGES", "50"))
+
+
+class PDFLimitError(ValueError):
+    """File PDF vượt quá giới hạn kích thước hoặc số trang"""
+
+
+def iter_pdf_pages(stream: BinaryIO, max_pages: Optional[int] = None) -> Iterator[str]:
+    """Đọc lần lượt nội dung văn bản của từng trang, kiểm tra số trang trước khi trích xuất"""
+    import PyPDF2
+
+    pdf_reader = PyPDF2.PdfReader(stream)
+    page_count = len(pdf_reader.pages)
+    if max_pages is not None and page_count > max_pages:
+        raise PDFLimitError(f"File PDF có {page_count} trang, vượt quá giới hạn {max_pages} trang")
+    for page in pdf_reader.pages:
+        yield page.extract_text() or ""
+
+
+def extract_pdf_text_from_stream(stream: BinaryIO, max_pages: Optional[int] = None) -> str:
+    """Đọc nội dung văn bản của file PDF trực tiếp từ file-like object (không cần file tạm)"""
+    stream.seek(0)
+    return "".join(iter_pdf_pages(stream, max_pages))
+
+
+def extract_pdf_text(data: bytes, max_pages: Optional[int] = None) -> str:
+    """
+    Đọc nội dung văn bản của file PDF từ bytes.
+    Hàm ở mức module để có thể chạy trong ProcessPoolExecutor.
+    """
+    return extract_pdf_text_from_stream(io.BytesIO(data), max_pages)
@@ -0,0 +1,386 @@
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, object_session
+from sqlmodel import select, func
+import db
+import cache
+import prompts
+import vectors
+from models import Skills, Experience, engine, DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# Thời gian (giây) giữ snapshot hồ sơ trong bộ nhớ. Snapshot tự xoá khi Skills/Experience thay đổi trong process này;
+# TTL giới hạn thời gian dùng dữ liệu cũ khi database được ghi từ process khác (seed, worker khác)
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "300"))
+
+# "5 năm", "3+ years"
+EXPERIENCE_YEARS_RE = re.compile(r"(\d+)\+?\s*(năm|years?)", re.IGNORECASE)
+EXPERIENCE_SUMMARY_CHARS = 100
+
+# Số đoạn kinh nghiệm/dự án liên quan nhất tới mô tả công việc được đưa vào prompt (0 để đưa toàn bộ dự án mới nhất)
+PROFILE_RELEVANT_SNIPPETS = int(os.getenv("PROFILE_RELEVANT_SNIPPETS", "5"))
+# Độ dài tối đa (token) của mỗi đoạn trong chỉ mục
+PROFILE_SNIPPET_TOKENS = int(os.getenv("PROFILE_SNIPPET_TOKENS", "80"))
+# File chỉ mục vector; mặc định nằm cạnh file SQLite (data/freelancer.db -> data/freelancer.vectors.npz)
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "")
+# Gộp các lần ghi file chỉ mục sau khi kinh nghiệm thay đổi (giây)
+VECTOR_INDEX_SAVE_DELAY = float(os.getenv("VECTOR_INDEX_SAVE_DELAY", "5"))
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?;])\s+")
+SKILL_SEPARATOR_RE = re.compile(r"[,;\n•|]+")
+
+# (snapshot, thời điểm hết hạn)
+_cached: Optional[Tuple[Dict[str, Any], float]] = None
+# Tăng mỗi khi hồ sơ thay đổi; snapshot đọc trước lần thay đổi sẽ không được lưu vào cache
+_generation = 0
+_flight = cache.SingleFlight()
+stats = cache.CacheStats()
+
+# Chỉ mục vector các đoạn kinh nghiệm/dự án, đọc (hoặc dựng lại) khi dùng lần đầu
+_index: Optional[vectors.VectorIndex] = None
+_index_flight = cache.SingleFlight()
+# Các thay đổi được commit trong lúc đang đọc chỉ mục, áp dụng lại sau khi đọc xong
+_loading = False
+_pending: List[Tuple[int, Optional[List[str]]]] = []
+_dirty = False
+_save_handle: Optional[asyncio.TimerHandle] = None
+
+
+def experience_level(work_experience: Optional[str]) -> str:
+    """Mức kinh nghiệm rút ra từ mô tả kinh nghiệm: số năm nếu có, ngược lại là phần đầu của mô tả"""
+    if not work_experience:
+        return ""
+    match = EXPERIENCE_YEARS_RE.search(work_experience)
+    if match:
+        return f"{match.group(1)} năm kinh nghiệm"
+    summary = prompts.normalize_prompt_text(work_experience).replace("\n", " ")
+    return summary if len(summary) <= EXPERIENCE_SUMMARY_CHARS else summary[:EXPERIENCE_SUMMARY_CHARS] + "..."
+
+
+def project_lines(projects: Optional[str]) -> List[str]:
+    """Các dự án (chuỗi JSON hoặc văn bản), mỗi dự án một dòng"""
+    if not projects:
+        return []
+    try:
+        items = json.loads(projects)
+    except ValueError:
+        items = projects
+    if not isinstance(items, list):
+        return [line for line in prompts.normalize_prompt_text(str(items)).splitlines() if line]
+    lines = [
+        " - ".join(str(value) for value in item.values() if value) if isinstance(item, dict) else str(item)
+        for item in items
+    ]
+    return [prompts.normalize_prompt_text(line).replace("\n", " ") for line in lines if line]
+
+
+def format_projects(projects: Optional[str]) -> str:
+    """Danh sách dự án thành đoạn "Dự án nổi bật" cho prompt"""
+    lines = project_lines(projects)
+    return "Dự án nổi bật:\n" + "\n".join(f"- {line}" for line in lines) if lines else ""
+
+
+def skill_terms(*values: Optional[str]) -> List[str]:
+    """Danh sách kỹ năng (chuỗi JSON hoặc phân tách bằng dấu phẩy, chấm phẩy, xuống dòng), bỏ trùng"""
+    terms: List[str] = []
+    seen = set()
+    for value in values:
+        if not value:
+            continue
+        try:
+            items = json.loads(value)
+        except ValueError:
+            items = None
+        if not isinstance(items, list):
+            items = SKILL_SEPARATOR_RE.split(value)
+        for item in items:
+            term = str(item).strip(" -*\t")
+            if term and term.lower() not in seen:
+                seen.add(term.lower())
+                terms.append(term)
+    return terms
+
+
+def _pack_sentences(text: str) -> List[str]:
+    # Ghép các câu liên tiếp thành đoạn tối đa PROFILE_SNIPPET_TOKENS token
+    snippets: List[str] = []
+    current: List[str] = []
+    used = 0
+    for sentence in SENTENCE_END_RE.split(text):
+        tokens = prompts.count_tokens(sentence)
+        if current and used + tokens > PROFILE_SNIPPET_TOKENS:
+            snippets.append(" ".join(current))
+            current, used = [], 0
+        current.append(sentence)
+        used += tokens
+    if current:
+        snippets.append(" ".join(current))
+    return snippets
+
+
+def experience_snippets(work_experience: Optional[str], projects: Optional[str]) -> List[str]:
+    """Chia kinh nghiệm (theo dòng, câu) và dự án (mỗi dự án một đoạn) thành các đoạn ngắn để đánh chỉ mục"""
+    snippets: List[str] = []
+    for line in prompts.normalize_prompt_text(work_experience).splitlines() + project_lines(projects):
+        if line:
+            snippets.extend(_pack_sentences(line))
+    return snippets
+
+
+def build_snapshot(skills: Optional[Dict[str, Any]], experience: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Dựng sẵn các phần của prompt cover letter từ bản ghi Skills/Experience mới nhất"""
+    freelancer_skills = "\n\n".join(
+        prompts.normalize_prompt_text(value)
+        for value in ((skills or {}).get("tech_skills"), (skills or {}).get("soft_skills"))
+        if value
+    )
+    projects = format_projects((experience or {}).get("projects"))
+    return {
+        "skills_id": skills["id"] if skills else None,
+        "experience_id": experience["id"] if experience else None,
+        "freelancer_skills": freelancer_skills,
+        "skill_terms": skill_terms((skills or {}).get("tech_skills"), (skills or {}).get("soft_skills")),
+        "experience_level": experience_level((experience or {}).get("work_experience")),
+        "projects": projects,
+        "tokens": prompts.count_tokens(freelancer_skills) + prompts.count_tokens(projects),
+    }
+
+
+async def _load(generation: int) -> Dict[str, Any]:
+    global _cached
+    skills, experience = await asyncio.gather(db.get_skills(), db.get_experience())
+    snapshot = build_snapshot(skills, experience)
+    if generation == _generation:
+        _cached = (snapshot, time.monotonic() + PROFILE_CACHE_TTL)
+    return snapshot
+
+
+async def get_snapshot() -> Dict[str, Any]:
+    """Snapshot hồ sơ hiện tại: lấy từ bộ nhớ nếu còn hạn, ngược lại đọc database (các lời gọi đồng thời đọc chung một lần)"""
+    cached = _cached
+    if cached is not None and cached[1] > time.monotonic():
+        stats.memory_hits += 1
+        return {**cached[0], "cached": True}
+
+    stats.misses += 1
+    generation = _generation
+    snapshot, coalesced = await _flight.do(f"profile:{generation}", lambda: _load(generation))
+    if coalesced:
+        stats.coalesced += 1
+    return {**snapshot, "cached": False}
+
+
+def invalidate() -> None:
+    global _cached, _generation
+    _generation += 1
+    _cached = None
+
+
+@event.listens_for(Skills, "after_insert")
+@event.listens_for(Skills, "after_update")
+@event.listens_for(Skills, "after_delete")
+@event.listens_for(Experience, "after_insert")
+@event.listens_for(Experience, "after_update")
+@event.listens_for(Experience, "after_delete")
+def invalidate_profile(mapper, connection, target):
+    """Xoá snapshot hồ sơ khi kỹ năng hoặc kinh nghiệm được thêm, sửa hoặc xoá"""
+    invalidate()
+    # Xoá thêm lần nữa sau commit: snapshot đọc trong lúc transaction chưa commit vẫn là dữ liệu cũ
+    session = object_session(target)
+    if session is not None:
+        session.info["profile_changed"] = True
+
+
+@event.listens_for(Experience, "after_insert")
+@event.listens_for(Experience, "after_update")
+def record_experience_change(mapper, connection, target: Experience):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("experience_changes", {})[target.id] = experience_snippets(
+            target.work_experience, target.projects
+        )
+
+
+@event.listens_for(Experience, "after_delete")
+def record_experience_delete(mapper, connection, target: Experience):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("experience_changes", {})[target.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_profile_after_commit(session):
+    if session.info.pop("profile_changed", False):
+        invalidate()
+    changes = session.info.pop("experience_changes", None)
+    if changes:
+        apply_experience_changes(list(changes.items()))
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_profile_change(session):
+    session.info.pop("profile_changed", None)
+    session.info.pop("experience_changes", None)
+
+
+def index_path(url: str = DATABASE_URL) -> str:
+    if VECTOR_INDEX_PATH:
+        return VECTOR_INDEX_PATH
+    parsed = make_url(url)
+    if parsed.drivername.startswith("sqlite") and parsed.database and parsed.database != ":memory:":
+        return os.path.splitext(parsed.database)[0] + ".vectors.npz"
+    return os.path.join("data", "experience.vectors.npz")
+
+
+def experience_fingerprint() -> str:
+    """Số bản ghi, id và thời điểm cập nhật lớn nhất của Experience; khác với giá trị trong file thì chỉ mục đã cũ"""
+    with engine.connect() as connection:
+        count, max_id, updated_at = connection.execute(
+            select(func.count(Experience.id), func.max(Experience.id), func.max(Experience.updated_at))
+        ).one()
+    return f"{count}:{max_id}:{updated_at}"
+
+
+def load_index() -> vectors.VectorIndex:
+    """Đọc chỉ mục đã lưu; dựng lại từ bảng Experience nếu chưa có file hoặc file đã cũ"""
+    path = index_path()
+    fingerprint = experience_fingerprint()
+    index = vectors.VectorIndex.load(path)
+    if index is not None and index.fingerprint == fingerprint:
+        return index
+
+    logger.info(f"Rebuilding experience vector index at {path}")
+    index = vectors.VectorIndex()
+    with engine.connect() as connection:
+        rows = connection.execution_options(yield_per=500).execute(
+            select(Experience.id, Experience.work_experience, Experience.projects)
+        )
+        for experience_id, work_experience, projects in rows:
+            index.upsert(experience_id, experience_snippets(work_experience, projects))
+    index.fingerprint = fingerprint
+    index.save(path)
+    return index
+
+
+async def _load_index() -> vectors.VectorIndex:
+    global _index, _loading
+    _loading = True
+    try:
+        index = await run_in_threadpool(load_index)
+        for experience_id, snippets in _pending:
+            _apply(index, experience_id, snippets)
+        _index = index
+        if _pending:
+            _schedule_save()
+        return index
+    finally:
+        _loading = False
+        _pending.clear()
+
+
+async def get_index() -> vectors.VectorIndex:
+    if _index is not None:
+        return _index
+    index, _ = await _index_flight.do("index", _load_index)
+    return index
+
+
+def _apply(index: vectors.VectorIndex, experience_id: int, snippets: Optional[List[str]]) -> None:
+    if snippets is None:
+        index.remove(experience_id)
+    else:
+        index.upsert(experience_id, snippets)
+
+
+def apply_experience_changes(changes: List[Tuple[int, Optional[List[str]]]]) -> None:
+    """Cập nhật chỉ mục theo các Experience vừa được commit (None: đã bị xoá)"""
+    if _index is None:
+        # Chỉ mục chưa được đọc sẽ lấy dữ liệu mới từ database khi đọc
+        if _loading:
+            _pending.extend(changes)
+        return
+    for experience_id, snippets in changes:
+        _apply(_index, experience_id, snippets)
+    _schedule_save()
+
+
+def save_index() -> None:
+    global _dirty
+    if _index is None:
+        return
+    _dirty = False
+    # Lấy fingerprint trước khi ghi: nếu database đổi tiếp trong lúc ghi, lần khởi động sau sẽ dựng lại chỉ mục
+    _index.fingerprint = experience_fingerprint()
+    _index.save(index_path())
+
+
+def _schedule_save() -> None:
+    global _dirty, _save_handle
+    _dirty = True
+    if _save_handle is not None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        save_index()
+        return
+    _save_handle = loop.call_later(VECTOR_INDEX_SAVE_DELAY, lambda: loop.create_task(flush_index()))
+
+
+async def flush_index() -> None:
+    """Ghi các thay đổi còn lại của chỉ mục ra file"""
+    global _save_handle
+    if _save_handle is not None:
+        _save_handle.cancel()
+        _save_handle = None
+    if _dirty:
+        try:
+            await run_in_threadpool(save_index)
+        except Exception as e:
+            logger.error(f"Error saving experience vector index: {str(e)}", exc_info=True)
+
+
+async def select_experience(job_description: str, k: int = PROFILE_RELEVANT_SNIPPETS) -> Optional[Dict[str, Any]]:
+    """
+    Các đoạn kinh nghiệm/dự án liên quan nhất tới mô tả công việc (tìm trong chỉ mục vector tại local);
+    None nếu chỉ mục trống, không có đoạn nào khớp hoặc chỉ mục lỗi
+    """
+    if k <= 0 or not job_description:
+        return None
+    try:
+        index = await get_index()
+        matches = await run_in_threadpool(index.search, job_description, k)
+    except Exception as e:
+        logger.error(f"Error searching experience vector index: {str(e)}", exc_info=True)
+        return None
+    if not matches:
+        return None
+    text = "Kinh nghiệm và dự án liên quan:\n" + "\n".join(f"- {match['text']}" for match in matches)
+    return {
+        "text": text,
+        "tokens": prompts.count_tokens(text),
+        "matches": [{"experience_id": match["doc_id"], "score": match["score"]} for match in matches],
+    }
+
+
+def metadata(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Thông tin snapshot hồ sơ trả về trong metadata của response"""
+    return {
+        "skills_id": snapshot["skills_id"],
+        "experience_id": snapshot["experience_id"],
+        "tokens": snapshot["tokens"],
+        "cached": snapshot["cached"],
+        "relevant": snapshot.get("relevant", []),
+        "hits": stats.memory_hits,
+        "misses": stats.misses,
+        "coalesced": stats.coalesced
+    }
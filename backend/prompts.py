@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import math
+from typing import Any, Dict, List, Optional
+
+# Ngân sách token cho các phần đầu vào do người dùng cung cấp
+JOB_DESCRIPTION_TOKEN_BUDGET = int(os.getenv("JOB_DESCRIPTION_TOKEN_BUDGET", "2000"))
+ADDITIONAL_INFO_TOKEN_BUDGET = int(os.getenv("ADDITIONAL_INFO_TOKEN_BUDGET", "500"))
+# CV dài hơn CV_TOKEN_BUDGET được chia thành các đoạn CV_CHUNK_TOKENS token, trích xuất từng đoạn rồi gộp kết quả
+CV_TOKEN_BUDGET = int(os.getenv("CV_TOKEN_BUDGET", "6000"))
+CV_CHUNK_TOKENS = int(os.getenv("CV_CHUNK_TOKENS", "3000"))
+# Số đoạn tối đa (giới hạn chi phí); phần còn lại của CV bị bỏ qua
+CV_MAX_CHUNKS = int(os.getenv("CV_MAX_CHUNKS", "8"))
+
+# Encoding mặc định khi tiktoken không biết model
+DEFAULT_ENCODING = "cl100k_base"
+
+# "Page 2", "Trang 2/5", "2 of 5"
+PAGE_NUMBER_RE = re.compile(r"^((page|trang)\s*\d+(\s*(of|/|trên)\s*\d+)?|\d+\s*(of|/|trên)\s*\d+)$", re.IGNORECASE)
+TOKEN_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+_encoding = None
+
+
+def _get_encoding():
+    """Encoding của tiktoken (import khi cần); None nếu không cài tiktoken hoặc không tải được encoding"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            import cache
+            try:
+                _encoding = tiktoken.encoding_for_model(cache.COVER_LETTER_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+        except Exception:
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Đếm số token tại local; ước lượng theo từ và dấu câu khi không có tiktoken"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in TOKEN_PIECE_RE.findall(text))
+
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Số token của danh sách message (cộng thêm phần định dạng của mỗi message)"""
+    return sum(count_tokens(message["content"]) + 4 for message in messages) + 2
+
+
+def normalize_prompt_text(text: Optional[str]) -> str:
+    """
+    Chuẩn hoá văn bản trước khi đưa vào prompt: gộp khoảng trắng, bỏ dòng số trang,
+    dòng trống thừa và các dòng lặp lại liên tiếp
+    """
+    if not text:
+        return ""
+    result: List[str] = []
+    for raw_line in text.splitlines():
+        line = re.sub(r"[ \t\u00a0]+", " ", raw_line).strip()
+        if line and PAGE_NUMBER_RE.match(line):
+            continue
+        # Giữ tối đa một dòng trống giữa các đoạn; bỏ dòng trùng với dòng ngay trước
+        if result and line == result[-1]:
+            continue
+        if not line and not result:
+            continue
+        result.append(line)
+    return "\n".join(result).strip()
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """Cắt văn bản còn tối đa `budget` token"""
+    if budget <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        return text if len(tokens) <= budget else encoding.decode(tokens[:budget])
+    tokens = count_tokens(text)
+    if tokens <= budget:
+        return text
+    return text[:int(len(text) * budget / tokens)]
+
+
+def compact_text(text: Optional[str], budget: int) -> Dict[str, Any]:
+    """
+    Chuẩn hoá và rút gọn văn bản cho vừa ngân sách token: giữ các đoạn theo thứ tự
+    cho tới khi hết ngân sách, đoạn cuối bị cắt bớt
+    """
+    original_tokens = count_tokens(text)
+    normalized = normalize_prompt_text(text)
+    tokens = count_tokens(normalized)
+    if tokens <= budget:
+        return {"text": normalized, "original_tokens": original_tokens, "tokens": tokens, "truncated": False}
+
+    kept: List[str] = []
+    # Chừa một token cho dấu "…" đánh dấu phần bị cắt
+    used = 1
+    for paragraph in normalized.split("\n\n"):
+        remaining = budget - used
+        paragraph_tokens = count_tokens(paragraph)
+        if paragraph_tokens > remaining:
+            kept.append(truncate_tokens(paragraph, remaining))
+            break
+        kept.append(paragraph)
+        used += paragraph_tokens
+    compacted = "\n\n".join(kept).strip() + " …"
+    return {"text": compacted, "original_tokens": original_tokens, "tokens": count_tokens(compacted), "truncated": True}
+
+
+def split_chunks(text: str, chunk_tokens: int) -> List[str]:
+    """Chia văn bản thành các đoạn tối đa `chunk_tokens` token, ưu tiên cắt tại ranh giới dòng"""
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    for line in text.splitlines():
+        line_tokens = count_tokens(line)
+        while line_tokens > chunk_tokens:
+            # Dòng quá dài: cắt thành nhiều phần
+            head = truncate_tokens(line, chunk_tokens)
+            if current:
+                chunks.append("\n".join(current))
+                current, used = [], 0
+            chunks.append(head)
+            line = line[len(head):]
+            line_tokens = count_tokens(line)
+        if used + line_tokens > chunk_tokens and current:
+            chunks.append("\n".join(current))
+            current, used = [], 0
+        current.append(line)
+        used += line_tokens
+    if current and "\n".join(current).strip():
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def prepare_cv_text(text_content: str) -> Dict[str, Any]:
+    """Chuẩn hoá nội dung CV và chia thành các đoạn nếu vượt CV_TOKEN_BUDGET"""
+    original_tokens = count_tokens(text_content)
+    normalized = normalize_prompt_text(text_content)
+    tokens = count_tokens(normalized)
+    chunks = [normalized] if tokens <= CV_TOKEN_BUDGET else split_chunks(normalized, CV_CHUNK_TOKENS)
+    return {
+        "chunks": chunks[:CV_MAX_CHUNKS],
+        "original_tokens": original_tokens,
+        "tokens": tokens,
+        "truncated": len(chunks) > CV_MAX_CHUNKS,
+    }
+
+
+def cv_token_report(prepared: Dict[str, Any]) -> Dict[str, Any]:
+    """Thông tin token của CV trả về trong metadata"""
+    return {
+        "original_tokens": prepared["original_tokens"],
+        "tokens": prepared["tokens"],
+        "chunks": len(prepared["chunks"]),
+        "truncated": prepared["truncated"],
+        "budget": CV_TOKEN_BUDGET,
+    }
+
+
+def _merge_values(values: List[Any]) -> Any:
+    values = [value for value in values if value not in (None, "", [], {})]
+    if not values:
+        return ""
+    if len(values) == 1:
+        return values[0]
+    if all(isinstance(value, str) for value in values):
+        return "\n".join(values)
+
+    # Gộp thành danh sách, bỏ các phần tử trùng nhưng giữ thứ tự
+    merged: List[Any] = []
+    seen = set()
+    for value in values:
+        for item in value if isinstance(value, list) else [value]:
+            key = json.dumps(item, sort_keys=True, ensure_ascii=False).lower()
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged
+
+
+def merge_cv_extractions(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Gộp kết quả trích xuất của các đoạn CV (bước reduce, chạy tại local)"""
+    fields: List[str] = []
+    for result in results:
+        fields.extend(field for field in result if field not in fields)
+    return {field: _merge_values([result.get(field) for result in results]) for field in fields}
@@ -0,0 +1,177 @@
+import os
+import math
+import time
+import threading
+from typing import Dict, Tuple
+
+import metrics
+
+# Giới hạn tần suất cho các endpoint gọi LLM (token bucket)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Theo từng người dùng (username trong access token, hoặc địa chỉ IP khi không đăng nhập)
+RATE_LIMIT_USER_PER_MINUTE = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "20"))
+RATE_LIMIT_USER_BURST = int(os.getenv("RATE_LIMIT_USER_BURST", "5"))
+# Cho toàn bộ server (tất cả người dùng cộng lại)
+RATE_LIMIT_GLOBAL_PER_MINUTE = float(os.getenv("RATE_LIMIT_GLOBAL_PER_MINUTE", "300"))
+RATE_LIMIT_GLOBAL_BURST = int(os.getenv("RATE_LIMIT_GLOBAL_BURST", "30"))
+# "memory" (mỗi process một bộ đếm) hoặc URL Redis (redis://...) để dùng chung giữa nhiều worker
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_KEY_PREFIX = os.getenv("RATE_LIMIT_KEY_PREFIX", "ratelimit:")
+
+# Số bucket tối đa giữ trong bộ nhớ trước khi dọn các bucket đã đầy lại
+MEMORY_BUCKETS_MAX = 10000
+
+
+class RateLimitExceeded(Exception):
+    """Vượt quá giới hạn tần suất (người dùng, toàn server, hàng đợi LLM hoặc giới hạn của OpenAI)"""
+
+    MESSAGES = {
+        "user": "Bạn đã gửi quá nhiều yêu cầu, vui lòng thử lại sau",
+        "global": "Hệ thống đang nhận quá nhiều yêu cầu, vui lòng thử lại sau",
+        "queue": "Hệ thống đang bận xử lý các yêu cầu khác, vui lòng thử lại sau",
+        "upstream": "Dịch vụ AI đang quá tải, vui lòng thử lại sau",
+    }
+
+    def __init__(self, retry_after: float, scope: str = "user"):
+        super().__init__(self.MESSAGES.get(scope, self.MESSAGES["user"]))
+        # Header Retry-After chỉ nhận số giây nguyên
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.scope = scope
+
+
+class MemoryBackend:
+    """Token bucket trong bộ nhớ của process; chỉ chính xác khi chạy một worker"""
+
+    def __init__(self):
+        # key -> (số token còn lại, thời điểm cập nhật, tốc độ nạp, dung lượng)
+        self._buckets: Dict[str, Tuple[float, float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        """
+        Lấy `cost` token; trả về 0 nếu thành công, ngược lại số giây cần chờ.
+        Yêu cầu lớn hơn dung lượng bucket được nhận khi bucket đầy và để bucket âm (nợ) đúng bằng phần thiếu
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _, _ = self._buckets.get(key) or (burst, now, rate, burst)
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            required = min(cost, burst)
+            if tokens >= required:
+                tokens -= cost
+            else:
+                wait = (required - tokens) / rate
+            self._buckets[key] = (tokens, now, rate, burst)
+            if len(self._buckets) > MEMORY_BUCKETS_MAX:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now: float) -> None:
+        # Bucket đã nạp đầy lại tương đương với chưa dùng, xoá được
+        for key, (tokens, updated, rate, burst) in list(self._buckets.items()):
+            if tokens + (now - updated) * rate >= burst:
+                del self._buckets[key]
+
+    async def close(self) -> None:
+        pass
+
+
+# Token bucket nguyên tử trong Redis; dùng giờ của Redis để các worker có chung mốc thời gian
+REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+local required = math.min(cost, burst)
+if tokens >= required then
+    tokens = tokens - cost
+else
+    wait = (required - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+-- Giữ key cho tới khi bucket nạp đầy lại (kể cả phần nợ) để không xoá mất phần nợ
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Token bucket lưu trong Redis, dùng chung giữa nhiều worker/máy chủ (cần cài `redis`)"""
+
+    def __init__(self, url: str, prefix: str = RATE_LIMIT_KEY_PREFIX):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(REDIS_TOKEN_BUCKET)
+        self._prefix = prefix
+
+    async def acquire(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        wait = await self._script(keys=[self._prefix + key], args=[rate, burst, cost])
+        return float(wait)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+_backend = None
+
+
+def create_backend(url: str = RATE_LIMIT_BACKEND):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    if url != "memory":
+        raise ValueError(f"RATE_LIMIT_BACKEND không hợp lệ: {url}")
+    return MemoryBackend()
+
+
+def get_backend():
+    """Backend dùng chung, tạo khi dùng lần đầu"""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Thay backend (đối tượng bất kỳ có `acquire` và `close`), ví dụ khi chạy nhiều worker"""
+    global _backend
+    _backend = backend
+
+
+async def close_backend() -> None:
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+
+def rejected(scope: str) -> None:
+    metrics.rate_limited.inc(scope=scope)
+
+
+async def check(client_key: str, cost: int = 1) -> None:
+    """
+    Lấy `cost` token từ bucket của người dùng rồi tới bucket toàn server;
+    raise RateLimitExceeded kèm số giây cần chờ nếu một trong hai đã hết.
+    Luôn tính đủ `cost`: yêu cầu lớn hơn burst (batch) để lại nợ, các request sau phải chờ tới khi trả hết
+    """
+    if not RATE_LIMIT_ENABLED:
+        return
+    backend = get_backend()
+    wait = await backend.acquire(client_key, RATE_LIMIT_USER_PER_MINUTE / 60, RATE_LIMIT_USER_BURST, cost)
+    if wait > 0:
+        rejected("user")
+        raise RateLimitExceeded(wait, "user")
+    wait = await backend.acquire("global", RATE_LIMIT_GLOBAL_PER_MINUTE / 60, RATE_LIMIT_GLOBAL_BURST, cost)
+    if wait > 0:
+        # Request không được nhận: trả lại phần đã lấy từ bucket của người dùng (cost âm luôn thành công)
+        await backend.acquire(client_key, RATE_LIMIT_USER_PER_MINUTE / 60, RATE_LIMIT_USER_BURST, -cost)
+        rejected("global")
+        raise RateLimitExceeded(wait, "global")
@@ -1,5 +1,13 @@
-from sqlmodel import Session, select
-from models import User, engine
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+from sqlalchemy import insert
+from sqlmodel import Session, select, func
+from models import User, Skills, Experience, CoverLetter, engine
 from passlib.context import CryptContext
 
 # Cấu hình password hashing với các tùy chọn cụ thể
@@ -69,5 +77,209 @@ def seed_users():
         session.commit()
         print("Đã thêm 5 users mẫu thành công")
 
+# Dữ liệu tổng hợp cho load test
+TECH_SKILLS = (
+    "Python JavaScript TypeScript React Vue Angular Next.js FastAPI Django Flask Node.js Express Docker "
+    "Kubernetes AWS GCP Azure PostgreSQL MySQL SQLite Redis Kafka Spark Airflow Pandas NumPy PyTorch "
+    "TensorFlow GraphQL REST WebSocket Flutter Swift Kotlin Java Spring Go Rust Elasticsearch Terraform "
+    "Ansible Linux Nginx CI/CD"
+).split()
+SOFT_SKILLS = [
+    "Giao tiếp", "Làm việc nhóm", "Giải quyết vấn đề", "Quản lý thời gian", "Tư duy phản biện",
+    "Lãnh đạo", "Thích ứng nhanh", "Đàm phán", "Tự học", "Chú ý chi tiết",
+]
+WORDS = (
+    "dự án khách hàng hệ thống ứng dụng phát triển thiết kế triển khai tối ưu hiệu năng bảo mật dữ liệu "
+    "người dùng giao diện backend frontend kiểm thử tự động tích hợp thanh toán báo cáo phân tích quy mô "
+    "microservice api cloud database cache pipeline monitoring logging team sprint agile yêu cầu giải pháp"
+).split()
+
+
+def _sentence_pool(rng: random.Random, size: int = 2000) -> List[str]:
+    """Tạo sẵn một tập câu; các đoạn văn được ghép từ tập này để sinh dữ liệu nhanh"""
+    pool = []
+    for _ in range(size):
+        words = [rng.choice(WORDS if rng.random() < 0.8 else TECH_SKILLS) for _ in range(rng.randint(8, 20))]
+        pool.append(" ".join(words).capitalize() + ".")
+    return pool
+
+
+def _paragraphs(rng: random.Random, pool: List[str], target_chars: int) -> str:
+    # Độ dài câu trung bình khoảng 100 ký tự
+    return " ".join(rng.choices(pool, k=max(1, target_chars // 100)))
+
+
+def _hash_password(args) -> str:
+    password, rounds = args
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds, bcrypt__ident="2b").hash(password)
+
+
+def hash_passwords_parallel(password: str, count: int, rounds: int, workers: int) -> List[str]:
+    """Tạo `count` hash (salt khác nhau) của cùng một mật khẩu, song song trên nhiều process"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_hash_password, [(password, rounds)] * count))
+
+
+def _created_at(rng: random.Random, now: datetime) -> datetime:
+    return now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+
+
+def synthetic_users(rng: random.Random, count: int, start: int, prefix: str, hashes: List[str], now: datetime) -> Iterator[Dict[str, Any]]:
+    for i in range(start, start + count):
+        created_at = _created_at(rng, now)
+        yield {
+            "email": f"{prefix}{i}@example.com",
+            "username": f"{prefix}{i}",
+            "hashed_password": hashes[i % len(hashes)],
+            "is_active": True,
+            "is_superuser": False,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def synthetic_skills(rng: random.Random, count: int, now: datetime) -> Iterator[Dict[str, Any]]:
+    for _ in range(count):
+        created_at = _created_at(rng, now)
+        yield {
+            "tech_skills": json.dumps(rng.sample(TECH_SKILLS, rng.randint(5, 15))),
+            "soft_skills": json.dumps(rng.sample(SOFT_SKILLS, rng.randint(2, 6)), ensure_ascii=False),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def synthetic_experience(rng: random.Random, pool: List[str], count: int, now: datetime) -> Iterator[Dict[str, Any]]:
+    for _ in range(count):
+        created_at = _created_at(rng, now)
+        yield {
+            "work_experience": f"{rng.randint(1, 15)} năm kinh nghiệm. " + _paragraphs(rng, pool, rng.randint(800, 2500)),
+            "projects": json.dumps([_paragraphs(rng, pool, rng.randint(150, 400)) for _ in range(rng.randint(2, 6))], ensure_ascii=False),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def synthetic_cover_letters(rng: random.Random, pool: List[str], count: int, now: datetime) -> Iterator[Dict[str, Any]]:
+    for _ in range(count):
+        yield {
+            "job_description": _paragraphs(rng, pool, rng.randint(600, 3000)),
+            "cover_letter": _paragraphs(rng, pool, rng.randint(1500, 2500)),
+            "created_at": _created_at(rng, now),
+        }
+
+
+def bulk_insert(model, rows: Iterator[Dict[str, Any]], batch_size: int) -> int:
+    """Insert theo lô, mỗi lô trong một transaction"""
+    total, batch = 0, []
+    statement = insert(model.__table__)
+
+    def flush():
+        with engine.begin() as connection:
+            connection.execute(statement, batch)
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+            total += len(batch)
+            batch = []
+    if batch:
+        flush()
+        total += len(batch)
+    return total
+
+
+def seed_synthetic(
+    users: int = 0,
+    skills: int = 0,
+    experiences: int = 0,
+    cover_letters: int = 0,
+    seed: int = 42,
+    batch_size: int = 5000,
+    password: str = "loadtest123",
+    bcrypt_rounds: int = 12,
+    distinct_hashes: int = 16,
+    workers: int = 4,
+    prefix: str = "load"
+) -> Dict[str, Any]:
+    """Tạo dữ liệu tổng hợp với số lượng lớn; cùng `seed` luôn sinh ra cùng dữ liệu"""
+    import db
+    import fulltext
+    db.init_db()
+
+    rng = random.Random(seed)
+    pool = _sentence_pool(rng)
+    # Mốc thời gian cố định để dữ liệu tái lập được giữa các lần chạy
+    now = datetime(2025, 1, 1)
+    report: Dict[str, Any] = {}
+
+    steps: List[tuple] = []
+    if users:
+        started = time.perf_counter()
+        hashes = hash_passwords_parallel(password, min(distinct_hashes, users), bcrypt_rounds, workers)
+        report["password_hashing_s"] = round(time.perf_counter() - started, 2)
+        with Session(engine) as session:
+            start = session.exec(select(func.count()).select_from(User)).one()
+        steps.append(("users", User, lambda: synthetic_users(rng, users, start, prefix, hashes, now)))
+    steps.append(("skills", Skills, lambda: synthetic_skills(rng, skills, now)))
+    steps.append(("experiences", Experience, lambda: synthetic_experience(rng, pool, experiences, now)))
+    steps.append(("cover_letters", CoverLetter, lambda: synthetic_cover_letters(rng, pool, cover_letters, now)))
+
+    def insert_all():
+        for name, model, rows in steps:
+            started = time.perf_counter()
+            inserted = bulk_insert(model, rows(), batch_size)
+            report[name] = {"rows": inserted, "seconds": round(time.perf_counter() - started, 2)}
+
+    if experiences or cover_letters:
+        # Xây dựng chỉ mục full-text một lần sau khi nạp xong, thay vì trigger trên từng dòng
+        with fulltext.deferred_indexing():
+            insert_all()
+            started = time.perf_counter()
+        report["search_index_s"] = round(time.perf_counter() - started, 2)
+    else:
+        insert_all()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed dữ liệu cho database")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("users", help="Thêm 5 users mẫu (mặc định)")
+
+    synthetic = subparsers.add_parser("synthetic", help="Tạo dữ liệu tổng hợp số lượng lớn cho load test")
+    synthetic.add_argument("--users", type=int, default=0)
+    synthetic.add_argument("--skills", type=int, default=0)
+    synthetic.add_argument("--experiences", type=int, default=0)
+    synthetic.add_argument("--cover-letters", type=int, default=0)
+    synthetic.add_argument("--seed", type=int, default=42, help="Seed để dữ liệu tái lập được")
+    synthetic.add_argument("--batch-size", type=int, default=5000, help="Số bản ghi mỗi transaction")
+    synthetic.add_argument("--password", default="loadtest123", help="Mật khẩu chung của các user tổng hợp")
+    synthetic.add_argument("--bcrypt-rounds", type=int, default=12)
+    synthetic.add_argument("--distinct-hashes", type=int, default=16, help="Số hash khác nhau được tạo rồi dùng luân phiên")
+    synthetic.add_argument("--workers", type=int, default=4, help="Số process hash mật khẩu song song")
+    synthetic.add_argument("--prefix", default="load", help="Tiền tố username/email")
+
+    args = parser.parse_args()
+    if args.command == "synthetic":
+        report = seed_synthetic(
+            users=args.users,
+            skills=args.skills,
+            experiences=args.experiences,
+            cover_letters=args.cover_letters,
+            seed=args.seed,
+            batch_size=args.batch_size,
+            password=args.password,
+            bcrypt_rounds=args.bcrypt_rounds,
+            distinct_hashes=args.distinct_hashes,
+            workers=args.workers,
+            prefix=args.prefix
+        )
+        print(json.dumps(report, indent=2))
+    else:
+        seed_users()
+
+
 if __name__ == "__main__":
-    seed_users() 
\ No newline at end of file
+    main()
@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import zlib
+import zipfile
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Số chiều của vector (hashing trick); tăng để giảm va chạm hash, đổi lại tốn thêm bộ nhớ (4 byte/chiều/đoạn)
+VECTOR_DIMENSIONS = int(os.getenv("VECTOR_DIMENSIONS", "1024"))
+# Tăng khi thay đổi cách tách từ/hash để các file chỉ mục cũ được dựng lại
+INDEX_VERSION = 2
+
+# Từ có ít nhất hai ký tự hoặc một chữ số
+TOKEN_RE = re.compile(r"\w\w+|\d")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+@lru_cache(maxsize=65536)
+def _hash_token(token: str) -> int:
+    # Giá trị tuyệt đối chọn chiều; dấu lấy từ bit cao của crc32 để các token va chạm triệt tiêu nhau
+    digest = zlib.crc32(token.encode("utf-8"))
+    return -(digest & 0x7FFFFFFF) if digest >> 31 else digest
+
+
+def vectorize_many(texts: List[str], dimensions: int = VECTOR_DIMENSIONS):
+    """Ma trận TF (log) của nhiều văn bản, mỗi văn bản một dòng"""
+    return vectorize_tokens([tokenize(text) for text in texts], dimensions)
+
+
+def vectorize_tokens(token_lists: List[List[str]], dimensions: int = VECTOR_DIMENSIONS):
+    """Như vectorize_many, với các văn bản đã được tách từ"""
+    import numpy as np
+
+    # Đếm token trong từng văn bản, hash các token khác nhau (có cache) rồi cộng dồn theo ô (dòng, chiều) bằng bincount
+    hashes: List[int] = []
+    counts: List[int] = []
+    lengths: List[int] = []
+    for tokens in token_lists:
+        counter = Counter(tokens)
+        hashes.extend(map(_hash_token, counter))
+        counts.extend(counter.values())
+        lengths.append(len(counter))
+    hashed = np.array(hashes, dtype=np.int64)
+    rows = np.repeat(np.arange(len(token_lists), dtype=np.int64), lengths)
+    weights = np.where(hashed < 0, -1.0, 1.0) * np.array(counts, dtype=np.float64)
+    matrix = np.bincount(
+        rows * dimensions + np.abs(hashed) % dimensions, weights=weights, minlength=len(token_lists) * dimensions
+    ).reshape(len(token_lists), dimensions).astype(np.float32)
+    return np.sign(matrix) * np.log1p(np.abs(matrix))
+
+
+class VectorIndex:
+    """
+    Chỉ mục TF-IDF cho các đoạn văn ngắn, vector hoá bằng hashing trick và lưu trong ma trận NumPy.
+    Mỗi tài liệu (doc_id) gồm nhiều đoạn; thêm/sửa/xoá một tài liệu chỉ cập nhật các dòng của nó.
+    IDF được tính lúc truy vấn từ số đoạn chứa mỗi chiều (document frequency).
+    """
+
+    def __init__(self, dimensions: int = VECTOR_DIMENSIONS):
+        import numpy as np
+
+        self.dimensions = dimensions
+        self.fingerprint: Optional[str] = None
+        self._matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self._size = 0
+        self._df = np.zeros(dimensions, dtype=np.int32)
+        # Mỗi dòng của ma trận: (doc_id, nội dung đoạn)
+        self._entries: List[Tuple[int, str]] = []
+        self._rows: Dict[int, List[int]] = {}
+        # Độ dài vector TF-IDF của từng dòng, tính lại sau khi chỉ mục thay đổi
+        self._norms = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def vectorize(self, text: str):
+        """Vector TF (log) của văn bản"""
+        return vectorize_many([text], self.dimensions)[0]
+
+    def upsert(self, doc_id: int, texts: Iterable[str]) -> None:
+        """Thay các đoạn của tài liệu `doc_id` bằng `texts`"""
+        import numpy as np
+
+        texts = [text for text in texts if text and text.strip()]
+        vectors = [self.vectorize(text) for text in texts]
+        with self._lock:
+            self._remove(doc_id)
+            if not texts:
+                return
+            needed = self._size + len(texts)
+            if needed > len(self._matrix):
+                # Tăng gấp đôi dung lượng để việc thêm từng đoạn có chi phí khấu hao O(1)
+                grown = np.zeros((max(needed, 2 * len(self._matrix), 64), self.dimensions), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+            rows = list(range(self._size, needed))
+            for row, text, vector in zip(rows, texts, vectors):
+                self._matrix[row] = vector
+                self._df += vector != 0
+                self._entries.append((doc_id, text))
+            self._rows[doc_id] = rows
+            self._size = needed
+            self._norms = None
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        # Chuyển dòng cuối vào chỗ trống để ma trận luôn liền mạch
+        for row in sorted(self._rows.pop(doc_id, []), reverse=True):
+            self._df -= self._matrix[row] != 0
+            last = self._size - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                moved_doc, moved_text = self._entries[last]
+                self._entries[row] = (moved_doc, moved_text)
+                moved_rows = self._rows[moved_doc]
+                moved_rows[moved_rows.index(last)] = row
+            self._matrix[last] = 0
+            self._entries.pop()
+            self._size = last
+            self._norms = None
+
+    def centroid(self):
+        """Tổng các vector TF (đã chuẩn hoá) của mọi đoạn: đại diện cho toàn bộ nội dung trong chỉ mục"""
+        import numpy as np
+
+        with self._lock:
+            matrix = self._matrix[:self._size]
+            norms = np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            return (matrix / norms).sum(axis=0)
+
+    def _idf(self):
+        import numpy as np
+
+        return (np.log((1 + self._size) / (1 + self._df)) + 1).astype(np.float32)
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """`k` đoạn có độ tương đồng cosine (TF-IDF) cao nhất với `query`"""
+        import numpy as np
+
+        query_vector = self.vectorize(query)
+        with self._lock:
+            if not self._size or not query_vector.any() or k <= 0:
+                return []
+            matrix = self._matrix[:self._size]
+            weights = self._idf() ** 2
+            if self._norms is None:
+                self._norms = np.sqrt((matrix * matrix) @ weights)
+            query_norm = float(np.sqrt((query_vector * query_vector) @ weights))
+            scores = (matrix @ (query_vector * weights)) / np.maximum(self._norms * query_norm, 1e-12)
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                {"doc_id": self._entries[row][0], "text": self._entries[row][1], "score": round(float(scores[row]), 4)}
+                for row in top if scores[row] > min_score
+            ]
+
+    def save(self, path: str) -> None:
+        """Ghi chỉ mục ra file .npz nén (ghi file tạm rồi đổi tên để không để lại file hỏng)"""
+        import numpy as np
+
+        with self._lock:
+            matrix = self._matrix[:self._size].copy()
+            df = self._df.copy()
+            meta = {
+                "version": INDEX_VERSION,
+                "fingerprint": self.fingerprint,
+                "entries": self._entries[:],
+            }
+        encoded = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            np.savez_compressed(file, matrix=matrix, df=df, meta=encoded)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str, dimensions: int = VECTOR_DIMENSIONS) -> Optional["VectorIndex"]:
+        """Đọc chỉ mục đã lưu; None nếu không có file, file hỏng hoặc khác phiên bản/số chiều"""
+        import numpy as np
+
+        try:
+            with np.load(path) as data:
+                matrix, df = data["matrix"], data["df"]
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+        if meta.get("version") != INDEX_VERSION or matrix.shape[1] != dimensions:
+            return None
+
+        index = cls(dimensions)
+        index.fingerprint = meta.get("fingerprint")
+        index._matrix = matrix.astype(np.float32)
+        index._df = df.astype(np.int32)
+        index._size = len(matrix)
+        index._entries = [(doc_id, text) for doc_id, text in meta["entries"]]
+        for row, (doc_id, _) in enumerate(index._entries):
+            index._rows.setdefault(doc_id, []).append(row)
+        return index
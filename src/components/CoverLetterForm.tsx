@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState } from 'react';
 import { Spinner } from './Spinner';
 
 // API Base URL constant
@@ -35,78 +35,6 @@ export default function CoverLetterForm() {
   const [coverLetter, setCoverLetter] = useState<string>('');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
-  const [dataLoading, setDataLoading] = useState(true);
-
-  // Fetch skills and experience data from database
-  useEffect(() => {
-    async function fetchSkillsAndExperience() {
-      setDataLoading(true);
-      try {
-        // Fetch skills data
-        const skillsResponse = await fetch(`${API_BASE_URL}/skills`);
-        
-        // Fetch experience data
-        const experienceResponse = await fetch(`${API_BASE_URL}/experience`);
-        
-        // Parse response data once
-        let skillsData;
-        let experienceData;
-        
-        if (skillsResponse.ok) {
-          skillsData = await skillsResponse.json();
-          // Combine tech skills and soft skills for the form
-          const combinedSkills = [
-            skillsData.data?.tech_skills || '', 
-            skillsData.data?.soft_skills || ''
-          ].filter(Boolean).join('\n\n');
-          
-          setFormData(prev => ({
-            ...prev,
-            freelancer_skills: combinedSkills
-          }));
-        }
-        
-        if (experienceResponse.ok) {
-          experienceData = await experienceResponse.json();
-          console.log('Experience data:', experienceData);
-          
-          setFormData(prev => ({
-            ...prev,
-            experience_level: experienceData.data?.work_experience ? 
-              extractExperienceLevel(experienceData.data.work_experience) : '',
-            // Optionally add project experience to additional info
-            additional_info: experienceData.data?.projects ? 
-              `Dự án nổi bật:\n${Array.isArray(experienceData.data.projects) ? 
-                experienceData.data.projects.join('\n- ') : 
-                experienceData.data.projects}` : prev.additional_info
-          }));
-        }
-      } catch (err) {
-        console.error('Lỗi khi tải dữ liệu từ database:', err);
-      } finally {
-        setDataLoading(false);
-      }
-    }
-    
-    // Helper function to extract experience level from text
-    function extractExperienceLevel(workExperience: string): string {
-      // Look for patterns like "X năm kinh nghiệm" or "X+ years" in the text
-      const yearPattern = /(\d+)[\+]?\s*(năm|years)/i;
-      const match = workExperience.match(yearPattern);
-      
-      if (match) {
-        return `${match[1]} năm kinh nghiệm`;
-      }
-      
-      // If no specific year count found, return first 100 chars as summary
-      return workExperience.length > 100 ? 
-        workExperience.substring(0, 100) + '...' : 
-        workExperience;
-    }
-
-    fetchSkillsAndExperience();
-  }, []);
-
   const handleChange = (
     e: React.ChangeEvent<HTMLInputElement | HTMLTextAreaElement | HTMLSelectElement>
   ) => {
@@ -134,7 +62,8 @@ export default function CoverLetterForm() {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify(formData),
+        // Empty skills/experience fields are filled server-side from the saved profile
+        body: JSON.stringify({ ...formData, use_profile: true }),
       });
       
       if (!response.ok) {
@@ -168,13 +97,6 @@ export default function CoverLetterForm() {
         <form onSubmit={handleSubmit} className="bg-white rounded-lg border border-blue-100 p-6">
           <h2 className="text-2xl font-semibold text-blue-800 mb-6">Thông tin</h2>
           
-          {dataLoading && (
-            <div className="mb-4 p-3 bg-blue-50 text-blue-600 rounded-md border border-blue-100 flex items-center">
-              <Spinner size="small" />
-              <span className="ml-2">Đang tải thông tin từ hồ sơ của bạn...</span>
-            </div>
-          )}
-          
           <div className="mb-6">
             <label htmlFor="job_description" className="block text-blue-700 font-medium mb-2">
               Mô tả công việc <span className="text-red-500">*</span>
@@ -199,7 +121,7 @@ export default function CoverLetterForm() {
               name="freelancer_skills"
               value={formData.freelancer_skills}
               onChange={handleChange}
-              placeholder="Mô tả kỹ năng và chuyên môn của bạn..."
+              placeholder="Để trống để dùng kỹ năng trong hồ sơ của bạn..."
               className="w-full p-3 border border-blue-200 rounded-md focus:ring-2 focus:ring-blue-400 focus:border-blue-400 min-h-24"
             />
           </div>
@@ -215,7 +137,7 @@ export default function CoverLetterForm() {
                 name="experience_level"
                 value={formData.experience_level}
                 onChange={handleChange}
-                placeholder="Ví dụ: 5 năm kinh nghiệm"
+                placeholder="Để trống để lấy từ hồ sơ"
                 className="w-full p-3 border border-blue-200 rounded-md focus:ring-2 focus:ring-blue-400 focus:border-blue-400"
               />
             </div>
@@ -249,7 +171,7 @@ export default function CoverLetterForm() {
               name="additional_info"
               value={formData.additional_info}
               onChange={handleChange}
-              placeholder="Thông tin thêm mà bạn muốn đề cập..."
+              placeholder="Thông tin thêm mà bạn muốn đề cập (dự án trong hồ sơ được tự động thêm vào)..."
               className="w-full p-3 border border-blue-200 rounded-md focus:ring-2 focus:ring-blue-400 focus:border-blue-400 min-h-24"
             />
           </div>